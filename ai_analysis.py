@@ -6,6 +6,12 @@ import base64
 from PIL import Image
 import io
 from utils import show_popup_message, logger, resource_path
+from config import AI_CONFIG, PLAYER_NAME_MATCH_CUTOFF, PLAYER_NAMES_PROMPT
+from ollama_client import ollama_client
+from model_selector import model_selector
+from counter_index import counter_index
+from incremental_json import IncrementalJSONParser
+from analysis_models import CivAnalysis, PlayerNames, CIV_ANALYSIS_SCHEMA, PLAYER_NAMES_SCHEMA, parse_model_output
 import psutil  # For monitoring system resources
 
 class AIAnalysis:
@@ -18,9 +24,20 @@ class AIAnalysis:
         "rope_frequency_scale": 1.0,
     }
     @staticmethod
-    def analyze_civ_screenshot(image_path, model_name="gemma3:4b-it-qat", prompt=None):
-        """Analyze a civilization screenshot using Ollama's multimodal capabilities"""
-        return AIAnalysis.analyze_image_ollama(image_path, prompt, model_name)
+    def analyze_civ_screenshot(image, model_name="gemma3:4b-it-qat", prompt=None):
+        """Analyze a civilization screenshot (path or CapturedFrame) using Ollama's multimodal capabilities"""
+        return AIAnalysis.analyze_image_ollama(image, prompt, model_name, response_format=CIV_ANALYSIS_SCHEMA)
+
+    @staticmethod
+    def read_player_names(image, model_name="gemma3:4b-it-qat"):
+        """
+        Player names of the civ panel rows in an image, top to bottom.
+
+        Raises:
+            ValueError: If the model answer holds no list of names
+        """
+        answer = AIAnalysis.analyze_image_ollama(image, PLAYER_NAMES_PROMPT, model_name, response_format=PLAYER_NAMES_SCHEMA)
+        return parse_model_output(answer, PlayerNames).players
 
     @staticmethod
     def transcribe_audio(audio_path, model_name="whisper"):
@@ -31,7 +48,6 @@ class AIAnalysis:
                 audio_data = audio_file.read()
             
             # Create Ollama API request
-            url = "http://localhost:11434/api/generate"
             payload = {
                 "model": model_name,
                 "prompt": "Transcribe this audio accurately:",
@@ -41,9 +57,7 @@ class AIAnalysis:
                 }
             }
             
-            response = requests.post(url, json=payload, timeout=60)
-            response.raise_for_status()
-            result = response.json()
+            result = ollama_client.generate(payload, timeout=60)
             
             return result.get("response", "")
         except Exception as e:
@@ -51,62 +65,162 @@ class AIAnalysis:
             return f"Transcription failed: {str(e)}"
 
     @staticmethod
-    def analyze_image_ollama(image_path, prompt, model_name="gemma3:4b-it-qat"):
+    def encode_image(image, max_size=1024, quality=85):
+        """
+        Prepare an image for Ollama and return it as a base64 JPEG string.
+
+        Args:
+            image: A file path, a PIL image, or a CapturedFrame from ScreenshotManager
+            max_size (int): Longest side in pixels (Gemma models work well with images up to 1024px)
+            quality (int): JPEG quality used for the payload
+
+        Returns:
+            str: Base64 encoded JPEG
+        """
+        # CapturedFrame keeps its encoded payload so repeated analyses don't re-encode
+        encoded_cache = getattr(image, "encoded_cache", None)
+        cache_key = (max_size, quality)
+        if encoded_cache is not None and cache_key in encoded_cache:
+            return encoded_cache[cache_key]
+
+        if isinstance(image, (str, os.PathLike)):
+            if not os.path.exists(image):
+                raise FileNotFoundError(f"Image not found at {image}")
+            with Image.open(image) as img:
+                base64_image = AIAnalysis._encode_pil_image(img, max_size, quality)
+        else:
+            base64_image = AIAnalysis._encode_pil_image(getattr(image, "image", image), max_size, quality)
+
+        if encoded_cache is not None:
+            encoded_cache[cache_key] = base64_image
+        return base64_image
+
+    @staticmethod
+    def _encode_pil_image(img, max_size, quality):
+        """Resize (if needed) and JPEG/base64 encode a PIL image"""
+        # Convert to RGB if needed
+        if img.mode != "RGB":
+            img = img.convert("RGB")
+
+        # Resize if too large
+        if max(img.size) > max_size:
+            ratio = max_size / max(img.size)
+            new_size = (int(img.size[0] * ratio), int(img.size[1] * ratio))
+            img = img.resize(new_size, Image.LANCZOS)
+
+        img_byte_arr = io.BytesIO()
+        img.save(img_byte_arr, format='JPEG', quality=quality)
+        return base64.b64encode(img_byte_arr.getvalue()).decode('utf-8')
+
+    @staticmethod
+    def _image_payloads(base64_image, prompt, model_name, stream=False, response_format=None):
+        """Build the /api/generate payload and its /api/chat fallback for an image prompt"""
+        content = f"{prompt}\n\nAnalyze this image and provide the results in the requested JSON format:"
+        payload = {
+            "model": model_name,
+            "prompt": content,
+            "stream": stream,
+            "images": [base64_image],
+            "options": AIAnalysis.optimization_options
+        }
+        chat_payload = {
+            "model": model_name,
+            "messages": [
+                {
+                    "role": "user",
+                    "content": content,
+                    "images": [base64_image]
+                }
+            ],
+            "stream": stream,
+            "options": AIAnalysis.optimization_options
+        }
+        if response_format is not None:
+            # Constrain decoding to the expected JSON schema (Ollama structured outputs)
+            payload["format"] = response_format
+            chat_payload["format"] = response_format
+        return payload, chat_payload
+
+    @staticmethod
+    def _stream_text(payload, chat_payload):
+        """Yield response text pieces from /api/generate, falling back to /api/chat on 404"""
+        try:
+            for chunk in ollama_client.stream("/api/generate", payload):
+                yield chunk.get("response", "")
+        except requests.exceptions.HTTPError as e:
+            if e.response is None or e.response.status_code != 404:
+                raise
+            logger.info("Trying alternative chat endpoint after 404")
+            for chunk in ollama_client.stream("/api/chat", chat_payload):
+                yield chunk.get("message", {}).get("content", "")
+
+    @staticmethod
+    def analyze_image_ollama_stream(image, prompt, model_name="gemma3:4b-it-qat", on_field=None, required_keys=None,
+                                    response_format=None):
+        """
+        Analyze an image with a streamed Ollama response, reporting JSON fields as they complete
+
+        Args:
+            image: Path to the image file, a PIL image, or an in-memory CapturedFrame
+            prompt (str): System prompt for image analysis
+            model_name (str): The Ollama model to use (default: gemma3:4b-it-qat)
+            on_field (callable): Called as on_field(key, value, fields_so_far) for each completed top-level field
+            required_keys (iterable): Stop the stream as soon as all of these keys have been received
+            response_format (dict): Optional JSON schema passed as Ollama's `format` constraint
+
+        Returns:
+            str: The JSON text (or the fields received before stopping early), or an error message
+        """
+        try:
+            base64_image = AIAnalysis.encode_image(image)
+            payload, chat_payload = AIAnalysis._image_payloads(base64_image, prompt, model_name, stream=True,
+                                                               response_format=response_format)
+            parser = IncrementalJSONParser()
+            pieces = []
+
+            logger.info("Streaming image analysis from Ollama")
+            for text in AIAnalysis._stream_text(payload, chat_payload):
+                pieces.append(text)
+                for key, value in parser.feed(text):
+                    if on_field:
+                        try:
+                            on_field(key, value, parser.fields)
+                        except Exception as e:
+                            logger.error(f"Error handling streamed field '{key}': {str(e)}")
+
+                if required_keys and parser.has_fields(required_keys):
+                    # Everything the caller needs is here; closing the stream stops generation
+                    logger.info("All required fields received, stopping the stream early")
+                    return json.dumps(parser.fields)
+
+            return "".join(pieces)
+        except requests.exceptions.ConnectionError as conn_err:
+            logger.error(f"Ollama server is not accessible: {str(conn_err)}")
+            return "Error: Ollama is not running or accessible. Please start Ollama service."
+        except Exception as e:
+            logger.error(f"Streamed image analysis error: {str(e)}")
+            return f"Image analysis failed: {str(e)}"
+
+    @staticmethod
+    def analyze_image_ollama(image, prompt, model_name="gemma3:4b-it-qat", response_format=None):
         """
         Analyze an image using Ollama's multimodal capabilities
         
         Args:
-            image_path (str): Path to the image file
+            image: Path to the image file, a PIL image, or an in-memory CapturedFrame
             prompt (str): System prompt for image analysis
             model_name (str): The Ollama model to use (default: gemma3:4b-it-qat)
+            response_format (dict): Optional JSON schema passed as Ollama's `format` constraint
             
         Returns:
             str: Analysis result in the requested format
         """
         try:
-            # Check if Ollama is running first
-            try:
-                check_url = "http://localhost:11434/api/tags"
-                check_response = requests.get(check_url, timeout=5)
-                check_response.raise_for_status()
-            except Exception as e:
-                logger.error(f"Ollama server is not accessible: {str(e)}")
-                return "Error: Ollama is not running or accessible. Please start Ollama service."
-                
-            # Check if image exists
-            if not os.path.exists(image_path):
-                raise FileNotFoundError(f"Image not found at {image_path}")
-            
-            # Optimize image if needed
-            with Image.open(image_path) as img:
-                # Convert to RGB if needed
-                if img.mode != "RGB":
-                    img = img.convert("RGB")
-                
-                # Resize if too large (Gemma models work well with images up to 1024px)
-                max_size = 1024
-                if max(img.size) > max_size:
-                    ratio = max_size / max(img.size)
-                    new_size = (int(img.size[0] * ratio), int(img.size[1] * ratio))
-                    img = img.resize(new_size, Image.LANCZOS)
-                
-                # Save to bytes
-                img_byte_arr = io.BytesIO()
-                img.save(img_byte_arr, format='JPEG', quality=85)
-                img_byte_arr = img_byte_arr.getvalue()
-                
-                # Encode to base64
-                base64_image = base64.b64encode(img_byte_arr).decode('utf-8')
+            base64_image = AIAnalysis.encode_image(image)
             
             # Create Ollama API request
-            url = "http://localhost:11434/api/generate"
-            payload = {
-                "model": model_name,
-                "prompt": f"{prompt}\n\nAnalyze this image and provide the results in the requested JSON format:",
-                "stream": False,
-                "images": [base64_image],
-                "options": AIAnalysis.optimization_options
-            }
+            payload, chat_payload = AIAnalysis._image_payloads(base64_image, prompt, model_name,
+                                                               response_format=response_format)
             
             # Make the request
             max_retries = 3
@@ -117,24 +231,11 @@ class AIAnalysis:
                     logger.info(f"Sending image analysis request to Ollama, attempt {attempt + 1}")
                     
                     try:
-                        response = requests.post(url, json=payload, timeout=60)
+                        response = ollama_client.post("/api/generate", payload)
                         if response.status_code == 404:
                             # Try alternative endpoint - Ollama may have changed API structure
-                            url_alt = "http://localhost:11434/api/chat"
-                            chat_payload = {
-                                "model": model_name,
-                                "messages": [
-                                    {
-                                        "role": "user",
-                                        "content": f"{prompt}\n\nAnalyze this image and provide the results in the requested JSON format:",
-                                        "images": [base64_image]
-                                    }
-                                ],
-                                "stream": False,
-                                "options": AIAnalysis.optimization_options
-                            }
                             logger.info(f"Trying alternative chat endpoint after 404")
-                            response = requests.post(url_alt, json=chat_payload, timeout=60)
+                            response = ollama_client.post("/api/chat", chat_payload)
                         response.raise_for_status()
                         
                         result = response.json()
@@ -146,6 +247,10 @@ class AIAnalysis:
                         else:
                             # /api/generate endpoint
                             return result.get("response", "")
+                    except requests.exceptions.ConnectionError as conn_err:
+                        # The server is down, retrying won't help; the client has recorded the failure
+                        logger.error(f"Ollama server is not accessible: {str(conn_err)}")
+                        return "Error: Ollama is not running or accessible. Please start Ollama service."
                     except requests.exceptions.RequestException as req_err:
                         logger.error(f"Request error: {str(req_err)}")
                         raise req_err
@@ -164,55 +269,71 @@ class AIAnalysis:
 
     @staticmethod
     def test_ollama_connection(model_name="gemma3:4b-it-qat"):
-        """Test if Ollama is running and the specified model is available"""
+        """
+        Liveness check: Ollama answers and the model is installed.
+
+        Doesn't generate anything; warm_up_model() loads the model.
+        """
         try:
             # First check if Ollama server is running
-            url = "http://localhost:11434/api/tags"
-            response = requests.get(url, timeout=10)
-            response.raise_for_status()
+            models = ollama_client.list_models(timeout=10)
             
             # Then check if the requested model is available
-            models = response.json().get("models", [])
             available_models = [model["name"] for model in models]
             
             if model_name in available_models:
                 logger.info(f"Model {model_name} is available")
-                
-                # Test model with a simple prompt
-                test_url = "http://localhost:11434/api/generate"
-                test_payload = {
-                    "model": model_name,
-                    "prompt": "Respond with 'OK' if you can read this message.",
-                    "stream": False,
-                    "options": AIAnalysis.optimization_options
-                }
-                
-                test_response = requests.post(test_url, json=test_payload, timeout=30)
-                test_response.raise_for_status()
-                result = test_response.json()
-                
-                if "OK" in result.get("response", ""):
-                    return True, f"Ollama is running and model '{model_name}' is working correctly."
-                else:
-                    return True, f"Ollama is running and model '{model_name}' is available, but response validation failed."
+                return True, f"Ollama is running and model '{model_name}' is available."
             else:
                 available_str = ", ".join(available_models) if available_models else "No models found"
                 return False, f"Model '{model_name}' is not available. Available models: {available_str}"
                 
         except requests.exceptions.ConnectionError:
-            return False, "Cannot connect to Ollama. Make sure Ollama is running on localhost:11434."
+            return False, f"Cannot connect to Ollama. Make sure Ollama is running on {ollama_client.base_url}."
         except Exception as e:
             return False, f"Connection test failed: {str(e)}"
 
+    @staticmethod
+    def warm_up_model(model_name=None, timeout=None):
+        """
+        Load a model into memory so the first real analysis isn't a cold start.
+
+        Sends a one-token request with a tiny image, which loads the weights and
+        the vision encoder; the client's keep_alive keeps the model resident
+        afterwards. The outcome is recorded on ollama_client (is_model_ready()).
+
+        Returns:
+            tuple: (success, message, seconds the warm-up took)
+        """
+        settings = AI_CONFIG.get("ollama", {})
+        model_name = model_name or model_selector.model_for("resource")
+        start = time.monotonic()
+        try:
+            payload = {
+                "model": model_name,
+                "prompt": "Reply with one word.",
+                "stream": False,
+                "images": [AIAnalysis._encode_pil_image(Image.new("RGB", (16, 16), "grey"), 16, 50)],
+                "options": dict(AIAnalysis.optimization_options, num_predict=1),
+            }
+            result = ollama_client.generate(payload, timeout=timeout or settings.get("warmup_timeout", 120))
+            seconds = time.monotonic() - start
+            # load_duration (ns) is the part spent loading weights; near zero if the model was already resident
+            load_seconds = result.get("load_duration", 0) / 1e9
+            ollama_client.mark_model_ready(model_name, seconds)
+            logger.info(f"Model {model_name} warmed up in {seconds:.1f}s (load {load_seconds:.1f}s)")
+            return True, f"Model '{model_name}' ready (loaded in {seconds:.1f}s).", seconds
+        except Exception as e:
+            seconds = time.monotonic() - start
+            ollama_client.mark_model_ready(model_name, None)
+            logger.error(f"Failed to warm up model {model_name}: {str(e)}")
+            return False, f"Model '{model_name}' failed to load: {str(e)}", seconds
+
     @staticmethod
     def list_available_ollama_models():
         """Get a list of available Ollama models with size estimates"""
         try:
-            url = "http://localhost:11434/api/tags"
-            response = requests.get(url, timeout=10)
-            response.raise_for_status()
-            
-            models = response.json().get("models", [])
+            models = ollama_client.list_models(timeout=10)
             result = []
             
             for model in models:
@@ -245,64 +366,49 @@ class AIAnalysis:
             return None
 
     @staticmethod
-    def get_counters_for_civs(civ_analysis_output):
+    def get_counters_for_civs(civ_analysis_output, username="", teammates=""):
         """
         Takes the output from analyze_civ_screenshot and finds appropriate counters
-        for each civilization's unique units.
+        for each enemy civilization's unique units.
 
         Args:
         civ_analysis_output (str): A JSON string containing civilization information.
+        username (str): The user's name; their own civilization is left out.
+        teammates (str): Comma-separated teammate names, left out as well.
 
         Returns:
         str: A formatted string containing counter information for each civilization.
         """
         try:
-            # Parse the JSON string into a Python dictionary
-            civ_analysis = json.loads(civ_analysis_output)
-            
-            counter_data_path = resource_path('counters_data/aoe2_counter_unique_gemini.json')
-            with open(counter_data_path, 'r') as f:
-                counter_data = json.load(f)
+            # Parse the model answer (tolerating fences/preambles) into player -> civ
+            civ_analysis = parse_model_output(civ_analysis_output, CivAnalysis)
+            # The prompt asks the model to leave out the user's side, but it doesn't always
+            enemies = civ_analysis.enemy_civilizations([username] + teammates.split(","), PLAYER_NAME_MATCH_CUTOFF)
+            # The counter data is loaded once, with each civ's HTML prerendered
+            counter_info = counter_index.render_civs(enemies)
         except FileNotFoundError:
             return "Error: Counter data file not found."
-        except json.JSONDecodeError:
+        except ValueError:
             return "Error: Invalid JSON in counter data file or civ analysis output."
 
-        counter_info = []
-
-        for civ in civ_analysis.values():
-            if civ in counter_data:
-                civ_info = counter_data[civ]
-                unique_units = civ_info.get('unique_units', [])
-                counters = civ_info.get('counters', {})
-                units_to_avoid = civ_info.get('units_to_avoid', {})
-                tips = civ_info.get('tips', '')
-
-                civ_counter_info = f"<h2>{civ}</h2>"
-                civ_counter_info += f"<p><strong>Unique Units:</strong> {', '.join(unique_units)}</p>"
-
-                if isinstance(counters, dict):
-                    civ_counter_info += "<ul>"
-                    for unit, unit_counters in counters.items():
-                        civ_counter_info += f"<li><strong>{unit}:</strong> {', '.join(unit_counters)}</li>"
-                    civ_counter_info += "</ul>"
-                else:
-                    civ_counter_info += f"<p><strong>Counters:</strong> {', '.join(counters)}</p>"
-
-                if isinstance(units_to_avoid, dict):
-                    civ_counter_info += "<ul>"
-                    for unit, avoid_units in units_to_avoid.items():
-                        civ_counter_info += f"<li><strong>Units to avoid for {unit}:</strong> {', '.join(avoid_units)}</li>"
-                    civ_counter_info += "</ul>"
-                else:
-                    civ_counter_info += f"<p><strong>Units to avoid:</strong> {', '.join(units_to_avoid)}</p>"
+        if len(enemies) > 1:
+            counter_info += AIAnalysis.get_army_counters(enemies)
+        return counter_info
 
-                civ_counter_info += f"<p><strong>Tips:</strong> {tips}</p>"
-                counter_info.append(civ_counter_info)
-            else:
-                counter_info.append(f"<p>No counter information available for {civ}.</p>")
-
-        return "\n".join(counter_info)
+    @staticmethod
+    def get_army_counters(civilizations):
+        """Counters ranked against the unique units of all the given enemy civilizations together"""
+        try:
+            from army_scorer import army_scorer
+            from counter_graph import counter_graph
+            composition = {unit: 1 for civ in civilizations for unit in counter_graph.unique_units(civ)}
+            ranked = army_scorer.score(composition)
+        except (OSError, ValueError) as e:
+            logger.error(f"Could not rank counters for the whole army: {str(e)}")
+            return ""
+        if not ranked:
+            return ""
+        return f"\n<h2>Against all their unique units</h2><p>{', '.join(unit for unit, _ in ranked)}</p>"
     
     @staticmethod
     def get_system_resource_info():
@@ -314,6 +420,7 @@ class AIAnalysis:
             # Try to get GPU info if available
             gpu_info = {}
             gpu_memory_gb = None
+            gputil_available = True
             try:
                 import GPUtil
                 gpus = GPUtil.getGPUs()
@@ -323,11 +430,15 @@ class AIAnalysis:
                     gpu_info = {
                         "name": gpu.name,
                         "memory_total_gb": gpu_memory_gb,
+                        "memory_total_mb": gpu.memoryTotal,  # unrounded, for threshold checks
                         "memory_used_gb": round(gpu.memoryUsed / 1024, 1),
                         "memory_percent": round(gpu.memoryUtil * 100, 1),
                         "load_percent": round(gpu.load * 100, 1)
                     }
-            except (ImportError, Exception) as e:
+            except ImportError as e:
+                gputil_available = False
+                logger.warning(f"Failed to get GPU info: {str(e)}")
+            except Exception as e:
                 logger.warning(f"Failed to get GPU info: {str(e)}")
                 
             return {
@@ -336,7 +447,8 @@ class AIAnalysis:
                 "ram_used_gb": round(memory.used / (1024**3), 1),
                 "ram_total_gb": round(memory.total / (1024**3), 1),
                 "gpu_info": gpu_info,
-                "gpu_memory_gb": gpu_memory_gb
+                "gpu_memory_gb": gpu_memory_gb,
+                "gputil_available": gputil_available
             }
         except Exception as e:
             logger.error(f"Error getting system resources: {str(e)}")
@@ -357,8 +469,9 @@ if __name__ == "__main__":
         print("3. Test Ollama connection")
         print("4. List available Ollama models")
         print("5. Check system resources")
-        print("6. Exit")
-        choice = input("Enter your choice (1-6): ")
+        print("6. Benchmark installed models and select the fastest")
+        print("7. Exit")
+        choice = input("Enter your choice (1-7): ")
 
         if choice == '1':
             resource_test_image_path = "images/test_resource.jpg"
@@ -492,8 +605,21 @@ if __name__ == "__main__":
             print("ollama pull gemma3:12b-it-qat # Higher quality, needs more resources (12B)")
             
         elif choice == '6':
+            print("Benchmarking the installed multimodal models on the test images, this can take a few minutes...")
+            profile = model_selector.benchmark(
+                on_progress=lambda model, task, result: print(
+                    f"  {model:<28} {task:<9} {result['latency']:6.2f}s  accuracy {result['accuracy']:.0%}"))
+            if profile is None:
+                print("No multimodal models found or couldn't connect to Ollama")
+            else:
+                print(f"\nProfile saved to {model_selector.profile_path}")
+                for task in ("resource", "civ"):
+                    selected = profile["selected"].get(task)
+                    print(f"{task}: {selected or f'no model reached the accuracy floor, using {model_selector.default_model()}'}")
+
+        elif choice == '7':
             print("Exiting...")
             break
 
         else:
-            print("Invalid choice. Please enter a number between 1 and 6.")
+            print("Invalid choice. Please enter a number between 1 and 7.")
@@ -0,0 +1,117 @@
+import time
+import threading
+from config import ALERT_DELIVERY_SPACING, ALERT_COOLDOWNS, ALERT_PRIORITIES
+from utils import logger
+
+class Alert:
+    """One warning: the sound, the colour flash and the telemetry action sent when it is delivered"""
+
+    def __init__(self, alert_type, audio_file=None, flash=None, description=""):
+        self.alert_type = alert_type
+        self.audio_file = audio_file
+        self.flash = flash  # color_flash_signal arguments, or None
+        self.description = description
+        self.priority = ALERT_PRIORITIES.get(alert_type, 0)
+
+    def __repr__(self):
+        return f"Alert({self.alert_type!r}, priority={self.priority})"
+
+class AlertDispatcher:
+    """
+    Decides which alerts are delivered and when, without blocking the caller.
+
+    Checks call raise_alert() every cycle their condition holds, and clear()
+    once it no longer does. The dispatcher turns that into deliveries:
+
+    - an alert that is already waiting is replaced by the newer one (coalescing),
+    - an alert type is delivered at most once per cooldown; clear() drops a
+      waiting alert but keeps the cooldown, so a condition flapping at its
+      threshold can't repeat the alert sooner (hysteresis is up to the check,
+      which clears past a separate re-arm threshold),
+    - waiting alerts are delivered highest priority first, `spacing` seconds
+      apart, from a timer thread instead of a sleeping loop.
+
+    `deliver` is called with each Alert on the timer thread.
+    """
+
+    def __init__(self, deliver, spacing=ALERT_DELIVERY_SPACING, cooldowns=ALERT_COOLDOWNS, clock=time.monotonic):
+        self.deliver = deliver
+        self.spacing = spacing
+        self.cooldowns = cooldowns
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._pending = {}         # alert_type -> Alert waiting for delivery
+        self._last_delivered = {}  # alert_type -> last delivery time
+        self._next_slot = 0.0
+        self._timer = None
+        self.stats = {"raised": 0, "delivered": 0, "coalesced": 0, "suppressed": 0}
+
+    def raise_alert(self, alert):
+        """
+        Ask for an alert to be delivered.
+
+        Returns:
+            bool: False if the alert was suppressed by its cooldown
+        """
+        with self._lock:
+            self.stats["raised"] += 1
+            last = self._last_delivered.get(alert.alert_type)
+            if last is not None and self.clock() - last < self.cooldowns.get(alert.alert_type, 0):
+                self.stats["suppressed"] += 1
+                return False
+            if alert.alert_type in self._pending:
+                self.stats["coalesced"] += 1
+            self._pending[alert.alert_type] = alert
+            self._schedule()
+            return True
+
+    def clear(self, alert_type):
+        """The alert's condition is over: drop it if still waiting (its cooldown keeps running)"""
+        with self._lock:
+            if self._pending.pop(alert_type, None) is not None:
+                logger.debug(f"Alert {alert_type} cleared before delivery")
+
+    def _schedule(self):
+        """Start the timer for the next delivery slot (caller holds the lock)"""
+        if self._timer is not None or not self._pending:
+            return
+        delay = max(0.0, self._next_slot - self.clock())
+        self._timer = threading.Timer(delay, self._deliver_next)
+        self._timer.daemon = True
+        self._timer.start()
+
+    def _deliver_next(self):
+        with self._lock:
+            self._timer = None
+            if not self._pending:
+                return
+            alert = max(self._pending.values(), key=lambda pending: pending.priority)
+            del self._pending[alert.alert_type]
+            now = self.clock()
+            self._last_delivered[alert.alert_type] = now
+            self._next_slot = now + self.spacing
+            self.stats["delivered"] += 1
+            self._schedule()
+        try:
+            self.deliver(alert)
+        except Exception as e:
+            logger.error(f"Error delivering alert {alert.alert_type}: {str(e)}")
+
+    def pending(self):
+        """Alert types waiting for delivery, highest priority first"""
+        with self._lock:
+            return [alert.alert_type for alert in sorted(self._pending.values(), key=lambda a: -a.priority)]
+
+    def reset(self):
+        """Drop waiting alerts, re-arm every alert type and stop the timer"""
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            self._pending.clear()
+            self._last_delivered.clear()
+            self._next_slot = 0.0
+
+    def get_stats(self):
+        with self._lock:
+            return dict(self.stats, pending=len(self._pending))
@@ -0,0 +1,109 @@
+from PyQt6.QtWidgets import QWidget, QApplication, QGraphicsOpacityEffect
+from PyQt6.QtCore import Qt, QPropertyAnimation, QRect, QPointF
+from PyQt6.QtGui import QColor, QFont, QFontMetricsF, QPainter, QPainterPath, QPen
+from config import ALERT_FADE_DURATION
+from utils import logger
+
+class FlashSlot(QWidget):
+    """
+    One coloured box of the overlay with outlined text.
+
+    Its opacity is animated by a single QPropertyAnimation: it appears at the
+    requested opacity, holds for the alert duration and then fades out, all on
+    the Qt event loop.
+    """
+
+    def __init__(self, parent):
+        super().__init__(parent)
+        self.color = QColor("grey")
+        self.text = ""
+        self.effect = QGraphicsOpacityEffect(self)
+        self.effect.setOpacity(0.0)
+        self.setGraphicsEffect(self.effect)
+        self.animation = QPropertyAnimation(self.effect, b"opacity", self)
+        self.animation.finished.connect(self.hide)
+
+    def flash(self, color, duration, opacity, text):
+        """(Re)start the slot: shown at `opacity` for `duration` seconds, then faded out"""
+        self.color = QColor(color)
+        self.text = text
+        fade = ALERT_FADE_DURATION
+        total = duration + fade
+        self.animation.stop()
+        self.animation.setDuration(int(total * 1000))
+        self.animation.setKeyValues([(0.0, opacity), (duration / total, opacity), (1.0, 0.0)])
+        self.show()
+        self.raise_()
+        self.update()
+        self.animation.start()
+
+    def is_active(self):
+        return self.animation.state() == QPropertyAnimation.State.Running
+
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+        painter.fillRect(self.rect(), self.color)
+        if not self.text:
+            return
+
+        font = QFont("Arial", 18, QFont.Weight.Bold)
+        # Shrink the font until the text fits, like the old wrapped canvas text
+        while font.pointSize() > 8 and QFontMetricsF(font).horizontalAdvance(self.text) > self.width() - 10:
+            font.setPointSize(font.pointSize() - 1)
+        metrics = QFontMetricsF(font)
+        origin = QPointF((self.width() - metrics.horizontalAdvance(self.text)) / 2,
+                         (self.height() + metrics.capHeight()) / 2)
+        path = QPainterPath()
+        path.addText(origin, font, self.text)
+        painter.strokePath(path, QPen(QColor("black"), 2))
+        painter.fillPath(path, QColor("white"))
+
+class AlertOverlay(QWidget):
+    """
+    Transparent, click-through, always-on-top window that shows colour flash alerts.
+
+    One overlay covers the primary screen for the lifetime of the app. Each
+    flash location gets a FlashSlot that is reused by later alerts at the same
+    place; the overlay hides itself once no slot is animating, so it costs
+    nothing between alerts. show_flash() has the signature of
+    ResourceAlertsThread.color_flash_signal and can be connected to it directly.
+    """
+
+    def __init__(self):
+        super().__init__(None, Qt.WindowType.FramelessWindowHint | Qt.WindowType.WindowStaysOnTopHint |
+                         Qt.WindowType.Tool | Qt.WindowType.WindowTransparentForInput |
+                         Qt.WindowType.WindowDoesNotAcceptFocus)
+        self.setAttribute(Qt.WidgetAttribute.WA_TranslucentBackground)
+        self.setAttribute(Qt.WidgetAttribute.WA_ShowWithoutActivating)
+        self.setAttribute(Qt.WidgetAttribute.WA_TransparentForMouseEvents)
+        self.slots = {}  # (x, y, width, height) -> FlashSlot
+
+    def show_flash(self, color, duration, location=(0, 0), size=(100, 100), opacity=0.5, text=""):
+        """Show a colour flash at a screen position (same arguments as the old tkinter color_flash)"""
+        logger.debug(f"show_flash called with: {color}, {duration}, {location}, {size}, {opacity}, {text}")
+        screen = QApplication.primaryScreen().geometry()
+        if self.geometry() != screen:
+            self.setGeometry(screen)
+
+        key = (*location, *size)
+        slot = self.slots.get(key)
+        if slot is None:
+            slot = FlashSlot(self)
+            slot.setGeometry(QRect(location[0] - screen.x(), location[1] - screen.y(), size[0], size[1]))
+            slot.animation.finished.connect(self._hide_when_idle)
+            self.slots[key] = slot
+        slot.flash(color, duration, opacity, text)
+        if not self.isVisible():
+            self.show()
+
+    def _hide_when_idle(self):
+        if not any(slot.is_active() for slot in self.slots.values()):
+            self.hide()
+
+    def clear(self):
+        """Stop every flash and hide the overlay"""
+        for slot in self.slots.values():
+            slot.animation.stop()
+            slot.hide()
+        self.hide()
@@ -0,0 +1,100 @@
+import json
+import difflib
+from typing import Dict, List
+from typing_extensions import Annotated
+from pydantic import BaseModel, BeforeValidator, ConfigDict, Field, RootModel
+
+def _to_int(value):
+    """Accept the model's numbers in any of the forms it likes to write them ("1,200", " 35 ", "", 12.0)"""
+    if value is None or isinstance(value, bool):
+        return 0
+    if isinstance(value, (int, float)):
+        return int(value)
+    text = str(value).strip().replace(",", "").replace(" ", "")
+    if not text:
+        return 0
+    return int(float(text))
+
+Count = Annotated[int, BeforeValidator(_to_int)]
+
+class _AnalysisModel(BaseModel):
+    # Accept both the prompt's keys ("Current House limit") and the Python names,
+    # and list every field as required in the schema sent to Ollama
+    model_config = ConfigDict(populate_by_name=True, json_schema_serialization_defaults_required=True)
+
+class ResourceCounts(_AnalysisModel):
+    wood: Count = Field(0, alias="Wood")
+    food: Count = Field(0, alias="Food")
+    gold: Count = Field(0, alias="Gold")
+    stone: Count = Field(0, alias="Stone")
+
+    def items(self):
+        """(resource name, amount) pairs using the in-game names"""
+        return self.model_dump(by_alias=True).items()
+
+class UnitCounts(_AnalysisModel):
+    total: Count = Field(0, alias="number of total units")
+    house_limit: Count = Field(0, alias="Current House limit")
+
+class ResourceReading(_AnalysisModel):
+    """One reading of the resource bar, as returned for RESOURCE_CHECK_PROMPT"""
+    resources: ResourceCounts = Field(default_factory=ResourceCounts, alias="Resources")
+    villagers_on_resource: ResourceCounts = Field(default_factory=ResourceCounts, alias="Villagers_on_resource")
+    villagers: Count = Field(0, alias="Villagers")
+    units: UnitCounts = Field(default_factory=UnitCounts, alias="Units")
+    idle_villagers: Count = Field(0, alias="Idle Villagers")
+    current_age: str = Field("", alias="Current_age")
+    time: str = Field("", alias="Time")
+
+class CivAnalysis(RootModel[Dict[str, str]]):
+    """Player name -> full civilization name, as returned for the civ counter prompt"""
+
+    def civilizations(self):
+        return list(self.root.values())
+
+    def enemy_civilizations(self, own_players, cutoff=0.8):
+        """
+        Civilizations of every player not listed in own_players (the user and their teammates).
+
+        Names are compared ignoring case, and a name read with a slip still counts
+        as listed when its similarity (0-1) to a listed name is at least cutoff.
+        """
+        own = [name.strip().casefold() for name in own_players if name.strip()]
+        return [civ for player, civ in self.root.items()
+                if not difflib.get_close_matches(player.strip().casefold(), own, n=1, cutoff=cutoff)]
+
+class PlayerNames(_AnalysisModel):
+    """Player names of some civ panel rows, top to bottom, as returned for PLAYER_NAMES_PROMPT"""
+    players: List[str] = Field(default_factory=list, alias="Players")
+
+def response_schema(model_cls):
+    """JSON schema for Ollama's `format` option, using the same keys as the prompts"""
+    return model_cls.model_json_schema(by_alias=True, mode="serialization")
+
+RESOURCE_READING_SCHEMA = response_schema(ResourceReading)
+CIV_ANALYSIS_SCHEMA = response_schema(CivAnalysis)
+PLAYER_NAMES_SCHEMA = response_schema(PlayerNames)
+
+def extract_json_text(text):
+    """
+    Return the first JSON object in a model answer.
+
+    Tolerates preambles ("Here is the JSON:") and ```json fences around the object.
+
+    Raises:
+        json.JSONDecodeError: If no JSON object can be found
+    """
+    start = text.find("{")
+    if start == -1:
+        raise json.JSONDecodeError("No JSON object found in model output", text, 0)
+    _, end = json.JSONDecoder().raw_decode(text, start)
+    return text[start:end]
+
+def parse_model_output(text, model_cls):
+    """
+    Parse a model answer into a typed result.
+
+    Raises:
+        ValueError: json.JSONDecodeError or pydantic.ValidationError (both ValueError subclasses)
+    """
+    return model_cls.model_validate_json(extract_json_text(text))
@@ -1,17 +1,34 @@
 import os
+import time
 import requests
 import uuid
 import socket
-import platform
-from config import API_BASE_URL, AI_CONFIG
+from config import API_BASE_URL, AI_CONFIG, API_REQUEST_TIMEOUT
+from telemetry import TelemetryQueue, TelemetrySpool
+from system_probe import system_probe
 from utils import logger
 
+# The fields the server takes for an action; event IDs, timestamps and local session IDs stay client-side
+ACTION_PAYLOAD_FIELDS = ("session_id", "action_type", "description", "additional_data")
+
 class APIClient:
     def __init__(self):
         self.session_id = None
+        # Local ID of this run's session: actions carry it from the moment they are queued, so
+        # actions spooled before the server answered are matched to it when a later run replays them
+        self.client_session_id = uuid.uuid4().hex
+        self.session_queued = False
+        self.session_ids = {}  # client_session_id -> server session ID, including replayed sessions
         self.api_enabled = True  # Flag to enable/disable API usage
+        self.http = requests.Session()  # Keep-alive connection reused by the telemetry worker
+        self.batch_endpoint_available = True  # Cleared if the server has no /actions/batch/ endpoint
+        # The session and actions are sent in the background and spooled to disk while the
+        # server is down; actions wait in the queue until the session has been queued
+        self.telemetry = TelemetryQueue(self._send_actions, ready=lambda: self.session_queued,
+                                        spool=TelemetrySpool())
 
     def create_user_session(self, username, teammates_username, app_version, client_info=None):
+        """Queue the session ahead of any actions; the telemetry worker creates it on the server"""
         if not self.api_enabled:
             logger.info("API tracking disabled. Not creating user session.")
             return
@@ -21,62 +38,149 @@ class APIClient:
             if client_info is None:
                 client_info = {}
                 
-            # Add system resource info if available
-            try:
-                from ai_analysis import AIAnalysis
-                resources = AIAnalysis.get_system_resource_info()
-                client_info["system_resources"] = resources
+            # System resources, models and IP are probed concurrently and shared with the system check
+            snapshot = system_probe.get_snapshot()
+            client_info["system_resources"] = snapshot["system_resources"]
                 
-                # Add model information
-                models = AIAnalysis.list_available_ollama_models()
-                if models:
-                    client_info["available_models"] = models
-            except Exception as e:
-                logger.warning(f"Could not get system resources or models: {str(e)}")
+            # Add model information
+            if snapshot["ollama_models"]:
+                client_info["available_models"] = snapshot["ollama_models"]
             
             data = {
-                "ip": self.get_ip(),
+                "ip": snapshot["ip"],
                 "pc_name_description": self.get_windows_profile_name(),
                 "username": username,
                 "teammates_username": teammates_username,
                 "app_version": app_version,
-                "windows_version": platform.platform(),
-                "ollama_enabled": self.check_ollama_status(),
+                "windows_version": snapshot["platform"],
+                # Listing the models already tells whether Ollama is running; no test generation needed
+                "ollama_enabled": snapshot["ollama_running"],
                 "client_info": client_info
             }
-            response = requests.post(f"{API_BASE_URL}/user_sessions/", json=data)
-            response.raise_for_status()
-            self.session_id = response.json()["id"]
-            logger.info(f"User session created with ID: {self.session_id}")
-        except requests.RequestException as e:
+            self.telemetry.put(self.new_event(kind="user_session", client_session_id=self.client_session_id, data=data),
+                               first=True)
+            self.session_queued = True
+        except Exception as e:
             logger.error(f"Failed to create user session: {str(e)}")
 
+    @staticmethod
+    def new_event(**fields):
+        """A telemetry event with the ID used to drop duplicates when the spool is replayed"""
+        return dict(event_id=uuid.uuid4().hex, created_at=time.time(), **fields)
+
     def create_action(self, action_type, description, additional_data=None):
-        if not self.api_enabled or not self.session_id:
-            logger.warning("No active session or API disabled. Cannot create action.")
+        """Queue an action for the telemetry worker; never blocks on the network"""
+        if not self.api_enabled:
+            logger.debug("API disabled. Not creating action.")
             return
 
-        try:
-            data = {
-                "session_id": self.session_id,
-                "action_type": action_type,
-                "description": description
-            }
+        data = self.new_event(
+            action_type=action_type,
+            description=description,
+            client_session_id=self.client_session_id
+        )
+        
+        # Add additional data if provided
+        if additional_data:
+            data["additional_data"] = additional_data
             
-            # Add additional data if provided
-            if additional_data:
-                data["additional_data"] = additional_data
-                
-            response = requests.post(f"{API_BASE_URL}/actions/", json=data)
+        self.telemetry.put(data)
+
+    def _send_session(self, event):
+        """Create a queued or spooled session on the server, once"""
+        client_session_id = event["client_session_id"]
+        if client_session_id not in self.session_ids:
+            response = self.http.post(f"{API_BASE_URL}/user_sessions/", json=event["data"], timeout=API_REQUEST_TIMEOUT)
             response.raise_for_status()
-            logger.info(f"Action created: {action_type} - {description}")
+            self.session_ids[client_session_id] = response.json()["id"]
+            logger.info(f"User session created with ID: {self.session_ids[client_session_id]}")
+        if client_session_id == self.client_session_id:
+            self.session_id = self.session_ids[client_session_id]
+
+    def _send_actions(self, events):
+        """
+        POST a batch of queued or spooled events (runs on the telemetry worker).
+
+        Sessions are created first. Actions get the server ID of their session;
+        it is stored on the event, so an action spooled after its session was
+        created can still be replayed by a later run. Actions use /actions/batch/
+        when the server has it and fall back to one /actions/ POST per action otherwise.
+
+        Actions of a session that is not known (yet) are spooled again rather
+        than dropped. If a request fails, the events already delivered are
+        removed from `events` so only the rest is spooled and replayed.
+
+        Returns:
+            bool: True if every event was accepted
+        """
+        delivered = []
+        unknown_session = []
+        try:
+            for event in events:
+                if event.get("kind") == "user_session":
+                    self._send_session(event)
+                    delivered.append(event)
+            actions = []
+            for event in events:
+                if event.get("kind") == "user_session":
+                    continue
+                if event.get("session_id") is None:
+                    event["session_id"] = self.session_ids.get(event.get("client_session_id"))
+                if event["session_id"] is None:
+                    unknown_session.append(event)
+                    continue
+                actions.append(event)
+            self._keep_for_replay(unknown_session)
+            if not actions:
+                return True
+
+            if self.batch_endpoint_available and len(actions) > 1:
+                response = self.http.post(f"{API_BASE_URL}/actions/batch/", json=[self._payload(action) for action in actions],
+                                          timeout=API_REQUEST_TIMEOUT)
+                # A server with only /actions/{id} routes answers 405 or 422 rather than 404
+                if response.status_code in (404, 405, 422):
+                    logger.info("API server has no batch endpoint, sending actions one by one")
+                    self.batch_endpoint_available = False
+                else:
+                    response.raise_for_status()
+                    delivered.extend(actions)
+                    logger.info(f"Actions created: {', '.join(action['action_type'] for action in actions)}")
+                    return True
+            for action in actions:
+                response = self.http.post(f"{API_BASE_URL}/actions/", json=self._payload(action), timeout=API_REQUEST_TIMEOUT)
+                response.raise_for_status()
+                delivered.append(action)
+                logger.info(f"Action created: {action['action_type']} - {action['description']}")
+            return True
         except requests.RequestException as e:
-            logger.error(f"Failed to create action: {str(e)}")
+            logger.error(f"Failed to send telemetry: {str(e)}")
+            # e.g. the one-by-one fallback failing partway: don't post the delivered actions again
+            done = {id(event) for event in delivered + unknown_session}
+            events[:] = [event for event in events if id(event) not in done]
+            return False
+
+    def _keep_for_replay(self, events):
+        """Spool actions whose session isn't known, e.g. its spooled session event was lost, for a later replay"""
+        if not events:
+            return
+        if self.telemetry.spool is None:
+            logger.warning(f"Dropping {len(events)} actions of an unknown session")
+            return
+        logger.warning(f"Keeping {len(events)} actions of an unknown session for a later replay")
+        self.telemetry.spool.append(events)
+
+    @staticmethod
+    def _payload(action):
+        return {key: action[key] for key in ACTION_PAYLOAD_FIELDS if key in action}
+
+    def flush(self, timeout=5):
+        """Send queued actions before the app exits"""
+        return self.telemetry.flush(timeout)
 
     @staticmethod
     def get_ip():
         try:
-            return requests.get('https://api.ipify.org').text
+            return requests.get('https://api.ipify.org', timeout=API_REQUEST_TIMEOUT).text
         except requests.RequestException:
             return "Unknown"
 
@@ -88,8 +192,11 @@ class APIClient:
             return "Unknown"
 
     def check_server_status(self):
+        if self.telemetry.server_down():
+            # The telemetry worker just failed to reach it; don't try again before it does
+            return False
         try:
-            response = requests.get(API_BASE_URL)
+            response = requests.get(API_BASE_URL, timeout=API_REQUEST_TIMEOUT)
             return response.status_code == 200
         except requests.RequestException:
             return False
@@ -111,28 +218,14 @@ class APIClient:
 
     def log_ai_model_usage(self, model_name, action_type, duration_ms=None, successful=True, error_message=None):
         """Log AI model usage for analytics"""
-        if not self.api_enabled or not self.session_id:
-            return
-            
-        try:
-            data = {
-                "session_id": self.session_id,
-                "action_type": "model_usage",
-                "description": f"Used model {model_name} for {action_type}",
-                "additional_data": {
-                    "model_name": model_name,
-                    "action_type": action_type,
-                    "duration_ms": duration_ms,
-                    "successful": successful
-                }
-            }
-            
-            if error_message:
-                data["additional_data"]["error_message"] = error_message
-                
-            response = requests.post(f"{API_BASE_URL}/actions/", json=data)
-            response.raise_for_status()
-        except Exception as e:
-            logger.error(f"Failed to log model usage: {str(e)}")
+        additional_data = {
+            "model_name": model_name,
+            "action_type": action_type,
+            "duration_ms": duration_ms,
+            "successful": successful
+        }
+        if error_message:
+            additional_data["error_message"] = error_message
+        self.create_action("model_usage", f"Used model {model_name} for {action_type}", additional_data)
 
 api_client = APIClient()
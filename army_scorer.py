@@ -0,0 +1,138 @@
+import threading
+import numpy as np
+from config import ARMY_COUNTER_RANK_DECAY, ARMY_COUNTER_WEAKNESS_WEIGHT, ARMY_COUNTER_TOP
+from counter_graph import counter_graph
+from utils import logger
+
+def effectiveness_matrix(graph, rank_decay=ARMY_COUNTER_RANK_DECAY, weakness_weight=ARMY_COUNTER_WEAKNESS_WEIGHT):
+    """
+    Unit x unit effectiveness from a compiled counter graph.
+
+    Returns:
+        np.ndarray: float32 (n, n); entry [c, u] is how good unit c is against unit u. Positive when c is
+            listed as a counter to u (decaying with its rank), negative when u counters c or c is listed
+            as a unit to avoid against u.
+    """
+    size = len(graph["keys"])
+    matrix = np.zeros((size, size), dtype=np.float32)
+    for unit, counters in enumerate(graph["counters"]):
+        for rank, counter in enumerate(counters):
+            weight = rank_decay ** rank
+            matrix[counter, unit] += weight
+            matrix[unit, counter] -= weakness_weight * weight
+    for unit, avoid in enumerate(graph["avoid"]):
+        for rank, weak in enumerate(avoid):
+            matrix[weak, unit] -= weakness_weight * rank_decay ** rank
+    return matrix
+
+class ArmyCounterScorer:
+    """
+    Ranks counter units against a whole enemy army.
+
+    The counter graph is turned once into a unit x unit effectiveness matrix
+    (see effectiveness_matrix); scoring a composition is then one
+    matrix-vector product with the army's unit shares, so it is cheap enough
+    to redo on every poll cycle. Unit groups such as "Cavalry" score too but
+    are only recommended with `include_groups`. The matrix is rebuilt when the
+    graph is reloaded.
+    """
+
+    def __init__(self, graph=counter_graph, rank_decay=ARMY_COUNTER_RANK_DECAY,
+                 weakness_weight=ARMY_COUNTER_WEAKNESS_WEIGHT, include_groups=False):
+        self.graph = graph
+        self.rank_decay = rank_decay
+        self.weakness_weight = weakness_weight
+        self.include_groups = include_groups
+        self._lock = threading.Lock()
+        self._source = None  # The compiled graph the matrix was built from
+        self._matrix = None
+        self._candidates = None  # Mask of the units that may be recommended
+        self._names = []
+        self._ids = {}  # Unit name as given -> unit id, so repeated compositions skip name resolution
+
+    def _prepare(self):
+        compiled = self.graph.graph
+        if compiled is self._source:
+            return
+        with self._lock:
+            if compiled is self._source:
+                return
+            self._matrix = effectiveness_matrix(compiled, self.rank_decay, self.weakness_weight)
+            self._candidates = np.array([self.include_groups or kind != "group" for kind in compiled["kinds"]])
+            self._names = compiled["names"]
+            self._ids = {}
+            self._source = compiled
+            logger.debug(f"Army counter matrix built for {len(self._names)} units")
+
+    def composition_vector(self, composition):
+        """
+        Unit shares of an army.
+
+        Args:
+            composition (dict): Unit name -> count; names resolve like counter_graph.unit_id()
+                (upgrades count towards their line, unknown names are ignored)
+
+        Returns:
+            np.ndarray: float32 vector over the graph's units, summing to 1 (all zeros for an empty army)
+        """
+        self._prepare()
+        vector = np.zeros(len(self._names), dtype=np.float32)
+        ids = self._ids
+        for name, count in composition.items():
+            if name not in ids:
+                ids[name] = self.graph.unit_id(name)
+            unit_id = ids[name]
+            if unit_id is None:
+                logger.debug(f"Unknown unit {name!r} ignored in army composition")
+            elif count > 0:
+                vector[unit_id] += count
+        total = vector.sum()
+        return vector / total if total else vector
+
+    def score_vector(self, vector):
+        """Effectiveness of every unit against the army given as a composition vector"""
+        self._prepare()
+        return self._matrix @ vector
+
+    def score(self, composition, top=ARMY_COUNTER_TOP):
+        """
+        The best counters to an army.
+
+        Args:
+            composition (dict): Unit name -> count, e.g. {"Knight": 20, "Crossbowman": 15}
+            top (int): How many counters to return; None for all units that score above zero
+
+        Returns:
+            list: (unit name, score) pairs, best first; a score of 1 means the top listed counter to
+                the whole army
+        """
+        vector = self.composition_vector(composition)
+        scores = self.score_vector(vector)
+        candidates = np.where(self._candidates, scores, 0.0)
+        ranked = np.argsort(-candidates, kind="stable")
+        if top is not None:
+            ranked = ranked[:top]
+        return [(self._names[unit_id], round(float(scores[unit_id]), 3)) for unit_id in ranked
+                if candidates[unit_id] > 0]
+
+army_scorer = ArmyCounterScorer()
+
+if __name__ == "__main__":
+    import time
+
+    # Benchmark scoring an army with every unit in the graph: python army_scorer.py
+    army_scorer._prepare()
+    roster = {name: 10 for name in army_scorer._names}
+    vector = army_scorer.composition_vector(roster)
+    runs = 10000
+    timings = {}
+    for label, function in (("matrix-vector product", lambda: army_scorer.score_vector(vector)),
+                            ("score() from unit names", lambda: army_scorer.score(roster))):
+        start = time.perf_counter()
+        for _ in range(runs):
+            function()
+        timings[label] = (time.perf_counter() - start) / runs
+    print(f"{len(roster)} units, matrix {army_scorer._matrix.shape}")
+    for label, seconds in timings.items():
+        print(f"  {label:<26} {seconds * 1e6:8.1f} µs per scoring")
+    print("Example:", army_scorer.score({"Knight": 20, "Crossbowman": 15, "Mangonel": 3}))
@@ -1,11 +1,24 @@
+import os
+import threading
+from collections import OrderedDict
 import pygame
 from utils import logger
-from ai_analysis import AIAnalysis
-from config import AI_CONFIG
+from config import AI_CONFIG, AUDIO_WARNINGS_DIR, AUDIO_CHANNELS, AUDIO_CACHE_MAX_BYTES
 
 class AudioManager:
-    """Manages audio playback and transcription."""
+    """
+    Manages audio playback and transcription.
+
+    Alert sounds are decoded once into pygame.mixer.Sound objects and kept in a
+    least-recently-used cache bounded by AUDIO_CACHE_MAX_BYTES of decoded
+    samples, so playing an alert does no disk I/O or decoding. Sounds play on a
+    pool of AUDIO_CHANNELS mixer channels, so a new alert no longer cuts off
+    the one that is playing; when every channel is busy the oldest is reused.
+    """
     _mixer_initialized = False
+    _sounds = OrderedDict()  # path -> (Sound, decoded size in bytes), least recently played first
+    _cache_bytes = 0
+    _lock = threading.RLock()
 
     @staticmethod
     def init_mixer():
@@ -13,6 +26,7 @@ class AudioManager:
         if not AudioManager._mixer_initialized:
             try:
                 pygame.mixer.init()
+                pygame.mixer.set_num_channels(AUDIO_CHANNELS)
                 AudioManager._mixer_initialized = True
                 logger.info("Pygame mixer initialized successfully.")
             except Exception as e:
@@ -21,30 +35,98 @@ class AudioManager:
                 # For now, just logging the error. play_audio will fail if not initialized.
                 AudioManager._mixer_initialized = False # Ensure it's marked as not initialized
 
+    @staticmethod
+    def preload(directory=AUDIO_WARNINGS_DIR):
+        """
+        Decode every sound file directly under `directory` into the cache.
+
+        Returns:
+            int: Number of sounds in the cache afterwards
+        """
+        AudioManager.init_mixer()
+        if not AudioManager._mixer_initialized:
+            return 0
+        try:
+            names = sorted(os.listdir(directory))
+        except OSError as e:
+            logger.error(f"Cannot preload audio from '{directory}': {e}")
+            return 0
+        for name in names:
+            path = os.path.join(directory, name)
+            if os.path.isfile(path) and name.lower().endswith((".mp3", ".wav", ".ogg")):
+                AudioManager.get_sound(path)
+        logger.info(f"Preloaded {len(AudioManager._sounds)} sounds ({AudioManager._cache_bytes / 1e6:.1f} MB decoded)")
+        return len(AudioManager._sounds)
+
+    @staticmethod
+    def get_sound(audio_file_path):
+        """
+        Return the decoded Sound for a file, loading it on first use.
+
+        Returns:
+            pygame.mixer.Sound or None if the file can't be decoded
+        """
+        key = os.path.normpath(audio_file_path)
+        with AudioManager._lock:
+            cached = AudioManager._sounds.get(key)
+            if cached is not None:
+                AudioManager._sounds.move_to_end(key)
+                return cached[0]
+            try:
+                sound = pygame.mixer.Sound(audio_file_path)
+            except (pygame.error, FileNotFoundError) as e:
+                logger.error(f"Error loading audio file '{audio_file_path}': {e}")
+                return None
+            frequency, size, channels = pygame.mixer.get_init()
+            decoded_bytes = int(sound.get_length() * frequency * channels * abs(size) // 8)
+            AudioManager._sounds[key] = (sound, decoded_bytes)
+            AudioManager._cache_bytes += decoded_bytes
+            # Evict least recently played sounds, but always keep the one just loaded
+            while AudioManager._cache_bytes > AUDIO_CACHE_MAX_BYTES and len(AudioManager._sounds) > 1:
+                evicted, (_, evicted_bytes) = AudioManager._sounds.popitem(last=False)
+                AudioManager._cache_bytes -= evicted_bytes
+                logger.debug(f"Evicted '{evicted}' from the audio cache")
+            return sound
+
+    @staticmethod
+    def clear_cache():
+        with AudioManager._lock:
+            AudioManager._sounds.clear()
+            AudioManager._cache_bytes = 0
+
     @staticmethod
     def play_audio(audio_file_path: str, volume: float = 0.35):
         """
-        Plays an audio file using pygame mixer.
+        Plays an audio file from the sound cache on a free mixer channel.
 
         Args:
             audio_file_path (str): The path to the audio file.
             volume (float, optional): The volume for playback (0.0 to 1.0). Defaults to 0.35.
+
+        Returns:
+            pygame.mixer.Channel or None: The channel the sound is playing on
         """
         AudioManager.init_mixer()
 
         if not AudioManager._mixer_initialized:
             logger.error("Cannot play audio: Pygame mixer failed to initialize.")
-            return
+            return None
 
         try:
-            pygame.mixer.music.load(audio_file_path)
-            pygame.mixer.music.set_volume(volume)
-            pygame.mixer.music.play()
+            sound = AudioManager.get_sound(audio_file_path)
+            if sound is None:
+                return None
+            # Prefer an idle channel; otherwise take over the one that has played longest
+            channel = pygame.mixer.find_channel(True)
+            channel.set_volume(volume)
+            channel.play(sound)
             logger.info(f"Playing audio: {audio_file_path} at volume {volume}")
+            return channel
         except pygame.error as e: # More specific exception for pygame errors
             logger.error(f"Error playing audio file '{audio_file_path}': {e}")
         except Exception as e:
             logger.error(f"An unexpected error occurred while trying to play audio '{audio_file_path}': {e}")
+        return None
 
     @staticmethod
     def transcribe_audio(audio_path):
@@ -60,6 +142,7 @@ class AudioManager:
             model_name = AI_CONFIG["default_models"]["audio"]
             
             logger.info(f"Transcribing audio from '{audio_path}' using {model_name}...")
+            from ai_analysis import AIAnalysis  # Imported here: ai_analysis pulls in the model clients
             result = AIAnalysis.transcribe_audio(audio_path, model_name)
             
             return result
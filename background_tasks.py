@@ -0,0 +1,76 @@
+from PyQt6.QtCore import QObject, QRunnable, QThreadPool, pyqtSignal
+from config import BACKGROUND_TASK_THREADS
+from utils import logger
+
+class _Task(QRunnable):
+    """Runs one function on the pool and reports back through the owner's signal"""
+
+    def __init__(self, owner, key, function):
+        super().__init__()
+        self.owner = owner
+        self.key = key
+        self.function = function
+
+    def run(self):
+        try:
+            result, error = self.function(), None
+        except Exception as e:
+            result, error = None, e
+        try:
+            self.owner.finished.emit(self.key, result, error)
+        except RuntimeError:
+            # The owner was deleted while the task ran (the app is closing); nobody is waiting for the result
+            pass
+
+class BackgroundTasks(QObject):
+    """
+    Runs blocking calls (HTTP status checks, news fetches) off the GUI thread.
+
+    submit() starts a function on a small QThreadPool and returns at once. When
+    it finishes, `on_result` (or `on_error` with the exception) is called on the
+    GUI thread through a queued signal, so callbacks can update widgets.
+    Requests are deduplicated by key: while a task with the same key is still
+    running, submit() does nothing, so a slow endpoint polled by a timer never
+    piles up requests. The functions are expected to use their own timeouts.
+    """
+
+    finished = pyqtSignal(str, object, object)  # key, result, error
+
+    def __init__(self, parent=None, max_threads=BACKGROUND_TASK_THREADS):
+        super().__init__(parent)
+        self.pool = QThreadPool(self)
+        self.pool.setMaxThreadCount(max_threads)
+        self._callbacks = {}  # key -> (on_result, on_error) of the task in flight
+        self.finished.connect(self._on_finished)
+
+    def submit(self, key, function, on_result, on_error=None):
+        """
+        Run `function` in the background unless a task with this key is in flight.
+
+        Returns:
+            bool: True if the task was started
+        """
+        if key in self._callbacks:
+            logger.debug(f"Background task {key} already running, not starting another")
+            return False
+        self._callbacks[key] = (on_result, on_error)
+        self.pool.start(_Task(self, key, function))
+        return True
+
+    def is_running(self, key):
+        return key in self._callbacks
+
+    def _on_finished(self, key, result, error):
+        on_result, on_error = self._callbacks.pop(key, (None, None))
+        if error is None:
+            if on_result is not None:
+                on_result(result)
+        elif on_error is not None:
+            on_error(error)
+        else:
+            logger.error(f"Background task {key} failed: {str(error)}")
+
+    def wait(self, timeout=None):
+        """Wait for running tasks, e.g. before the app exits; queued ones are dropped"""
+        self.pool.clear()
+        return self.pool.waitForDone(-1 if timeout is None else int(timeout * 1000))
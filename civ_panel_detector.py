@@ -0,0 +1,407 @@
+import json
+import numpy as np
+from PIL import Image
+from config import CIV_CODES, CIV_CODE_TEMPLATES_PATH, CIV_DETECTION_MIN_CONFIDENCE
+from utils import logger
+
+# Panel geometry, relative to the height of an age icon (one player row) unless noted.
+# The scan for the icon column uses the capture height (400 px, i.e. 25% of 1600p) as reference.
+REFERENCE_HEIGHT = 400
+MIN_ICON_RUN = 8            # px at the reference height: shortest horizontal run of an icon row
+ROW_HEIGHT_RANGE = (16, 36)  # px at the reference height: icon heights that count as a player row
+PANEL_STRIP = 0.7           # the icons sit in the right 30% of the capture
+MAX_ROW_GAP = 0.25          # gap between stacked icons of one panel
+ICON_EDGE_CANDIDATES = 5    # right edges tried for the icon column
+ICON_GAP = 1 / 3            # gaps inside an icon (its numeral) up to this are still the icon
+CODE_SEARCH_WIDTH = 1.6     # the code is looked for this far left of the icon
+CODE_WIDTH_RANGE = (0.8, 1.3)  # width of the three letters
+LETTER_GAP = 0.15           # widest gap inside the code; the score text is further away
+CODE_LETTERS = 3
+COLOR_SEARCH_WIDTH = 3.0    # the score left of the code is drawn in the player colour
+
+GLYPH_SIZE = (8, 10)     # (width, height) every letter cell is resampled to before matching
+STROKE_LEVEL = 0.5       # whiteness of a letter stroke over the background (0-1)
+MIN_LABEL_MARGIN = 0.1   # score gap to the next-best letter below which a match is ambiguous
+
+# Hue (degrees) of the player colours as drawn in the score text; grey has no hue
+PLAYER_COLOR_HUES = {
+    "Red": 0,
+    "Orange": 30,
+    "Yellow": 60,
+    "Green": 120,
+    "Teal": 180,
+    "Blue": 225,
+    "Purple": 300,
+}
+
+def _runs(flags):
+    """(start, end) index pairs of the runs of True in a 1-D boolean array"""
+    indices = np.flatnonzero(flags)
+    if indices.size == 0:
+        return []
+    breaks = np.flatnonzero(np.diff(indices) > 1)
+    starts = np.concatenate(([indices[0]], indices[breaks + 1]))
+    ends = np.concatenate((indices[breaks], [indices[-1]]))
+    return list(zip(starts.tolist(), ends.tolist()))
+
+def _load_pixels(frame):
+    image = getattr(frame, "image", frame)
+    if isinstance(image, str):
+        with Image.open(image) as img:
+            return np.asarray(img.convert("RGB"), dtype=np.int16)
+    return np.asarray(image.convert("RGB"), dtype=np.int16)
+
+class PanelRow:
+    """One player row of the civ panel: the player's colour, the civ code read and how sure the matcher is"""
+
+    def __init__(self, player, code, confidence, top, bottom, codes=CIV_CODES):
+        self.player = player
+        self.code = code
+        self.civ = codes.get(code)
+        self.confidence = confidence if self.civ is not None else 0.0
+        self.top = top
+        self.bottom = bottom
+
+    def __repr__(self):
+        return f"PanelRow({self.player!r}, {self.code!r}, confidence={self.confidence:.2f})"
+
+class PanelReading:
+    """All rows read from one civ panel capture"""
+
+    def __init__(self, rows, width=0):
+        self.rows = rows
+        self.width = width  # right edge of the age icons; row crops for the model end there
+
+    def confident_rows(self, min_confidence):
+        return [row for row in self.rows if row.confidence >= min_confidence]
+
+    def low_confidence_rows(self, min_confidence):
+        return [row for row in self.rows if row.confidence < min_confidence]
+
+    def civilizations(self, min_confidence, names=None):
+        """
+        Player -> civilization for the confident rows, in the CivAnalysis shape.
+
+        Players are named by colour ("Blue player"), the only part of the row
+        that can be read without OCR of free text, unless names read elsewhere
+        are given for the confident rows, top to bottom.
+        """
+        rows = self.confident_rows(min_confidence)
+        if names is not None:
+            if len(set(names)) != len(rows):
+                raise ValueError(f"{len(names)} names ({len(set(names))} distinct) for {len(rows)} civ panel rows")
+            return dict(zip(names, (row.civ for row in rows)))
+        result = {}
+        for row in rows:
+            player = f"{row.player} player"
+            if player in result:
+                player = f"{player} {len(result) + 1}"
+            result[player] = row.civ
+        return result
+
+class CivPanelDetector:
+    """
+    CPU-only reader for the civilization panel.
+
+    Every player row ends with a saturated age icon, so the rows are found by
+    locating the icon column and splitting it with a row projection. The
+    three-letter civ code sits left of the icon in a fixed-pitch white font:
+    it is cut into three equal cells and each cell is matched against labelled
+    letter templates by normalised correlation, like the resource bar digits
+    (see resource_ocr). A panel takes about ten milliseconds; rows whose code is
+    not confident enough, or is not a known code, are left to the vision model.
+    """
+
+    def __init__(self, templates_path=CIV_CODE_TEMPLATES_PATH, min_confidence=CIV_DETECTION_MIN_CONFIDENCE,
+                 codes=CIV_CODES):
+        self.min_confidence = min_confidence
+        self.codes = codes
+        self.labels, self.templates = self.load_templates(templates_path)
+
+    @staticmethod
+    def load_templates(path):
+        """
+        Load letter templates.
+
+        Returns:
+            tuple: (labels array, zero-mean unit-norm template matrix of shape (n, width * height))
+        """
+        with open(path, 'r') as f:
+            data = json.load(f)
+        labels = np.array([entry["label"] for entry in data["templates"]])
+        templates = np.array([entry["pixels"] for entry in data["templates"]], dtype=np.float32) / 255.0
+        return labels, CivPanelDetector._normalise_rows(templates)
+
+    @staticmethod
+    def _normalise_rows(vectors):
+        vectors = vectors - vectors.mean(axis=1, keepdims=True)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors / np.where(norms == 0, 1, norms)
+
+    @staticmethod
+    def find_rows(pixels):
+        """
+        Locate the player rows by their age icons.
+
+        Returns:
+            list: (top, bottom, icon_left, icon_right) per row, top to bottom; empty when no panel is visible
+        """
+        height, width = pixels.shape[:2]
+        strip = int(width * PANEL_STRIP)
+        high, low = pixels[:, strip:].max(axis=2), pixels[:, strip:].min(axis=2)
+        saturated = (high - low > 70) & (high > 110)
+        ink = saturated | ((low > 140) & (high - low < 60))
+        scale = height / REFERENCE_HEIGHT
+        min_run = max(4, round(MIN_ICON_RUN * scale))
+
+        # The icons share their right edge: the most common end of the rightmost long run of a line
+        run_length = np.zeros(height, dtype=np.int32)
+        last_end = np.full(height, -1)
+        for x, column in enumerate(ink.T):
+            run_length = np.where(column, run_length + 1, 0)
+            last_end = np.where(run_length >= min_run, x, last_end)
+        ends = last_end[last_end >= 0]
+        if ends.size == 0:
+            return []
+        votes = np.convolve(np.bincount(ends, minlength=width - strip), np.ones(5), mode="same")
+
+        # The minimap frame below the panel casts votes too: try the strongest edges, keep the tallest stack
+        stack, right, tried = [], None, []
+        for candidate in np.argsort(-votes, kind="stable").tolist():
+            if len(tried) == ICON_EDGE_CANDIDATES or votes[candidate] == 0:
+                break
+            if any(abs(candidate - edge) <= 2 for edge in tried):
+                continue
+            tried.append(candidate)
+            candidate_stack = CivPanelDetector._icon_stack(high, candidate, min_run, scale)
+            if len(candidate_stack) > len(stack):
+                stack, right = candidate_stack, candidate
+        if not stack:
+            return []
+        rows = []
+        for top, bottom in stack:
+            row_height = bottom - top + 1
+            fill = saturated[top:bottom + 1, :right + 1].mean(axis=0)
+            columns = [(start + strip, end + strip) for start, end in _runs(fill >= 0.3)]
+            if not columns:
+                continue
+            left = columns[-1][0]
+            for start, end in reversed(columns[:-1]):
+                if left - end - 1 > row_height * ICON_GAP:
+                    break
+                left = start
+            rows.append((top, bottom, left, right + strip))
+        return rows
+
+    @staticmethod
+    def _icon_stack(high, right, min_run, scale):
+        """The longest stack of evenly spaced icons whose right edge is column `right`, as (top, bottom) pairs"""
+        # Icons are bright blocks split by a dark border line
+        band = (high[:, max(0, right - min_run + 1):right + 1] > 100).mean(axis=1)
+        min_height, max_height = (size * scale for size in ROW_HEIGHT_RANGE)
+        stacks = []
+        for top, bottom in _runs(band > 0.5):
+            if not min_height <= bottom - top + 1 <= max_height:
+                continue
+            if stacks and top - stacks[-1][-1][1] - 1 <= max(1, MAX_ROW_GAP * (bottom - top + 1)):
+                stacks[-1].append((top, bottom))
+            else:
+                stacks.append([(top, bottom)])
+        return max(stacks, key=len, default=[])
+
+    @staticmethod
+    def code_cells(pixels, top, bottom, icon_left):
+        """
+        Cut the civ code left of an age icon into letter cells.
+
+        Returns:
+            tuple: (list of GLYPH_SIZE letter images flattened to vectors, code left edge),
+                or (None, None) when no three-letter code is found
+        """
+        row_height = bottom - top + 1
+        x0 = max(0, icon_left - round(CODE_SEARCH_WIDTH * row_height))
+        box = pixels[top:bottom + 1, x0:icon_left]
+        if box.size == 0:
+            return None, None
+        low, chroma = box.min(axis=2).astype(np.float32), box.max(axis=2) - box.min(axis=2)
+        background = float(np.median(low))
+        whiteness = np.clip((low - background) / max(1.0, 255 - background), 0, 1) * (chroma < 60)
+
+        # Hysteresis: faint stroke ends belong to a letter only if the run also holds a clear stroke
+        profile = whiteness.max(axis=0)
+        strokes = [(start, end) for start, end in _runs(profile > STROKE_LEVEL * 0.7)
+                   if profile[start:end + 1].max() > STROKE_LEVEL]
+        if not strokes:
+            return None, None
+        start, end = strokes[-1]
+        for previous_start, previous_end in reversed(strokes[:-1]):
+            if start - previous_end - 1 > LETTER_GAP * row_height:
+                break  # the score text
+            start = previous_start
+        min_width, max_width = (size * row_height for size in CODE_WIDTH_RANGE)
+        if not min_width <= end - start + 1 <= max_width:
+            return None, None
+        lines = _runs(whiteness[:, start:end + 1].max(axis=1) > STROKE_LEVEL)
+        first, last = lines[0][0], lines[-1][1]
+
+        cells = []
+        edges = np.linspace(start, end + 1, CODE_LETTERS + 1)
+        for left, right in zip(edges[:-1], edges[1:]):
+            cell = whiteness[first:last + 1, round(left):round(right)]
+            glyph = Image.fromarray(cell.astype(np.float32)).resize(GLYPH_SIZE, Image.BILINEAR)
+            cells.append(np.asarray(glyph, dtype=np.float32).ravel())
+        return cells, start + x0
+
+    @staticmethod
+    def player_color(pixels, top, bottom, code_left):
+        """The colour name of the score text left of the code ("Grey" when it has no clear hue)"""
+        row_height = bottom - top + 1
+        box = pixels[top:bottom + 1, max(0, code_left - round(COLOR_SEARCH_WIDTH * row_height)):code_left]
+        high, low = box.max(axis=2), box.min(axis=2)
+        colored = box[(high - low > 70) & (high > 110)].astype(np.float32)
+        if len(colored) < row_height:
+            return "Grey"
+        # Hue on the colour hexagon; the mean direction keeps reds either side of 0 together
+        red, green, blue = colored[:, 0], colored[:, 1], colored[:, 2]
+        x, y = red - (green + blue) / 2, np.sqrt(3) / 2 * (green - blue)
+        length = np.hypot(x, y)
+        angle = np.degrees(np.arctan2((y / length).sum(), (x / length).sum())) % 360
+        return min(PLAYER_COLOR_HUES, key=lambda name: min(abs(angle - PLAYER_COLOR_HUES[name]),
+                                                           360 - abs(angle - PLAYER_COLOR_HUES[name])))
+
+    def match(self, cell):
+        """
+        Match one letter cell against the templates.
+
+        Returns:
+            tuple: (letter, confidence)
+        """
+        vector = self._normalise_rows(cell[None, :])[0]
+        scores = self.templates @ vector
+        best = int(np.argmax(scores))
+        label = self.labels[best]
+        others = scores[self.labels != label]
+        margin = scores[best] - (others.max() if others.size else 0.0)
+        confidence = float(scores[best]) * min(1.0, max(0.0, margin) / MIN_LABEL_MARGIN)
+        return str(label), confidence
+
+    def read(self, frame):
+        """
+        Read every player row of a civ panel capture.
+
+        Args:
+            frame: CapturedFrame, PIL image or path of the CIV_SCREENSHOT_REGION capture
+
+        Returns:
+            PanelReading
+        """
+        pixels = _load_pixels(frame)
+        rows = []
+        found = self.find_rows(pixels)
+        for top, bottom, icon_left, _ in found:
+            cells, code_left = self.code_cells(pixels, top, bottom, icon_left)
+            if cells is None:
+                rows.append(PanelRow("Unknown", "", 0.0, top, bottom, self.codes))
+                continue
+            letters = [self.match(cell) for cell in cells]
+            code = "".join(letter for letter, _ in letters)
+            confidence = min(confidence for _, confidence in letters)
+            rows.append(PanelRow(self.player_color(pixels, top, bottom, code_left), code, confidence,
+                                 top, bottom, self.codes))
+        logger.debug(f"Civ panel rows: {rows}")
+        return PanelReading(rows, width=found[0][3] + 1 if found else 0)
+
+    @staticmethod
+    def crop_rows(frame, rows, width=None, padding=2):
+        """
+        The given panel rows stacked into one image, so the model only looks at the rows the matcher missed.
+
+        Returns:
+            PIL.Image.Image
+        """
+        image = getattr(frame, "image", frame)
+        if isinstance(image, str):
+            with Image.open(image) as img:
+                image = img.convert("RGB")
+        width = width or image.width
+        crops = [image.crop((0, max(0, row.top - padding), width, min(image.height, row.bottom + 1 + padding)))
+                 for row in rows]
+        stacked = Image.new("RGB", (width, sum(crop.height for crop in crops)))
+        y = 0
+        for crop in crops:
+            stacked.paste(crop, (0, y))
+            y += crop.height
+        return stacked
+
+    @staticmethod
+    def build_templates(samples):
+        """
+        Letter templates from labelled captures.
+
+        Args:
+            samples (list): (image, codes) pairs; codes lists the civ code of every panel row, top to bottom
+
+        Returns:
+            dict: Template document for CIV_CODE_TEMPLATES_PATH
+
+        Raises:
+            ValueError: If a capture doesn't show as many readable rows as it has codes
+        """
+        templates = []
+        for image, codes in samples:
+            pixels = _load_pixels(image)
+            rows = CivPanelDetector.find_rows(pixels)
+            if len(rows) != len(codes):
+                raise ValueError(f"Found {len(rows)} panel rows for the codes {codes}")
+            for (top, bottom, icon_left, _), code in zip(rows, codes):
+                cells, _ = CivPanelDetector.code_cells(pixels, top, bottom, icon_left)
+                if cells is None:
+                    raise ValueError(f"No code found in the row of {code}")
+                for letter, cell in zip(code, cells):
+                    pixels_255 = np.round(cell * 255).clip(0, 255).astype(int).tolist()
+                    templates.append({"label": letter, "pixels": pixels_255})
+        templates.sort(key=lambda entry: entry["label"])
+        return {"glyph_size": list(GLYPH_SIZE), "templates": templates}
+
+    def readable_codes(self):
+        """The civ codes whose letters all have templates"""
+        letters = set(self.labels.tolist())
+        return [code for code in self.codes if set(code) <= letters]
+
+if __name__ == "__main__":
+    import sys
+    import glob
+    import time
+
+    # Read captures: python civ_panel_detector.py [image or directory ...]
+    # Rebuild the letter templates: python civ_panel_detector.py --build image=CODE,CODE,... [...]
+    args = sys.argv[1:]
+    if args and args[0] == "--build":
+        samples = []
+        for arg in args[1:]:
+            path, _, codes = arg.partition("=")
+            samples.append((path, codes.split(",")))
+        document = CivPanelDetector.build_templates(samples)
+        entries = ",\n".join(f"    {json.dumps(entry)}" for entry in document["templates"])
+        with open(CIV_CODE_TEMPLATES_PATH, 'w') as f:
+            # One template per line, like the resource digits
+            f.write(f'{{\n  "glyph_size": {json.dumps(document["glyph_size"])},\n  "templates": [\n{entries}\n  ]\n}}\n')
+        letters = sorted({entry["label"] for entry in document["templates"]})
+        print(f"{len(document['templates'])} templates for the letters {''.join(letters)}")
+        sys.exit(0)
+
+    paths = []
+    for arg in args or ["images/test_civ.jpg"]:
+        paths.extend(sorted(glob.glob(f"{arg}/*.jpg")) if not arg.lower().endswith((".jpg", ".png")) else [arg])
+
+    detector = CivPanelDetector()
+    print(f"{len(detector.readable_codes())}/{len(detector.codes)} civ codes readable with the current templates")
+    start = time.perf_counter()
+    for path in paths:
+        reading = detector.read(path)
+        print(f"{path}:")
+        for row in reading.rows:
+            print(f"  {row.player:8} {row.code:4} {row.civ or '?':12} {row.confidence:.2f}")
+    elapsed = time.perf_counter() - start
+    if paths:
+        print(f"{elapsed / len(paths) * 1000:.1f} ms per capture")
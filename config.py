@@ -1,9 +1,9 @@
-import pyautogui
 import json
 import os
-from utils import resource_path, logger
+from utils import resource_path, user_data_path, user_cache_path, logger
 
 def get_screenshot_regions():
+    import pyautogui  # Slow to import; only needed once a capture region is used
     screen_width, screen_height = pyautogui.size()
     
     # Adjust the regions based on screen resolution
@@ -31,6 +31,15 @@ AI_CONFIG = {
         "num_thread": 4,            # Limit threads to not impact game performance
         "rope_frequency_base": 10000, # Standard RoPE settings
         "rope_frequency_scale": 1.0,
+    },
+    "ollama": {
+        "base_url": "http://localhost:11434",
+        "keep_alive": "30m",        # Keep the model resident between resource checks
+        "pool_size": 4,             # Pooled connections shared by all Ollama calls
+        "timeout": 60,              # seconds
+        "stream_resource_checks": True,  # Stream resource answers so alerts fire on partial results
+        "warm_up_on_start": True,   # Load the image model in the background when the app starts
+        "warmup_timeout": 120,      # seconds; loading a model from disk can be slow
     }
 }
 
@@ -44,8 +53,13 @@ def set_api_key(key):
     API_KEYS["GOOGLE"] = key
 
 AUDIO_VOLUME = 0.35
+# Alert sounds are decoded once and played on a pool of mixer channels so alerts can overlap
+AUDIO_WARNINGS_DIR = 'audio/warnings'
+AUDIO_CHANNELS = 8
+AUDIO_CACHE_MAX_BYTES = 32 * 1024 * 1024  # decoded samples kept in memory
 
-RESOURCE_SCREENSHOT_REGION, CIV_SCREENSHOT_REGION = get_screenshot_regions()
+# Screenshots are analysed in memory; set to True to also keep a copy under screenshots/
+SAVE_SCREENSHOTS_TO_DISK = False
 
 # Define paths for prompt files
 RESOURCE_CHECK_PROMPT_PATH = resource_path('prompts/resource_check_prompt.txt')
@@ -109,6 +123,57 @@ You are a Age of empires 2 data analyst. You are given a screenshot of the resou
         IMPORTANT: If you can't find any relevant information or all values are 0, always return: 0 for all values.}
 """
 
+# Three-letter civilization codes shown on the civ panel (listed in the civ counter prompt)
+CIV_CODES = {
+    "AZT": "Aztecs",
+    "BEN": "Bengals",
+    "BER": "Berbers",
+    "BOH": "Bohemians",
+    "BRI": "Britons",
+    "BUL": "Bulgarians",
+    "BRG": "Burgundians",
+    "BRM": "Burmese",
+    "BYZ": "Byzantines",
+    "CEL": "Celts",
+    "CHI": "Chinese",
+    "CUM": "Cumans",
+    "DRA": "Dravidians",
+    "ETI": "Ethiopians",
+    "FRA": "Franks",
+    "GOT": "Goths",
+    "GUR": "Gurjaras",
+    "HUN": "Huns",
+    "INC": "Incas",
+    "HIN": "Indians",
+    "ITA": "Italians",
+    "JAP": "Japanese",
+    "KHM": "Khmer",
+    "KOR": "Koreans",
+    "LIT": "Lithuanians",
+    "MAG": "Magyars",
+    "MLY": "Malay",
+    "MLI": "Malians",
+    "MAY": "Mayans",
+    "MON": "Mongols",
+    "PER": "Persians",
+    "POL": "Poles",
+    "POR": "Portuguese",
+    "SAR": "Saracens",
+    "SIC": "Sicilians",
+    "SLA": "Slavs",
+    "SPA": "Spanish",
+    "TAT": "Tatars",
+    "TEU": "Teutons",
+    "TUR": "Turks",
+    "VIE": "Vietnamese",
+    "VIK": "Vikings",
+}
+# Names the model may answer with for civilizations the counter data knows under another name
+CIV_NAME_ALIASES = {
+    "Bengals": "Bengalis",
+    "Indians": "Hindustanis",
+}
+
 def get_default_civ_counter_prompt(username, teammates):
     base_prompt = """
         You are an Age of Empires 2 screenshot analyst. You are given a screenshot of the civilization selection screen of a live match. You must OCR the text correctly.
@@ -116,48 +181,7 @@ def get_default_civ_counter_prompt(username, teammates):
         The information is presented as follows: three letters represent the civilization. You can also identify the civilization emblem to help you. Each players name is in-line with their civilization.
         
         example:
-        AZT - Aztecs
-        BEN - Bengals
-        BER - Berbers
-        BOH - Bohemians
-        BRI - Britons
-        BUL - Bulgarians
-        BRG - Burgundians
-        BRM - Burmese
-        BYZ - Byzantines
-        CEL - Celts
-        CHI - Chinese
-        CUM - Cumans
-        DRA - Dravidians
-        ETI - Ethiopians
-        FRA - Franks
-        GOT - Goths
-        GUR - Gurjaras
-        HUN - Huns
-        INC - Incas
-        HIN - Indians
-        ITA - Italians
-        JAP - Japanese
-        KHM - Khmer
-        KOR - Koreans
-        LIT - Lithuanians
-        MAG - Magyars
-        MLY - Malay
-        MLI - Malians
-        MAY - Mayans
-        MON - Mongols
-        PER - Persians
-        POL - Poles
-        POR - Portuguese
-        SAR - Saracens
-        SIC - Sicilians
-        SLA - Slavs
-        SPA - Spanish
-        TAT - Tatars
-        TEU - Teutons
-        TUR - Turks
-        VIE - Vietnamese
-        VIK - Vikings
+{civ_codes}
                 
 
         Output the detected player's name and their respective civilizations in JSON format. 
@@ -168,7 +192,17 @@ def get_default_civ_counter_prompt(username, teammates):
 
         Do not return players with the following name: {username}, {teammates}
         """
-    return base_prompt.format(username=username, teammates=teammates)
+    civ_codes = "\n".join(f"        {code} - {civ}" for code, civ in CIV_CODES.items())
+    return base_prompt.format(username=username, teammates=teammates, civ_codes=civ_codes)
+
+# Names only, for the civ panel rows whose civ code was already read locally
+PLAYER_NAMES_PROMPT = """
+        You are an Age of Empires 2 screenshot analyst. Each line of this image is one player of a live match: the player's name, their score and a three-letter civilization code.
+
+        Output the player names exactly as written, one per line from top to bottom, in JSON format.
+
+        example: {"Players": ["Chagatai Khan", "King Alfonso"]}
+        """
 
 # For backward compatibility
 def get_civ_counter_prompt(username, teammates):
@@ -182,22 +216,194 @@ def load_user_info():
     except FileNotFoundError:
         return "", ""
 
-username, teammates = load_user_info()
+def _load_screenshot_regions():
+    resource_region, civ_region = get_screenshot_regions()
+    return {"RESOURCE_SCREENSHOT_REGION": resource_region, "CIV_SCREENSHOT_REGION": civ_region}
 
-# Load prompts from files or use defaults
-RESOURCE_CHECK_PROMPT = load_prompt_from_file(RESOURCE_CHECK_PROMPT_PATH, DEFAULT_RESOURCE_CHECK_PROMPT)
-CIV_COUNTER_PROMPT = load_prompt_from_file(CIV_COUNTER_PROMPT_PATH, get_default_civ_counter_prompt(username, teammates))
+def _load_prompts():
+    # Load prompts from files or use defaults
+    username, teammates = load_user_info()
+    return {
+        "RESOURCE_CHECK_PROMPT": load_prompt_from_file(RESOURCE_CHECK_PROMPT_PATH, DEFAULT_RESOURCE_CHECK_PROMPT),
+        "CIV_COUNTER_PROMPT": load_prompt_from_file(CIV_COUNTER_PROMPT_PATH, get_default_civ_counter_prompt(username, teammates)),
+    }
+
+# Settings that query the screen or read/write files are computed on first access instead of
+# at import, so importing config has no side effects (see __getattr__)
+_LAZY_SETTINGS = {
+    "RESOURCE_SCREENSHOT_REGION": _load_screenshot_regions,
+    "CIV_SCREENSHOT_REGION": _load_screenshot_regions,
+    "RESOURCE_CHECK_PROMPT": _load_prompts,
+    "CIV_COUNTER_PROMPT": _load_prompts,
+}
+
+def __getattr__(name):
+    if name in _LAZY_SETTINGS:
+        values = _LAZY_SETTINGS[name]()
+        globals().update(values)
+        return values[name]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 # Timing constants
 RESOURCE_CHECK_INTERVAL = 15  # seconds
+# Adaptive polling: checks speed up to RESOURCE_CHECK_MIN_INTERVAL near an alert threshold and
+# back off by RESOURCE_CHECK_BACKOFF per unchanged frame up to RESOURCE_CHECK_MAX_INTERVAL
+RESOURCE_CHECK_MIN_INTERVAL = 5  # seconds
+RESOURCE_CHECK_MAX_INTERVAL = 45  # seconds
+RESOURCE_CHECK_BACKOFF = 1.5
+RESOURCE_CHECK_FIXED_RATE = True  # Subtract capture/analysis time from the wait
+RESOURCE_NEAR_THRESHOLD_RATIO = 0.8  # Resources at 80% of a floating cutoff count as near
 VILLAGER_WARNING_INTERVAL = 50  # seconds
+
+# Resource alerts pipeline: capture, inference and rule checks run as separate stages and
+# alerts are delivered by the alert dispatcher. Capture -> inference keeps only the latest frame.
+PIPELINE_READINGS_QUEUE_SIZE = 16  # Complete and streamed partial readings waiting for the checks
+PIPELINE_POLL_INTERVAL = 0.5  # seconds; how often idle stages check for stop()
+PIPELINE_STOP_TIMEOUT = 2  # seconds to wait for each stage when the thread stops
+
+# Alert dispatcher: waiting alerts are delivered highest priority first, ALERT_DELIVERY_SPACING
+# apart. An alert repeats at most once per cooldown, also across its condition clearing and
+# coming back. Checks clear (re-arm) an alert past a separate threshold so values hovering at
+# the cutoff don't flap: floating resources below FLOATING_RESOURCE_REARM_RATIO of their cutoff,
+# the house alert once HOUSE_LIMIT_REARM_SLOTS more slots are free than its warning buffer
+ALERT_DELIVERY_SPACING = 2  # seconds between consecutive alerts
+ALERT_FADE_DURATION = 0.55  # seconds a color flash takes to fade out after its duration
+ALERT_PRIORITIES = {
+    "house_limit": 3,
+    "idle_villagers": 2,
+    "low_villager_count": 1,
+    "floating_stone": 0,
+    "floating_wood": 0,
+    "floating_food": 0,
+    "floating_gold": 0,
+}
+ALERT_COOLDOWNS = {  # seconds
+    "house_limit": 20,
+    "idle_villagers": 15,
+    "low_villager_count": VILLAGER_WARNING_INTERVAL,
+    "floating_stone": 45,
+    "floating_wood": 45,
+    "floating_food": 45,
+    "floating_gold": 45,
+}
+FLOATING_RESOURCE_REARM_RATIO = 0.9
+HOUSE_LIMIT_REARM_SLOTS = 3
 OLLAMA_CONNECTION_RETRY_INTERVAL = 30  # seconds
 
+# Frame-change gating for resource checks: a capture counts as changed when at least
+# FRAME_CHANGE_THRESHOLD thumbnail cells moved by more than FRAME_CHANGE_PIXEL_TOLERANCE gray levels
+FRAME_CHANGE_THRESHOLD = 3
+FRAME_CHANGE_PIXEL_TOLERANCE = 12
+
+# Local OCR of the resource bar: frames whose weakest field scores below
+# RESOURCE_OCR_MIN_CONFIDENCE go to the vision model instead. The model is still
+# asked every RESOURCE_OCR_MODEL_REFRESH_INTERVAL seconds for the age and game time.
+USE_RESOURCE_OCR = True
+RESOURCE_OCR_MIN_CONFIDENCE = 0.8
+RESOURCE_OCR_MODEL_REFRESH_INTERVAL = 120  # seconds
+
+# Local reading of the civ panel: each player row's three-letter code is matched against
+# letter templates. Rows scoring below CIV_DETECTION_MIN_CONFIDENCE (or with letters that
+# have no template yet) are cropped out and sent to the vision model; the others never are.
+USE_CIV_DETECTION = True
+CIV_DETECTION_MIN_CONFIDENCE = 0.8
+
+# In-match detection: resource bar captures scoring below MATCH_DETECTION_MIN_SCORE against
+# the HUD signature (menus, lobbies, loading screens) are not analysed, and the bar is
+# probed again every MATCH_PROBE_INTERVAL seconds until a match is visible
+USE_MATCH_DETECTION = True
+MATCH_DETECTION_MIN_SCORE = 0.7
+MATCH_DETECTION_PIXEL_TOLERANCE = 30
+MATCH_PROBE_INTERVAL = 5  # seconds
+
 # Paths to data files
 COUNTERS_DATA_PATH = resource_path('counters_data/aoe2_counter_unique_gemini.json')
+UNIT_COUNTERS_DATA_PATH = resource_path('counters_data/aoe2_counters_normal.json')
+# Both counter files compiled into one unit graph; rebuilt whenever either file changes
+COUNTER_GRAPH_CACHE_PATH = user_cache_path('counter_graph.json')
+# Army composition scoring: a counter listed at rank r (0 = first) for a unit is worth
+# ARMY_COUNTER_RANK_DECAY ** r against it. A unit that is itself countered by the enemy unit,
+# or listed as a unit to avoid against it, loses ARMY_COUNTER_WEAKNESS_WEIGHT times that.
+ARMY_COUNTER_RANK_DECAY = 0.8
+ARMY_COUNTER_WEAKNESS_WEIGHT = 0.5
+ARMY_COUNTER_TOP = 5  # counters shown for a whole enemy army
+RESOURCE_OCR_TEMPLATES_PATH = resource_path('ocr_data/resource_digits.json')
+HUD_SIGNATURE_PATH = resource_path('ocr_data/hud_signature.json')
+CIV_CODE_TEMPLATES_PATH = resource_path('ocr_data/civ_code_letters.json')
+# Civ names the model returns that match no civilization, code or alias exactly are resolved to
+# the closest known name when their similarity (0-1) is at least COUNTER_NAME_MATCH_CUTOFF
+COUNTER_NAME_MATCH_CUTOFF = 0.75
+# Player names read from the civ panel count as the user or a teammate when their similarity
+# (0-1) to a saved username is at least PLAYER_NAME_MATCH_CUTOFF
+PLAYER_NAME_MATCH_CUTOFF = 0.8
+# Unit names are only matched to a known unit whose first and last words have at least this similarity
+UNIT_WORD_MATCH_CUTOFF = 0.8
+RESOURCE_BENCHMARK_IMAGE_PATH = resource_path('images/test_resource.jpg')
+CIV_BENCHMARK_IMAGE_PATH = resource_path('images/test_civ.jpg')
+
+# Automatic model selection: every installed multimodal model is benchmarked on the bundled
+# test images and each task (resource bar, civ panel) uses the fastest model whose answers
+# pass at least MODEL_ACCURACY_FLOOR of MODEL_BENCHMARK_RUNS runs. The profile is kept per
+# machine in MODEL_PROFILE_PATH. Every MODEL_LOAD_CHECK_INTERVAL seconds the CPU/RAM/GPU load
+# (without Ollama's own use) is compared with the load at benchmark time; a change of more
+# than MODEL_LOAD_CHANGE_PERCENT points (or a different set of installed models) triggers a
+# new benchmark, at most once per MODEL_REBENCHMARK_MIN_INTERVAL seconds. While the match probe
+# sees a match neither the check nor a benchmark runs; the check runs as soon as it ends. GPU load is not compared within
+# MODEL_LOAD_OLLAMA_QUIET_TIME seconds of an Ollama request. AI_CONFIG's default image model
+# is used until then.
+USE_MODEL_SELECTION = True
+MODEL_PROFILE_PATH = user_data_path('model_profile.json')
+MODEL_BENCHMARK_RUNS = 3
+MODEL_ACCURACY_FLOOR = 0.66
+MODEL_LOAD_CHECK_INTERVAL = 60  # seconds
+MODEL_LOAD_CHANGE_PERCENT = 25
+MODEL_REBENCHMARK_MIN_INTERVAL = 30 * 60  # seconds
+MODEL_LOAD_OLLAMA_QUIET_TIME = 10  # seconds
+
+# Civ counter results are cached by a perceptual hash of the civ panel, the prompt and the model,
+# so pressing the hotkey again during a match skips the model. Captures whose 256-bit hashes differ
+# in at most CIV_ANALYSIS_CACHE_MAX_DISTANCE cells count as the same panel; cells within
+# CIV_ANALYSIS_CACHE_DEAD_ZONE gray levels of their neighbour (the grainy game world behind the
+# panel) count as flat rather than as brighter on a random side. Set CIV_ANALYSIS_CACHE_PATH to None to keep the cache in memory only.
+CIV_ANALYSIS_CACHE_SIZE = 32
+CIV_ANALYSIS_CACHE_TTL = 2 * 60 * 60  # seconds; longer than a match
+CIV_ANALYSIS_CACHE_MAX_DISTANCE = 8
+CIV_ANALYSIS_CACHE_DEAD_ZONE = 8
+CIV_ANALYSIS_CACHE_PATH = user_cache_path('civ_analysis_cache.json')
 
 # App configuration
 API_BASE_URL = "http://api.wolologpt.com"
+API_REQUEST_TIMEOUT = 5  # seconds
+NEWS_MESSAGE_URL = "https://wolologpt.com/in-program-messagebox.html"
+# Status checks and news fetches run on a small thread pool instead of the GUI thread
+BACKGROUND_TASK_THREADS = 3
+# Target time from launch to the main window being shown (python main.py --startup-profile)
+STARTUP_BUDGET = 1.0  # seconds
+# The session's system snapshot probes run concurrently, each given up on after its deadline
+SYSTEM_PROBE_DEADLINES = {
+    "system_resources": 3,  # psutil and GPUtil (spawns nvidia-smi)
+    "ollama_models": 3,
+    "ip": API_REQUEST_TIMEOUT,
+}
+SYSTEM_PROBE_MAX_AGE = 300  # seconds a snapshot is reused
+# Telemetry actions are queued and sent in the background: a batch goes out once
+# TELEMETRY_BATCH_SIZE actions are waiting or every TELEMETRY_FLUSH_INTERVAL seconds.
+# When TELEMETRY_QUEUE_SIZE actions are waiting the oldest is dropped.
+TELEMETRY_QUEUE_SIZE = 1000
+TELEMETRY_BATCH_SIZE = 20
+TELEMETRY_FLUSH_INTERVAL = 10  # seconds
+TELEMETRY_CLOSE_FLUSH_TIMEOUT = 1  # seconds the window waits for queued actions when it closes
+# Events the server could not take are spooled to JSON lines files and replayed,
+# TELEMETRY_REPLAY_BATCH_SIZE at a time, once it is reachable again. After a failed
+# send the server is left alone for TELEMETRY_RETRY_INTERVAL seconds, doubling up to
+# TELEMETRY_RETRY_MAX_INTERVAL while it stays down.
+TELEMETRY_SPOOL_DIR = 'logs/telemetry_spool'
+TELEMETRY_SPOOL_SEGMENT_BYTES = 1024 * 1024
+TELEMETRY_SPOOL_MAX_BYTES = 20 * 1024 * 1024  # Oldest segments are deleted beyond this
+TELEMETRY_SPOOL_FSYNC_INTERVAL = 5  # seconds
+TELEMETRY_REPLAY_BATCH_SIZE = 200
+TELEMETRY_RETRY_INTERVAL = 30  # seconds
+TELEMETRY_RETRY_MAX_INTERVAL = 600  # seconds
 ENABLE_API_TRACKING = False  # Can be toggled in settings
 
 # Feature flags
@@ -0,0 +1,323 @@
+import os
+import re
+import json
+import difflib
+import threading
+import unicodedata
+from config import (COUNTERS_DATA_PATH, UNIT_COUNTERS_DATA_PATH, COUNTER_GRAPH_CACHE_PATH,
+                    COUNTER_NAME_MATCH_CUTOFF, UNIT_WORD_MATCH_CUTOFF)
+from utils import logger
+
+COUNTER_GRAPH_FORMAT = 2  # Bump when the compiled form changes so old caches are rebuilt
+
+# Upgrades and variants -> the unit line they belong to (keys as produced by unit_key)
+UNIT_LINE_ALIASES = {
+    "crossbowman": "archer", "heavy crossbowman": "archer", "arbalest": "archer", "arbalester": "archer",
+    "long range archer": "archer",
+    "elite skirmisher": "skirmisher", "imperial skirmisher": "skirmisher",
+    "heavy cavalry archer": "cavalry archer",
+    "elite elephant archer": "elephant archer",
+    "militia": "swordsman", "man at arm": "swordsman", "long swordsman": "swordsman",
+    "two handed swordsman": "swordsman", "champion": "swordsman",
+    "pikeman": "spearman", "halberdier": "spearman", "pike": "spearman",
+    "eagle scout": "eagle warrior", "elite eagle warrior": "eagle warrior",
+    "scout": "scout cavalry", "light cavalry": "scout cavalry", "hussar": "scout cavalry",
+    "winged hussar": "scout cavalry",
+    "cavalier": "knight", "paladin": "knight",
+    "camel rider": "camel", "heavy camel": "camel", "heavy camel rider": "camel", "imperial camel": "camel",
+    "imperial camel rider": "camel",
+    "elephant": "battle elephant", "elite battle elephant": "battle elephant",
+    "elite steppe lancer": "steppe lancer",
+    "battering ram": "ram", "capped ram": "ram", "siege ram": "ram",
+    "siege onager": "onager", "heavy scorpion": "scorpion",
+    "war galley": "galley", "galleon": "galley",
+    "fast fire ship": "fire ship", "demolition raft": "demolition ship", "heavy demolition ship": "demolition ship",
+    "elite cannon galleon": "cannon galleon",
+}
+# Leading words and trailing phrases that qualify a counter without changing the unit
+UNIT_QUALIFIERS = re.compile(r"^(?:fully upgraded|massed|mass|most|elite)\s+|\s+(?:alone|with .*)$")
+
+def _similar(word, other):
+    """Same word up to a typo or a missing letter"""
+    return difflib.SequenceMatcher(None, word, other).ratio() >= UNIT_WORD_MATCH_CUTOFF
+
+def unit_key(name):
+    """
+    Canonical key of a unit name as written in the counter files.
+
+    "Arbalests", "Heavy Crossbowmen" and "Archer line" all become "archer";
+    parentheses are dropped (see parse_unit_names for their contents).
+    """
+    text = unicodedata.normalize("NFKD", name).encode("ascii", "ignore").decode("ascii").casefold()
+    text = re.sub(r"\(.*?\)", " ", text)
+    text = re.sub(r"[^a-z0-9]+", " ", text).strip()
+    text = re.sub(r"\bcav\b", "cavalry", text)
+    text = UNIT_QUALIFIERS.sub("", text)
+    text = re.sub(r"\s+line$", "", text)
+    words = text.split()
+    if words:
+        last = words[-1]
+        if last.endswith("men"):
+            words[-1] = last[:-3] + "man"
+        elif last.endswith("s") and not last.endswith("ss") and len(last) > 3:
+            words[-1] = last[:-1]
+    key = " ".join(words)
+    return UNIT_LINE_ALIASES.get(key, key)
+
+def parse_unit_names(text, known_keys):
+    """
+    Split a counter entry into (unit key, display name) pairs.
+
+    "Halberdiers + Arbalests" and "Monks + Halberdiers/Camels" name several
+    units. "Cavalry (Scouts, Knights)" names its members when they are known
+    units; a parenthesis that is only a remark ("situational") is ignored.
+    "None specified" names nothing.
+    """
+    units = []
+    for part in re.split(r"\s*[+/]\s*", text):
+        part = part.strip()
+        if not part or part.casefold().startswith("none"):
+            continue
+        members = []
+        for inner in re.findall(r"\((.*?)\)", part):
+            keys = [(unit_key(member), member.strip()) for member in inner.split(",")]
+            if all(key in known_keys for key, _ in keys):
+                members.extend(keys)
+        units.extend(members or [(unit_key(part), re.sub(r"\s*\(.*?\)", "", part).strip())])
+    return units
+
+def _source_stamp(path):
+    stat = os.stat(path)
+    return [stat.st_mtime_ns, stat.st_size]
+
+def compile_counter_graph(unit_counters, civ_counters):
+    """
+    Merge the unit-line counter list and the per-civ unique unit counters into the compact form.
+
+    Args:
+        unit_counters: Parsed aoe2_counters_normal.json, [{"unit", "counter units", "quick summary"}]
+        civ_counters: Parsed aoe2_counter_unique_gemini.json, civ -> entry
+
+    Returns:
+        dict: JSON-serialisable graph: parallel per-unit lists indexed by unit id ("keys", "names",
+            "kinds", "summaries", "counters" and "avoid" as ranked id lists) plus "civ_units"
+    """
+    keys, names, kinds, summaries = [], [], [], []
+    counters, avoid = [], []
+    ids = {}
+
+    def node(key, name, kind):
+        if key not in ids:
+            ids[key] = len(keys)
+            keys.append(key)
+            names.append(name)
+            kinds.append(kind)
+            summaries.append("")
+            counters.append([])
+            avoid.append([])
+        return ids[key]
+
+    def link(edges, unit_id, text):
+        for key, name in parse_unit_names(text, ids):
+            target = node(key, name, "group")
+            if target != unit_id and target not in edges[unit_id]:
+                edges[unit_id].append(target)
+
+    # Unit lines first, so their members are known when the counters are parsed
+    for entry in unit_counters:
+        unit_id = node(unit_key(entry["unit"]), entry["unit"], "line")
+        summaries[unit_id] = entry.get("quick summary", "")
+
+    civ_units = {}
+    for civ, entry in civ_counters.items():
+        unit_ids = []
+        for unit in entry.get("unique_units", []):
+            unit_id = node(unit_key(unit), unit, "unique")
+            summaries[unit_id] = summaries[unit_id] or entry.get("tips", "")
+            unit_ids.append(unit_id)
+        civ_units[civ] = unit_ids
+
+    for entry in unit_counters:
+        unit_id = ids[unit_key(entry["unit"])]
+        for text in entry.get("counter units", []):
+            link(counters, unit_id, text)
+    for civ, entry in civ_counters.items():
+        for edges, field in ((counters, "counters"), (avoid, "units_to_avoid")):
+            values = entry.get(field, [])
+            for unit_id, name in zip(civ_units[civ], entry.get("unique_units", [])):
+                # Either one list for all the civ's unique units or a list per unit
+                for text in (values.get(name, []) if isinstance(values, dict) else values):
+                    link(edges, unit_id, text)
+
+    return {"format": COUNTER_GRAPH_FORMAT, "keys": keys, "names": names, "kinds": kinds,
+            "summaries": summaries, "counters": counters, "avoid": avoid, "civ_units": civ_units}
+
+class CounterGraph:
+    """
+    Unit-counter graph built from both counter files.
+
+    Nodes are unit lines from aoe2_counters_normal.json (upgrades such as
+    Arbalest or Paladin resolve to their line), the civs' unique units and the
+    groups the files counter with ("Cavalry", "Ranged Units"). Edges run from
+    a unit to its counters in the order the files rank them, with the reverse
+    edges (what a unit beats) and civ -> unique units kept alongside, so every
+    query is a dict or list access.
+
+    The graph is compiled into a compact JSON form (ids and id lists) that is
+    cached in `cache_path` together with the source files' mtimes and sizes;
+    load() reuses the cache until either file changes.
+    """
+
+    def __init__(self, unit_counters_path=UNIT_COUNTERS_DATA_PATH, civ_counters_path=COUNTERS_DATA_PATH,
+                 cache_path=COUNTER_GRAPH_CACHE_PATH, cutoff=COUNTER_NAME_MATCH_CUTOFF):
+        self.unit_counters_path = unit_counters_path
+        self.civ_counters_path = civ_counters_path
+        self.cache_path = cache_path
+        self.cutoff = cutoff
+        self._lock = threading.Lock()
+        self._sources = None
+        self._graph = None
+        self._ids = {}
+        self._beats = []
+        self._unit_civs = []
+        self.stats = {"compiles": 0, "cache_loads": 0}
+
+    def load(self):
+        """Compile the graph, or load the cached one, if the source files changed since the last load"""
+        with self._lock:
+            sources = {path: _source_stamp(path) for path in (self.unit_counters_path, self.civ_counters_path)}
+            if sources == self._sources:
+                return
+            graph = self._read_cache(sources)
+            if graph is None:
+                with open(self.unit_counters_path, "r") as f:
+                    unit_counters = json.load(f)
+                with open(self.civ_counters_path, "r") as f:
+                    civ_counters = json.load(f)
+                graph = compile_counter_graph(unit_counters, civ_counters)
+                self.stats["compiles"] += 1
+                self._write_cache(sources, graph)
+            else:
+                self.stats["cache_loads"] += 1
+            self._install(graph)
+            self._sources = sources
+            logger.info(f"Counter graph ready: {len(graph['keys'])} units, "
+                        f"{sum(len(edges) for edges in graph['counters'])} counter edges")
+
+    def _read_cache(self, sources):
+        if self.cache_path is None:
+            return None
+        try:
+            with open(self.cache_path, "r") as f:
+                cached = json.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable counter graph cache: {str(e)}")
+            return None
+        if cached.get("sources") != sources or cached.get("graph", {}).get("format") != COUNTER_GRAPH_FORMAT:
+            return None
+        return cached["graph"]
+
+    def _write_cache(self, sources, graph):
+        if self.cache_path is None:
+            return
+        try:
+            os.makedirs(os.path.dirname(self.cache_path) or ".", exist_ok=True)
+            temporary = self.cache_path + ".tmp"
+            with open(temporary, "w") as f:
+                json.dump({"sources": sources, "graph": graph}, f, separators=(",", ":"))
+            os.replace(temporary, self.cache_path)
+        except OSError as e:
+            logger.warning(f"Could not cache the counter graph: {str(e)}")
+
+    def _install(self, graph):
+        """Build the lookup tables and reverse edges of a compiled graph (caller holds the lock)"""
+        ids = {key: unit_id for unit_id, key in enumerate(graph["keys"])}
+        beats = [[] for _ in graph["keys"]]
+        for unit_id, edges in enumerate(graph["counters"]):
+            for counter_id in edges:
+                beats[counter_id].append(unit_id)
+        unit_civs = [[] for _ in graph["keys"]]
+        for civ, unit_ids in graph["civ_units"].items():
+            for unit_id in unit_ids:
+                unit_civs[unit_id].append(civ)
+        self._graph, self._ids, self._beats, self._unit_civs = graph, ids, beats, unit_civs
+
+    @property
+    def graph(self):
+        """The compiled graph (see compile_counter_graph), loading it on first use"""
+        if self._graph is None:
+            self.load()
+        return self._graph
+
+    def unit_id(self, name):
+        """
+        Id of a unit name (any upgrade of a line, a unique unit or a group), or None.
+
+        Names that match no key exactly are resolved to the closest key and remembered.
+        Only keys whose first and last words are nearly the same compete: those are
+        what tell units apart ("Xolotl Warrior" is not a "Shotel Warrior").
+        """
+        graph = self.graph
+        key = unit_key(name)
+        if key in self._ids:
+            return self._ids[key]
+        with self._lock:
+            words = key.split()
+            candidates = [known for known in graph["keys"]
+                          if words and _similar(words[0], known.split()[0]) and _similar(words[-1], known.split()[-1])]
+            matches = difflib.get_close_matches(key, candidates, n=1, cutoff=self.cutoff)
+            unit_id = self._ids[matches[0]] if matches else None
+            self._ids[key] = unit_id
+            return unit_id
+
+    def _names(self, unit_ids):
+        names = self.graph["names"]
+        return [names[unit_id] for unit_id in unit_ids]
+
+    def name(self, unit):
+        unit_id = self.unit_id(unit)
+        return self.graph["names"][unit_id] if unit_id is not None else None
+
+    def counters(self, unit):
+        """What counters a unit, strongest first"""
+        unit_id = self.unit_id(unit)
+        return self._names(self.graph["counters"][unit_id]) if unit_id is not None else []
+
+    def beats(self, unit):
+        """What a unit is listed as a counter to (the reverse edges)"""
+        unit_id = self.unit_id(unit)
+        return self._names(self._beats[unit_id]) if unit_id is not None else []
+
+    def avoid(self, unit):
+        """Units that do badly against a unique unit"""
+        unit_id = self.unit_id(unit)
+        return self._names(self.graph["avoid"][unit_id]) if unit_id is not None else []
+
+    def summary(self, unit):
+        unit_id = self.unit_id(unit)
+        return self.graph["summaries"][unit_id] if unit_id is not None else ""
+
+    def unique_units(self, civ):
+        """A civilization's unique units; the civ name is resolved like the counter popup does"""
+        from counter_index import counter_index
+        civ = counter_index.resolve(civ)
+        return self._names(self.graph["civ_units"].get(civ, []))
+
+    def civ_counters(self, civ):
+        """Unique unit -> its counters, for one civilization"""
+        return {unit: self.counters(unit) for unit in self.unique_units(civ)}
+
+    def civs_with(self, unit):
+        """Civilizations that have a unique unit"""
+        unit_id = self.unit_id(unit)
+        return list(self._unit_civs[unit_id]) if unit_id is not None else []
+
+    def get_stats(self):
+        with self._lock:
+            graph = self._graph or {"keys": [], "counters": []}
+            return dict(self.stats, units=len(graph["keys"]),
+                        edges=sum(len(edges) for edges in graph["counters"]))
+
+counter_graph = CounterGraph()
@@ -0,0 +1,157 @@
+import os
+import re
+import json
+import difflib
+import threading
+import unicodedata
+from config import COUNTERS_DATA_PATH, CIV_CODES, CIV_NAME_ALIASES, COUNTER_NAME_MATCH_CUTOFF
+from utils import logger
+
+def normalize_name(name):
+    """Case, accents, spaces and punctuation don't matter: "Bengalis ", "bengalis" and "BENGALIS!" are one name"""
+    text = unicodedata.normalize("NFKD", str(name)).encode("ascii", "ignore").decode("ascii").casefold()
+    return re.sub(r"[^a-z0-9]", "", text)
+
+def render_civ(civ, civ_info):
+    """HTML fragment with a civilization's unique units, their counters, the units to avoid and tips"""
+    unique_units = civ_info.get('unique_units', [])
+    counters = civ_info.get('counters', {})
+    units_to_avoid = civ_info.get('units_to_avoid', {})
+    tips = civ_info.get('tips', '')
+
+    parts = [f"<h2>{civ}</h2>", f"<p><strong>Unique Units:</strong> {', '.join(unique_units)}</p>"]
+    if isinstance(counters, dict):
+        parts.append("<ul>")
+        parts.extend(f"<li><strong>{unit}:</strong> {', '.join(unit_counters)}</li>"
+                     for unit, unit_counters in counters.items())
+        parts.append("</ul>")
+    else:
+        parts.append(f"<p><strong>Counters:</strong> {', '.join(counters)}</p>")
+    if isinstance(units_to_avoid, dict):
+        parts.append("<ul>")
+        parts.extend(f"<li><strong>Units to avoid for {unit}:</strong> {', '.join(avoid_units)}</li>"
+                     for unit, avoid_units in units_to_avoid.items())
+        parts.append("</ul>")
+    else:
+        parts.append(f"<p><strong>Units to avoid:</strong> {', '.join(units_to_avoid)}</p>")
+    parts.append(f"<p><strong>Tips:</strong> {tips}</p>")
+    return "".join(parts)
+
+class CounterIndex:
+    """
+    The per-civ counter data, loaded once and indexed for the counter popup.
+
+    Every civilization is indexed under its normalised name, its three-letter
+    panel code (CIV_CODES) and the older names the model may use
+    (CIV_NAME_ALIASES), and its HTML fragment is rendered at load time, so a
+    lookup is a dict access. A name that matches nothing exactly is resolved to
+    the closest known name (difflib ratio at least `cutoff`) and the outcome is
+    remembered. The file is parsed again only when its modification time
+    changes.
+    """
+
+    def __init__(self, path=COUNTERS_DATA_PATH, codes=CIV_CODES, aliases=CIV_NAME_ALIASES,
+                 cutoff=COUNTER_NAME_MATCH_CUTOFF):
+        self.path = path
+        self.codes = codes
+        self.aliases = aliases
+        self.cutoff = cutoff
+        self._lock = threading.Lock()
+        self._mtime = None
+        self._data = {}     # civ -> counter entry from the file
+        self._html = {}     # civ -> prerendered HTML fragment
+        self._names = {}    # normalised name, code or alias -> civ; fuzzy outcomes (None if unresolved) too
+        self._fuzzy_candidates = []  # normalised full names and aliases the fuzzy match picks from
+        self.stats = {"loads": 0, "lookups": 0, "fuzzy_matches": 0, "unresolved": 0}
+
+    def load(self):
+        """
+        Parse the counter file if it changed since the last load.
+
+        Raises:
+            FileNotFoundError: If the file doesn't exist and nothing was loaded before
+            ValueError: If the file is not valid JSON and nothing was loaded before
+        """
+        with self._lock:
+            try:
+                mtime = os.stat(self.path).st_mtime_ns
+                if mtime == self._mtime:
+                    return
+                with open(self.path, 'r') as f:
+                    data = json.load(f)
+            except (OSError, ValueError) as e:
+                if self._mtime is None:
+                    raise
+                logger.warning(f"Keeping the loaded counter data, {self.path} could not be read: {str(e)}")
+                return
+            self._build(data)
+            self._mtime = mtime
+            self.stats["loads"] += 1
+            logger.info(f"Counter data loaded: {len(self._data)} civilizations from {self.path}")
+
+    def _build(self, data):
+        """Index and render a freshly parsed file (caller holds the lock)"""
+        names = {normalize_name(civ): civ for civ in data}
+        for alias, civ in self.aliases.items():
+            if civ in data:
+                names.setdefault(normalize_name(alias), civ)
+        candidates = list(names)
+        for code, civ in self.codes.items():
+            civ = self.aliases.get(civ, civ)
+            if civ in data:
+                names.setdefault(normalize_name(code), civ)
+
+        self._data = data
+        self._html = {civ: render_civ(civ, civ_info) for civ, civ_info in data.items()}
+        self._names = names
+        self._fuzzy_candidates = candidates
+
+    def resolve(self, name):
+        """
+        Map a name from the model (full name, code, alias or a near miss) to a civilization in the data.
+
+        Returns:
+            str or None: The civilization as it is keyed in the counter file
+        """
+        self.load()
+        key = normalize_name(name)
+        with self._lock:
+            self.stats["lookups"] += 1
+            if key in self._names:
+                civ = self._names[key]
+            else:
+                # Codes are too short to fuzzy match safely ("BRN" is as close to "BRI" as to "BRM")
+                matches = difflib.get_close_matches(key, self._fuzzy_candidates, n=1, cutoff=self.cutoff) \
+                    if len(key) > 3 else []
+                civ = self._names[matches[0]] if matches else None
+                self._names[key] = civ
+                if civ is not None:
+                    self.stats["fuzzy_matches"] += 1
+                    logger.info(f"Resolved civilization {name!r} to {civ!r}")
+            if civ is None:
+                self.stats["unresolved"] += 1
+            return civ
+
+    def get(self, name):
+        """The counter entry for a civilization name, or None"""
+        civ = self.resolve(name)
+        return self._data.get(civ) if civ is not None else None
+
+    def render(self, name):
+        """The prerendered HTML fragment for a civilization name"""
+        civ = self.resolve(name)
+        html = self._html.get(civ) if civ is not None else None
+        return html if html is not None else f"<p>No counter information available for {name}.</p>"
+
+    def render_civs(self, names):
+        return "\n".join(self.render(name) for name in names)
+
+    def civilizations(self):
+        self.load()
+        return list(self._data)
+
+    def get_stats(self):
+        with self._lock:
+            return dict(self.stats, civilizations=len(self._data))
+
+counter_index = CounterIndex()
@@ -0,0 +1,87 @@
+from PIL import Image
+from config import FRAME_CHANGE_THRESHOLD, FRAME_CHANGE_PIXEL_TOLERANCE
+from utils import logger
+
+class FrameChangeDetector:
+    """
+    Cheap change detection for consecutive captures of the same screen region.
+
+    Each frame is reduced to a small grayscale thumbnail (a few hundred bytes)
+    and compared cell by cell with the last frame that was actually sent to the
+    model. When fewer than `threshold` cells moved by more than `pixel_tolerance`
+    gray levels, the frame is considered unchanged and the previous result can
+    be reused instead of running inference again.
+    """
+
+    def __init__(self, threshold=FRAME_CHANGE_THRESHOLD, pixel_tolerance=FRAME_CHANGE_PIXEL_TOLERANCE,
+                 sample_size=(150, 9)):
+        self.threshold = threshold
+        self.pixel_tolerance = pixel_tolerance
+        self.sample_size = sample_size
+        self.hits = 0    # Frames judged unchanged, inference skipped
+        self.misses = 0  # Frames that had to go to the model
+        self._reference = None
+        self._pending = None
+
+    def signature(self, frame):
+        """Downsampled grayscale bytes of a frame (CapturedFrame or PIL image)"""
+        image = getattr(frame, "image", frame)
+        return image.convert("L").resize(self.sample_size, Image.BOX).tobytes()
+
+    def changed_cells(self, signature_a, signature_b):
+        """Number of thumbnail cells that differ by more than the pixel tolerance"""
+        tolerance = self.pixel_tolerance
+        return sum(1 for a, b in zip(signature_a, signature_b) if abs(a - b) > tolerance)
+
+    def has_changed(self, frame):
+        """
+        Compare a frame with the last analysed one and update the hit/miss counters.
+
+        Returns:
+            bool: True if the frame should be sent to the model.
+        """
+        self._pending = self.signature(frame)
+        if self._reference is None:
+            self.misses += 1
+            return True
+
+        changed = self.changed_cells(self._reference, self._pending)
+        if changed >= self.threshold:
+            self.misses += 1
+            return True
+
+        self.hits += 1
+        logger.debug(f"Frame unchanged ({changed} cells moved), reusing last result")
+        return False
+
+    @property
+    def pending_signature(self):
+        """Signature of the frame from the last has_changed() call"""
+        return self._pending
+
+    def mark_analyzed(self, signature=None):
+        """
+        Use an analysed frame as the new reference.
+
+        Args:
+            signature: Signature of the analysed frame; defaults to the frame from the
+                last has_changed() call. Pass it explicitly when newer frames may have
+                been compared while this one was being analysed.
+        """
+        signature = self._pending if signature is None else signature
+        if signature is not None:
+            self._reference = signature
+
+    def reset(self):
+        """Forget the reference frame so the next frame is always analysed"""
+        self._reference = None
+        self._pending = None
+
+    def get_stats(self):
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 3) if total else 0.0,
+            "threshold": self.threshold,
+        }
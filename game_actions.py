@@ -1,10 +1,24 @@
 import keyboard
+import json
 import time
 from screenshot_manager import ScreenshotManager
 from ai_analysis import AIAnalysis
 from utils import logger, show_popup_message
-from config import get_default_civ_counter_prompt as get_civ_counter_prompt, API_KEYS
+from config import get_default_civ_counter_prompt as get_civ_counter_prompt, USE_CIV_DETECTION
 from api_client import api_client
+from model_selector import model_selector
+from result_cache import civ_analysis_cache
+from analysis_models import CivAnalysis, parse_model_output
+from civ_panel_detector import CivPanelDetector
+
+def _load_civ_detector():
+    try:
+        return CivPanelDetector()
+    except (OSError, ValueError, KeyError) as e:
+        logger.error(f"Could not load the civ code templates, using the vision model only: {str(e)}")
+        return None
+
+civ_detector = _load_civ_detector() if USE_CIV_DETECTION else None
 
 
 class GameActions:
@@ -55,21 +69,84 @@ class GameActions:
         """Disable automatic villager creation"""
         GameActions.villager_creation_enabled = False
 
+    @staticmethod
+    def is_valid_civ_analysis(analysis):
+        """Only answers naming at least one civilization are cached; errors and refusals are retried"""
+        try:
+            return bool(parse_model_output(analysis, CivAnalysis).civilizations())
+        except ValueError:
+            return False
+
+    @staticmethod
+    def analyze_civ_panel(frame, prompt, model_name, username="", teammates=""):
+        """
+        Player -> civilization JSON for a civ panel capture.
+
+        Rows whose code the local matcher reads confidently are answered without
+        the model, keyed by player colour. Only the other rows are cropped out and
+        sent to the vision model; when no row is confident (no panel found, or
+        codes without templates) the whole capture goes to the model as before.
+
+        A colour doesn't say whose row it is, so when a username or teammates are
+        set the model reads just the names of the confident rows, and the user's
+        side can be left out of the counters. If the names can't be read the whole
+        capture goes to the model instead.
+        """
+        reading = civ_detector.read(frame) if civ_detector is not None else None
+        civilizations = reading.civilizations(civ_detector.min_confidence) if reading is not None else {}
+        if not civilizations:
+            return AIAnalysis.analyze_civ_screenshot(frame, model_name, prompt)
+
+        if username.strip() or teammates.strip():
+            confident = reading.confident_rows(civ_detector.min_confidence)
+            try:
+                names = AIAnalysis.read_player_names(CivPanelDetector.crop_rows(frame, confident, reading.width), model_name)
+                civilizations = reading.civilizations(civ_detector.min_confidence, names)
+            except ValueError as e:
+                logger.warning(f"Could not name the locally read civ panel rows, asking the model for the whole panel: {str(e)}")
+                return AIAnalysis.analyze_civ_screenshot(frame, model_name, prompt)
+
+        missed = reading.low_confidence_rows(civ_detector.min_confidence)
+        logger.info(f"Civ panel: {len(reading.rows) - len(missed)} of {len(reading.rows)} rows read locally")
+        if missed:
+            rows_image = CivPanelDetector.crop_rows(frame, missed, reading.width)
+            answer = AIAnalysis.analyze_civ_screenshot(rows_image, model_name, prompt)
+            try:
+                civilizations.update(parse_model_output(answer, CivAnalysis).root)
+            except ValueError:
+                logger.warning(f"Ignoring the model answer for the unread civ panel rows: {answer}")
+        return json.dumps(civilizations)
+
     @staticmethod
     def show_civs_counters(username, teammates):
         """Show civilization counters based on screenshot analysis"""
         try:
             logger.info("Starting show_civs_counters method")
-            screenshot_path = ScreenshotManager.take_civ_screenshot()
-            logger.info(f"Screenshot taken: {screenshot_path}")
+            frame = ScreenshotManager.take_civ_screenshot()
+            if frame is None:
+                show_popup_message("Error", "Could not capture the screen for civ analysis.")
+                return
+            logger.info(f"Screenshot taken: {frame}")
             
             # Get the customized prompt
             civ_counter_prompt = get_civ_counter_prompt(username, teammates)
-            
-            analysis = AIAnalysis.analyze_civ_screenshot(screenshot_path, API_KEYS["GOOGLE"], civ_counter_prompt)
-            logger.info(f"Analysis completed: {analysis}")
-            counters = AIAnalysis.get_counters_for_civs(analysis)
-            logger.info(f"Counters retrieved: {counters}")
+            model_name = model_selector.model_for("civ")
+
+            # The civ panel doesn't change during a match: a repeat press reuses the first answer
+            start = time.monotonic()
+            cached, cache_key = civ_analysis_cache.get(frame, civ_counter_prompt, model_name)
+            if cached is not None:
+                analysis, counters = cached["analysis"], cached["counters"]
+                logger.info(f"Civ counters served from cache in {(time.monotonic() - start) * 1000:.1f}ms "
+                            f"({civ_analysis_cache.get_stats()})")
+            else:
+                # The frame is analysed in memory, no round-trip through disk
+                analysis = GameActions.analyze_civ_panel(frame, civ_counter_prompt, model_name, username, teammates)
+                logger.info(f"Analysis completed: {analysis}")
+                counters = AIAnalysis.get_counters_for_civs(analysis, username, teammates)
+                logger.info(f"Counters retrieved: {counters}")
+                if GameActions.is_valid_civ_analysis(analysis):
+                    civ_analysis_cache.put(cache_key, {"analysis": analysis, "counters": counters})
             show_popup_message("Civilization Counters", counters)
             logger.info("Popup message shown successfully")
             api_client.create_action("show_civs_counters", "User requested civilization counters")
@@ -2,7 +2,6 @@ from PyQt6.QtWidgets import (QVBoxLayout, QPushButton, QLineEdit,
                              QLabel, QCheckBox, QHBoxLayout, QComboBox)
 from PyQt6.QtCore import Qt
 from PyQt6.QtGui import QPixmap
-from game_actions import GameActions
 import os
 import sys
 from utils import logger  # Import the logger from utils
@@ -0,0 +1,120 @@
+import json
+
+class IncrementalJSONParser:
+    """
+    Extracts top-level fields from a JSON object while it is still being streamed.
+
+    Text is fed in arbitrary chunks (e.g. tokens from an Ollama stream). As soon as
+    the value of a top-level member is complete it is decoded and returned by
+    feed(), so callers can act on `"Idle Villagers": "2"` before the model has
+    finished writing the rest of the object. Anything before the first '{'
+    (preambles, ```json fences) is ignored.
+
+    Strings and nested objects/arrays are emitted the moment they close; bare
+    scalars (numbers, true/false/null) are emitted once the following ',' or '}'
+    shows they are complete.
+    """
+
+    def __init__(self):
+        self.buffer = ""
+        self.fields = {}
+        self.complete = False
+        self._pos = 0
+        self._started = False
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._key = None
+        self._key_start = None
+        self._expect = "key"  # key -> colon -> value -> (value in progress) -> comma
+        self._value_start = None
+
+    def feed(self, text):
+        """
+        Consume a chunk of text.
+
+        Returns:
+            list: (key, value) tuples for every top-level field completed by this chunk
+        """
+        self.buffer += text
+        completed = []
+        buffer = self.buffer
+        i = self._pos
+
+        while i < len(buffer) and not self.complete:
+            char = buffer[i]
+
+            if not self._started:
+                if char == "{":
+                    self._started = True
+                    self._depth = 1
+                i += 1
+                continue
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == "\\":
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+                    if self._depth == 1:
+                        if self._expect == "key_in_progress":
+                            self._key = json.loads(buffer[self._key_start:i + 1])
+                            self._expect = "colon"
+                        elif self._expect == "value_in_progress":
+                            self._emit(buffer[self._value_start:i + 1], completed)
+                i += 1
+                continue
+
+            if char == '"':
+                self._in_string = True
+                if self._depth == 1:
+                    if self._expect == "key":
+                        self._key_start = i
+                        self._expect = "key_in_progress"
+                    elif self._expect == "value":
+                        self._value_start = i
+                        self._expect = "value_in_progress"
+            elif char in "{[":
+                if self._depth == 1 and self._expect == "value":
+                    self._value_start = i
+                    self._expect = "value_in_progress"
+                self._depth += 1
+            elif char in "}]":
+                self._depth -= 1
+                if self._depth == 1 and self._expect == "value_in_progress":
+                    self._emit(buffer[self._value_start:i + 1], completed)
+                elif self._depth == 0:
+                    if self._expect == "scalar_in_progress":
+                        self._emit(buffer[self._value_start:i], completed)
+                    self.complete = True
+            elif self._depth == 1:
+                if char == ":" and self._expect == "colon":
+                    self._expect = "value"
+                elif char == ",":
+                    if self._expect == "scalar_in_progress":
+                        self._emit(buffer[self._value_start:i], completed)
+                    self._expect = "key"
+                elif not char.isspace() and self._expect == "value":
+                    self._value_start = i
+                    self._expect = "scalar_in_progress"
+            i += 1
+
+        self._pos = i
+        return completed
+
+    def _emit(self, raw_value, completed):
+        try:
+            value = json.loads(raw_value)
+            self.fields[self._key] = value
+            completed.append((self._key, value))
+        except json.JSONDecodeError:
+            # Leave malformed members out; the caller still gets the raw text at the end
+            pass
+        self._expect = "comma"
+        self._value_start = None
+
+    def has_fields(self, keys):
+        """True once every key in `keys` has been received"""
+        return all(key in self.fields for key in keys)
@@ -1,24 +1,26 @@
 print("WololoGPT loading... loading python environment, checking admin rights...")
 
+import sys
+from startup_profile import StartupProfile
+# Created before the other imports so `--startup-profile` can time them
+startup_profile = StartupProfile.from_argv()
+
 from PyQt6.QtWidgets import QApplication, QWidget, QLineEdit, QPushButton, QLabel, QVBoxLayout, QTextBrowser, QHBoxLayout, QMessageBox, QScrollArea, QCheckBox, QComboBox
 from PyQt6.QtCore import Qt, QTimer
 from PyQt6.QtGui import QIcon, QPixmap, QDesktopServices, QKeyEvent
 from PyQt6.QtCore import QUrl
 # Remove this line:
 # from PyQt6.QtWebEngineWidgets import QWebEngineView
-from game_actions import GameActions
-import keyboard
+# game_actions, resource_alerts_thread, audio_manager, ai_analysis and keyboard pull in the
+# capture, analysis and audio stacks; they are imported where they are used so the window
+# shows first (python main.py --startup-profile reports what startup still imports)
 import json
-import requests
-from resource_alerts_thread import ResourceAlertsThread
-from audio_manager import AudioManager
-from config import set_api_key, API_KEYS
-from utils import logger, show_popup_message
+from config import set_api_key, API_KEYS, AI_CONFIG, NEWS_MESSAGE_URL, API_REQUEST_TIMEOUT, STARTUP_BUDGET, TELEMETRY_CLOSE_FLUSH_TIMEOUT
+from utils import logger, show_popup_message, setup_logging, get_popup_manager
 from gui_layout import create_main_layout, resource_path
-from ai_analysis import AIAnalysis
-from color_flash import color_flash, process_color_flashes, initialize_root
+from alert_overlay import AlertOverlay
+from background_tasks import BackgroundTasks
 from api_client import api_client
-import sys
 import os
 import traceback
 import ctypes
@@ -35,9 +37,14 @@ def resource_path(relative_path):
 # --- Python Version Check ---
 MIN_PYTHON_VERSION = (3, 9)
 MAX_PYTHON_VERSION = (3, 11)
-current_python_version = sys.version_info
 
-if not (MIN_PYTHON_VERSION <= current_python_version <= MAX_PYTHON_VERSION):
+def check_python_version():
+    """Exit with a message if the interpreter is not a supported 3.x release"""
+    current_python_version = sys.version_info
+    # Compare major.minor only: (3, 11, 7) would sort after (3, 11) and be rejected
+    if MIN_PYTHON_VERSION <= current_python_version[:2] <= MAX_PYTHON_VERSION:
+        return
+
     # Version is incompatible
     version_str = f"{current_python_version.major}.{current_python_version.minor}.{current_python_version.micro}"
     error_message = (
@@ -50,18 +57,12 @@ if not (MIN_PYTHON_VERSION <= current_python_version <= MAX_PYTHON_VERSION):
     print(error_message, file=sys.stderr) # Always print to console
 
     try:
-        # Attempt to show a GUI message box if PyQt is available
-        # Note: QApplication and QMessageBox are already imported at the top of main.py
-        # from PyQt6.QtWidgets import QApplication, QMessageBox # Not needed again if already globally imported
-        
+        # Attempt to show a GUI message box
         app = QApplication.instance()
         if app is None:
             app = QApplication([]) # Temporary app instance
             
         QMessageBox.critical(None, "Unsupported Python Version", error_message)
-    except ImportError:
-        # PyQt6 not available yet or import failed, console message is the fallback.
-        pass 
     except RuntimeError:
         # This can happen if QApplication is created but then we try to create another
         # or if some other Qt issue occurs this early.
@@ -78,37 +79,46 @@ class MainWindow(QWidget):
         self.server_status_timer = None
         self.app_version = "1.0.0"  # Define the app version here
         self.api_key_validated = False  # Add this line to track API key validation status
+        self.background_tasks = BackgroundTasks(self)  # Network checks run here, off the GUI thread
         
         # Initialize hotkeys before initUI
         self.villager_hotkey = "1"  # Default hotkey
         self.castle_hotkey = "2"  # Default castle hotkey
         
-        self.initUI()
-        self.setup_message_update()
-        self.setup_server_status_check()
-        self.color_flash_windows = []
-        initialize_root()  # Initialize the Tkinter root window
+        with startup_profile.phase("initUI"):
+            self.initUI()
+        with startup_profile.phase("background checks"):
+            self.setup_message_update()
+            self.setup_server_status_check()
+        with startup_profile.phase("AlertOverlay"):
+            self.alert_overlay = AlertOverlay()  # Reused by every color flash alert
         
         # Load user info at startup (without showing popups)
-        self.load_user_info(show_popups=False)
-        
-        # Create user session when the app starts, but use loaded data
-        api_client.create_user_session(
-            self.your_username_input.text(),
-            self.teammates_usernames_input.text(),
-            self.app_version
-        )
+        with startup_profile.phase("load_user_info"):
+            self.load_user_info(show_popups=False)
 
         # Disable Start and Stop buttons initially
         self.start_button.setEnabled(False)
         self.stop_button.setEnabled(False)
 
-        # Play welcome audio
-        AudioManager.play_audio('audio/warnings/welcome.mp3', volume=0.5)
-
         # Check Ollama status after UI is initialized and user info loaded
         self.check_ollama_status()
 
+    def finish_startup(self):
+        """Startup work the window doesn't need to appear; runs once it is shown"""
+        # Create user session when the app starts, but use loaded data
+        username, teammates = self.your_username_input.text(), self.teammates_usernames_input.text()
+        self.background_tasks.submit(
+            "user_session", lambda: api_client.create_user_session(username, teammates, self.app_version), None)
+
+        # Play welcome audio; importing pygame and starting the mixer happen on the worker too
+        self.background_tasks.submit("welcome_audio", play_welcome_audio, None)
+
+        # Load the capture and analysis stack now rather than on the first hotkey press, off the GUI thread
+        self.background_tasks.submit("game_actions", load_game_actions, None)
+        # Index the counter data, render its HTML and compile the unit counter graph off the GUI thread
+        self.background_tasks.submit("counter_data", load_counter_data, None)
+
     def initUI(self):
         """Initialize the user interface"""
         layout = QVBoxLayout()
@@ -251,21 +261,24 @@ class MainWindow(QWidget):
         self.message_timer.start(300000)  # Update every 5 minutes
 
     def update_message(self):
-        """Update the message area with news or updates from the website"""
-        try:
-            url = "https://wolologpt.com/in-program-messagebox.html"
-            response = requests.get(url)
-            response.raise_for_status()  # Raise an exception for bad responses
-            
-            html_content = response.text
-            
-            # Update the QTextBrowser with the fetched HTML content
-            self.message_area.setHtml(html_content)
-            
-            logger.info("Message updated successfully from the website")
-        except requests.RequestException as e:
-            logger.error(f"Failed to fetch message from the website: {str(e)}")
-            self.message_area.setHtml("<p>Failed to load latest news. Dang!</p>")
+        """Fetch news or updates from the website in the background"""
+        self.background_tasks.submit("update_message", self.fetch_message, self.show_message, self.show_message_error)
+
+    @staticmethod
+    def fetch_message():
+        import requests
+        response = requests.get(NEWS_MESSAGE_URL, timeout=API_REQUEST_TIMEOUT)
+        response.raise_for_status()  # Raise an exception for bad responses
+        return response.text
+
+    def show_message(self, html_content):
+        # Update the QTextBrowser with the fetched HTML content
+        self.message_area.setHtml(html_content)
+        logger.info("Message updated successfully from the website")
+
+    def show_message_error(self, error):
+        logger.error(f"Failed to fetch message from the website: {str(error)}")
+        self.message_area.setHtml("<p>Failed to load latest news. Dang!</p>")
 
     def start_resource_alerts(self):
         """Start the resource alerts thread and activity check timer"""
@@ -274,6 +287,7 @@ class MainWindow(QWidget):
             return
 
         if self.resource_alerts_thread is None or not self.resource_alerts_thread.isRunning():
+            from resource_alerts_thread import ResourceAlertsThread
             self.resource_alerts_thread = ResourceAlertsThread(API_KEYS["GOOGLE"])
             self.resource_alerts_thread.color_flash_signal.connect(self.show_color_flash)
             logger.debug("Color flash signal connected")
@@ -336,15 +350,16 @@ class MainWindow(QWidget):
     def toggle_villager_creation(self, state):
         """Toggle the villager creation feature"""
         if state == Qt.CheckState.Checked.value:
-            GameActions.enable_villager_creation()
+            load_game_actions().enable_villager_creation()
             api_client.create_action("enable_villager_creation", "User enabled auto villager creation")
         else:
-            GameActions.disable_villager_creation()
+            load_game_actions().disable_villager_creation()
             api_client.create_action("disable_villager_creation", "User disabled auto villager creation")
         self.setup_hotkeys()
 
     def toggle_civ_counters_hotkey(self, state):
         """Toggle the civilization counters hotkey"""
+        import keyboard
         if state == Qt.CheckState.Checked.value:
             try:
                 keyboard.add_hotkey('ctrl+.', self.show_civ_counters)
@@ -362,7 +377,7 @@ class MainWindow(QWidget):
 
     def show_civ_counters(self):
         logger.info("Civ counters hotkey pressed")
-        GameActions.show_civs_counters(
+        load_game_actions().show_civs_counters(
             self.your_username_input.text(),
             self.teammates_usernames_input.text()
         )
@@ -370,20 +385,21 @@ class MainWindow(QWidget):
     def setup_hotkeys(self):
         """Set up the application hotkeys"""
         try:
+            import keyboard
             # Remove all existing hotkeys
             keyboard.unhook_all()
             
             # Set up the villager creation hotkey
             if self.villager_checkbox.isChecked():
-                keyboard.add_hotkey(self.villager_hotkey, GameActions.select_all_tcs_create_one_villager)
+                keyboard.add_hotkey(self.villager_hotkey, lambda: load_game_actions().select_all_tcs_create_one_villager())
             
             # Set up the castle unit creation hotkey
             if self.castle_checkbox.isChecked():
-                keyboard.add_hotkey(self.castle_hotkey, GameActions.select_all_castles_create_unique_unit)
+                keyboard.add_hotkey(self.castle_hotkey, lambda: load_game_actions().select_all_castles_create_unique_unit())
             
             # Set up the civ counters hotkey
             if self.civ_counters_checkbox.isChecked():
-                keyboard.add_hotkey('ctrl+.', lambda: GameActions.show_civs_counters(
+                keyboard.add_hotkey('ctrl+.', lambda: load_game_actions().show_civs_counters(
                     self.your_username_input.text(),
                     self.teammates_usernames_input.text()
                 ))
@@ -441,6 +457,7 @@ class MainWindow(QWidget):
 
     def verify_and_update_api_key(self, api_key):
         """Verify the API key and update its status"""
+        from ai_analysis import AIAnalysis
         is_valid, message = AIAnalysis.test_google_api_key(api_key)
         if is_valid:
             set_api_key(api_key)
@@ -505,8 +522,7 @@ class MainWindow(QWidget):
     def show_color_flash(self, color, duration, location, size, opacity, text):
         """Show color flash alert"""
         logger.debug(f"show_color_flash called with: {color}, {duration}, {location}, {size}, {opacity}, {text}")
-        flash_window = color_flash(color, duration, location, size, opacity, text)
-        self.color_flash_windows.append(flash_window)
+        self.alert_overlay.show_flash(color, duration, location, size, opacity, text)
 
     def create_server_status_layout(self):
         """Create the server status indicator layout"""
@@ -529,8 +545,11 @@ class MainWindow(QWidget):
         self.server_status_timer.start(60000)  # Check every minute
 
     def check_server_status(self):
-        """Check the API server status and update the indicator"""
-        is_live = api_client.check_server_status()
+        """Check the API server status in the background"""
+        self.background_tasks.submit("server_status", api_client.check_server_status, self.show_server_status)
+
+    def show_server_status(self, is_live):
+        """Update the server indicator"""
         if is_live:
             self.server_status_indicator.setStyleSheet("background-color: #90EE90; border-radius: 8px;")
             self.server_status_indicator.setToolTip("API Server is live")
@@ -543,10 +562,12 @@ class MainWindow(QWidget):
         self.stop_activity_check_timer()
         if self.server_status_timer:
             self.server_status_timer.stop()
-        for window in self.color_flash_windows:
-            if window.winfo_exists():
-                window.destroy()
+        self.alert_overlay.clear()
+        self.alert_overlay.close()
+        self.background_tasks.wait(timeout=1)
         api_client.create_action("close_application", "User closed the application")
+        # Deliver queued telemetry before the process exits, without holding the window open for long
+        api_client.flush(timeout=TELEMETRY_CLOSE_FLUSH_TIMEOUT)
         event.accept()
 
     def save_your_username(self):
@@ -669,7 +690,16 @@ class MainWindow(QWidget):
         return ollama_status_layout
 
     def check_ollama_status(self):
-       success, message = AIAnalysis.test_ollama_connection()
+       """Check in the background that Ollama is running and has the model, then warm the model up"""
+       def test_ollama_connection():
+           from ai_analysis import AIAnalysis  # Imported by the worker, not the GUI thread
+           return AIAnalysis.test_ollama_connection()
+
+       self.ollama_status_message_label.setText("Checking...")
+       self.background_tasks.submit("ollama_status", test_ollama_connection, self.show_ollama_status)
+
+    def show_ollama_status(self, status):
+       success, message = status
 
        if success:
            self.ollama_status_indicator.setStyleSheet("background-color: #90EE90; border-radius: 8px;")
@@ -678,6 +708,8 @@ class MainWindow(QWidget):
            short_message = message.split('.')[0] if '.' in message else message
            self.ollama_status_message_label.setText(short_message)
            self.ollama_status_message_label.setToolTip(message) # Full message on hover
+           if AI_CONFIG["ollama"].get("warm_up_on_start", True):
+               self.warm_up_model()
        else:
            self.ollama_status_indicator.setStyleSheet("background-color: #FFB6C1; border-radius: 8px;")
            self.ollama_status_indicator.setToolTip("Ollama Connection Error")
@@ -688,16 +720,52 @@ class MainWindow(QWidget):
            QMessageBox.warning(self, "Ollama Connection Error", message)
        self.update_start_button_text()
 
+    def warm_up_model(self):
+       """Load the image model in the background so the first resource check or civ lookup isn't a cold start"""
+       def warm_up():
+           from ai_analysis import AIAnalysis
+           return AIAnalysis.warm_up_model()
+
+       if self.background_tasks.submit("model_warmup", warm_up, self.show_model_readiness):
+           self.ollama_status_message_label.setText("Loading model...")
+
+    def show_model_readiness(self, status):
+       """Show whether the warm-up loaded the model and how long it took"""
+       success, message, seconds = status
+       if success:
+           self.ollama_status_message_label.setText(f"Model ready (loaded in {seconds:.1f}s)")
+       else:
+           # Ollama is up, but the first analysis will have to load the model itself
+           self.ollama_status_indicator.setStyleSheet("background-color: #FFD580; border-radius: 8px;")
+           self.ollama_status_message_label.setText("Model not loaded")
+       self.ollama_status_message_label.setToolTip(message)
+
     def toggle_castle_unit_creation(self, state):
         """Toggle the castle unit creation feature"""
         if state == Qt.CheckState.Checked.value:
-            GameActions.enable_castle_unit_creation()
+            load_game_actions().enable_castle_unit_creation()
             api_client.create_action("enable_castle_unit_creation", "User enabled auto castle unit creation")
         else:
-            GameActions.disable_castle_unit_creation()
+            load_game_actions().disable_castle_unit_creation()
             api_client.create_action("disable_castle_unit_creation", "User disabled auto castle unit creation")
         self.setup_hotkeys()
 
+def load_game_actions():
+    """GameActions brings in the capture and analysis stack, so it is imported on first use"""
+    from game_actions import GameActions
+    return GameActions
+
+def play_welcome_audio():
+    from audio_manager import AudioManager
+    AudioManager.play_audio('audio/warnings/welcome.mp3', volume=0.5)
+
+def load_counter_data():
+    """Preloaded after startup so the first counter popup doesn't parse the counter files"""
+    from counter_index import counter_index
+    from counter_graph import counter_graph
+    counter_index.load()
+    counter_graph.load()
+
 def is_admin():
     try:
         return ctypes.windll.shell32.IsUserAnAdmin()
@@ -735,6 +803,8 @@ def main():
     """Main function to run the application"""
     # Set the exception hook
     sys.excepthook = exception_hook
+    setup_logging()
+    check_python_version()
 
     if getattr(sys, 'frozen', False):
         # Running as compiled executable
@@ -744,8 +814,11 @@ def main():
             run_as_admin()
             sys.exit()
     
-    app = QApplication([])
-    window = MainWindow()
+    with startup_profile.phase("QApplication"):
+        app = QApplication([])
+        get_popup_manager()  # Owned by the GUI thread
+    with startup_profile.phase("MainWindow"):
+        window = MainWindow()
     
     # Set the application icon
     icon_path = resource_path("images/logo.jpg")
@@ -756,12 +829,21 @@ def main():
         logger.error(f"Failed to load window icon from: {icon_path}")
     window.show()
 
-    # Create a timer to process color flashes
-    timer = QTimer()
-    timer.timeout.connect(process_color_flashes)
-    timer.start(100)  # Process every 100ms
+    # Zero-delay timers run in order once the event loop has shown the window; the window
+    # only counts as shown once finish_startup's GUI thread work is done and it can respond
+    QTimer.singleShot(0, window.finish_startup)
+    QTimer.singleShot(0, startup_profile.mark_shown)
+    if startup_profile.enabled:
+        QTimer.singleShot(0, lambda: report_startup_profile(app))
 
     sys.exit(app.exec())
 
+def report_startup_profile(app):
+    """Print the --startup-profile report and quit; the exit code is 1 if startup was over budget"""
+    report = startup_profile.report(STARTUP_BUDGET)
+    print(report)
+    logger.info(f"Startup profile:\n{report}")
+    app.exit(0 if startup_profile.shown_at <= STARTUP_BUDGET else 1)
+
 if __name__ == '__main__':
     main()
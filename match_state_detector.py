@@ -0,0 +1,178 @@
+import json
+import numpy as np
+from PIL import Image
+from config import HUD_SIGNATURE_PATH, MATCH_DETECTION_MIN_SCORE, MATCH_DETECTION_PIXEL_TOLERANCE
+from utils import logger
+
+# The signature covers the resource bar up to the age emblem (840 px at the 54 px reference
+# height); further right the bar holds the game time and, at some resolutions, the map.
+REFERENCE_WIDTH = 840
+REFERENCE_HEIGHT = 54
+
+class MatchStateDetector:
+    """
+    Tells whether a resource bar capture shows the HUD of a live match.
+
+    Menus, lobbies and loading screens cover the top of the screen with something
+    else, so sending those captures to the model only yields the prompt's
+    "all zeros" answer. The in-match bar has a fixed layout: resource icons,
+    panel borders and backgrounds that look the same in every match. The
+    signature stores the mean colour of those stable cells on a coarse grid;
+    cells that change during a match (digits, age emblem, age name) are null
+    and ignored. A capture scores the fraction of stable cells within
+    `pixel_tolerance` of the signature. In a match that costs one resize of
+    the capture; outside one a few bar heights are tried before giving up.
+    """
+
+    def __init__(self, signature_path=HUD_SIGNATURE_PATH, min_score=MATCH_DETECTION_MIN_SCORE,
+                 pixel_tolerance=MATCH_DETECTION_PIXEL_TOLERANCE):
+        self.min_score = min_score
+        self.pixel_tolerance = pixel_tolerance
+        self.cells, self.signature, self.mask = self.load_signature(signature_path)
+        self.in_match = None   # Unknown until the first probe
+        self.probes = 0        # Captures classified
+        self.skipped = 0       # Captures not analysed because no match was visible
+        self.transitions = 0
+
+    @staticmethod
+    def load_signature(path):
+        """
+        Load the HUD signature.
+
+        Returns:
+            tuple: ((columns, rows), mean colours of shape (rows, columns, 3), boolean mask of stable cells)
+        """
+        with open(path, 'r') as f:
+            data = json.load(f)
+        columns, rows = data["cells"]
+        mask = np.array([[cell is not None for cell in row] for row in data["signature"]])
+        signature = np.array([[cell if cell is not None else (0, 0, 0) for cell in row] for row in data["signature"]],
+                             dtype=np.float32)
+        if signature.shape != (rows, columns, 3) or not mask.any():
+            raise ValueError(f"HUD signature in {path} does not match its {columns}x{rows} grid")
+        return (columns, rows), signature, mask
+
+    def cell_colors(self, frame, bar_height=None):
+        """
+        Mean RGB per signature cell of a capture (CapturedFrame or PIL image).
+
+        Args:
+            bar_height: Height of the resource bar in the capture; defaults to the capture height
+        """
+        image = getattr(frame, "image", frame)
+        bar_height = bar_height or image.height
+        width = min(image.width, round(REFERENCE_WIDTH * bar_height / REFERENCE_HEIGHT))
+        image = image.crop((0, 0, width, bar_height))
+        return np.asarray(image.convert("RGB").resize(self.cells, Image.BOX), dtype=np.float32)
+
+    def candidate_bar_heights(self, capture_height):
+        """
+        Bar heights to try, most likely first.
+
+        The capture is 5% of the screen height, but the bar follows the in-game UI
+        scale, so it can be shorter than the capture (e.g. a 54 px bar in a 69 px capture).
+        """
+        heights = [capture_height]
+        if REFERENCE_HEIGHT < capture_height:
+            heights.append(REFERENCE_HEIGHT)
+        step = max(1, capture_height // 30)
+        heights.extend(h for h in range(capture_height - step, int(capture_height * 0.6), -step) if h not in heights)
+        return heights
+
+    def score_at(self, frame, bar_height=None):
+        """Fraction of the stable HUD cells that look like the in-match resource bar"""
+        distance = np.abs(self.cell_colors(frame, bar_height) - self.signature).max(axis=-1)
+        return float(((distance < self.pixel_tolerance) & self.mask).sum() / self.mask.sum())
+
+    def score(self, frame):
+        """Best HUD score over the candidate bar heights, stopping at the first match"""
+        image = getattr(frame, "image", frame)
+        best = 0.0
+        for bar_height in self.candidate_bar_heights(image.height):
+            best = max(best, self.score_at(image, bar_height))
+            if best >= self.min_score:
+                break
+        return best
+
+    def is_in_match(self, frame):
+        """
+        Classify a capture and update the counters.
+
+        Returns:
+            bool: True if the frame shows a live match and should be analysed
+        """
+        score = self.score(frame)
+        in_match = score >= self.min_score
+        self.probes += 1
+        if not in_match:
+            self.skipped += 1
+        if in_match != self.in_match:
+            if self.in_match is not None:
+                self.transitions += 1
+            logger.info(f"{'Match HUD detected' if in_match else 'No match HUD visible'} (score {score:.2f})")
+            self.in_match = in_match
+        return in_match
+
+    def get_stats(self):
+        return {
+            "probes": self.probes,
+            "skipped": self.skipped,
+            "transitions": self.transitions,
+            "in_match": self.in_match,
+        }
+
+    @staticmethod
+    def build_signature(images, cells=(84, 9), max_deviation=10):
+        """
+        Build a signature from in-match captures.
+
+        Cells whose colour varies by `max_deviation` or more across the captures
+        are treated as live content and stored as null.
+
+        Returns:
+            dict: The JSON document stored at HUD_SIGNATURE_PATH
+        """
+        detector = MatchStateDetector.__new__(MatchStateDetector)
+        detector.cells = cells
+        colors = np.stack([detector.cell_colors(image) for image in images])
+        mean, deviation = colors.mean(axis=0), colors.std(axis=0).max(axis=-1)
+        signature = [[[int(round(channel)) for channel in mean[row, column]] if deviation[row, column] < max_deviation else None
+                      for column in range(cells[0])] for row in range(cells[1])]
+        return {
+            "reference_width": REFERENCE_WIDTH,
+            "reference_height": REFERENCE_HEIGHT,
+            "cells": list(cells),
+            "signature": signature,
+        }
+
+if __name__ == "__main__":
+    import sys
+    import glob
+
+    # Score captures: python match_state_detector.py [image or directory ...]
+    # Rebuild the signature from in-match captures: python match_state_detector.py --build [image or directory ...]
+    args = sys.argv[1:]
+    build = "--build" in args
+    paths = []
+    for arg in [a for a in args if a != "--build"] or ["images/test_resource.jpg"]:
+        paths.extend(sorted(glob.glob(f"{arg}/*.jpg")) if not arg.lower().endswith((".jpg", ".png")) else [arg])
+
+    if build:
+        from resource_ocr import ResourceOCR
+        # Frames the digit OCR reads confidently are known to show the match HUD
+        ocr = ResourceOCR()
+        images = [Image.open(path).convert("RGB") for path in paths]
+        images = [image for image in images if ocr.read(image).confidence >= ocr.min_confidence]
+        document = MatchStateDetector.build_signature(images)
+        rows = ",\n".join(f"    {json.dumps(row)}" for row in document.pop("signature"))
+        header = "".join(f'  "{key}": {json.dumps(value)},\n' for key, value in document.items())
+        with open(HUD_SIGNATURE_PATH, 'w') as f:
+            # One grid row per line, like the glyph templates
+            f.write(f'{{\n{header}  "signature": [\n{rows}\n  ]\n}}\n')
+        print(f"Signature built from {len(images)} of {len(paths)} captures")
+    else:
+        detector = MatchStateDetector()
+        for path in paths:
+            with Image.open(path) as image:
+                score = detector.score(image)
+            print(f"{path}: {score:.2f} {'match' if score >= detector.min_score else 'no match'}")
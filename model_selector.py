@@ -0,0 +1,393 @@
+import os
+import json
+import time
+import platform
+import threading
+import statistics
+from config import (AI_CONFIG, USE_MODEL_SELECTION, MODEL_PROFILE_PATH, MODEL_BENCHMARK_RUNS, MODEL_ACCURACY_FLOOR,
+                    MODEL_LOAD_CHECK_INTERVAL, MODEL_LOAD_CHANGE_PERCENT, MODEL_REBENCHMARK_MIN_INTERVAL,
+                    MODEL_LOAD_OLLAMA_QUIET_TIME, RESOURCE_BENCHMARK_IMAGE_PATH, CIV_BENCHMARK_IMAGE_PATH)
+from analysis_models import (ResourceReading, CivAnalysis, RESOURCE_READING_SCHEMA, CIV_ANALYSIS_SCHEMA,
+                             parse_model_output)
+from ollama_client import ollama_client
+from utils import logger
+
+TASKS = ("resource", "civ")
+
+# Families of the vision projectors Ollama reports for multimodal models
+VISION_FAMILIES = {"clip", "mllama", "siglip"}
+# Used when the server is too old to report capabilities or families
+VISION_NAME_HINTS = ("gemma3", "llava", "vision", "bakllava", "moondream", "minicpm-v", "qwen2.5vl", "qwen-vl",
+                     "llama4", "mistral-small3", "granite3.2-vision")
+
+def ollama_processes():
+    """The local Ollama server and its model runner processes"""
+    import psutil
+    processes = []
+    for process in psutil.process_iter(["name"]):
+        if (process.info["name"] or "").lower().startswith("ollama"):
+            processes.append(process)
+    return processes
+
+def current_load():
+    """
+    CPU, RAM and GPU utilisation in percent, not counting the Ollama server's own use.
+
+    GPU load can't be split per process, so it is None while Ollama is (or just
+    was) answering, and without an NVIDIA GPU.
+    """
+    import psutil
+    from ai_analysis import AIAnalysis
+    processes = ollama_processes()
+    for process in processes:
+        process.cpu_percent(None)  # Starts the per-process sample
+    # Samples the system CPU over a short interval, which the per-process samples share
+    resources = AIAnalysis.get_system_resource_info()
+    ollama_cpu = ollama_ram = 0.0
+    for process in processes:
+        try:
+            ollama_cpu += process.cpu_percent(None) / (psutil.cpu_count() or 1)
+            ollama_ram += process.memory_percent()
+        except psutil.Error:
+            continue
+    cpu, ram = resources.get("cpu_percent"), resources.get("ram_percent")
+    gpu = (resources.get("gpu_info") or {}).get("load_percent")
+    return {
+        "cpu_percent": None if cpu is None else round(max(0.0, cpu - ollama_cpu), 1),
+        "ram_percent": None if ram is None else round(max(0.0, ram - ollama_ram), 1),
+        "gpu_percent": None if ollama_client.busy(MODEL_LOAD_OLLAMA_QUIET_TIME) else gpu,
+    }
+
+def machine_fingerprint():
+    """Identifies the hardware a profile was measured on; a profile from other hardware is ignored"""
+    from ai_analysis import AIAnalysis
+    resources = AIAnalysis.get_system_resource_info()
+    return {
+        "node": platform.node(),
+        "cpus": os.cpu_count(),
+        "ram_total_gb": resources.get("ram_total_gb"),
+        "gpu": (resources.get("gpu_info") or {}).get("name"),
+    }
+
+class ModelSelector:
+    """
+    Picks the Ollama model for each image task from benchmarks on this machine.
+
+    benchmark() runs every installed multimodal model on the bundled test
+    images, `runs` times per task, and records the median latency and the
+    share of answers that were correct: a resource answer must parse and agree
+    with the OCR reading of the same image (when the OCR is confident), a civ
+    answer must parse into civilizations the counter index resolves. The
+    profile is saved with the machine fingerprint and the load at benchmark
+    time, and each task gets the fastest model at or above `accuracy_floor`.
+
+    model_for() is called before every analysis and only reads the profile.
+    Now and then it (or the match probe, through set_match_visible()) hands a
+    check to a daemon thread, which benchmarks again when there is no profile
+    for this machine, the installed models changed or the load (without
+    Ollama's own use) has moved by more than `load_change` points since the
+    benchmark. Benchmarks load and unload models, so checks only start one
+    while the match probe sees no match; without the probe, benchmarks only
+    run on request ("Benchmark installed models" in python ai_analysis.py).
+    Until a profile exists AI_CONFIG's default image model is used.
+    """
+
+    def __init__(self, profile_path=MODEL_PROFILE_PATH, enabled=USE_MODEL_SELECTION, runs=MODEL_BENCHMARK_RUNS,
+                 accuracy_floor=MODEL_ACCURACY_FLOOR, check_interval=MODEL_LOAD_CHECK_INTERVAL,
+                 load_change=MODEL_LOAD_CHANGE_PERCENT, rebenchmark_interval=MODEL_REBENCHMARK_MIN_INTERVAL):
+        self.profile_path = profile_path
+        self.enabled = enabled
+        self.runs = runs
+        self.accuracy_floor = accuracy_floor
+        self.check_interval = check_interval
+        self.load_change = load_change
+        self.rebenchmark_interval = rebenchmark_interval
+        self._lock = threading.Lock()
+        self._profile = None
+        self._profile_loaded = False
+        self._last_check = None  # Monotonic time of the last load check
+        self._last_benchmark = None  # Monotonic time of the last benchmark in this run
+        self._checking = False
+        self.match_visible = None  # From the match probe; None while nothing is probing
+        self.stats = {"checks": 0, "benchmarks": 0}
+
+    def default_model(self):
+        return AI_CONFIG["default_models"]["image"]
+
+    def load_profile(self):
+        """The saved profile, or None when there is none or it was measured on other hardware"""
+        try:
+            with open(self.profile_path, "r") as f:
+                profile = json.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable model profile {self.profile_path}: {str(e)}")
+            return None
+        if profile.get("fingerprint") != machine_fingerprint():
+            logger.info("Model profile was measured on other hardware, ignoring it")
+            return None
+        return profile
+
+    def save_profile(self, profile):
+        os.makedirs(os.path.dirname(self.profile_path) or ".", exist_ok=True)
+        temporary = self.profile_path + ".tmp"
+        with open(temporary, "w") as f:
+            json.dump(profile, f, indent=2)
+        os.replace(temporary, self.profile_path)
+
+    def get_profile(self):
+        """The profile in use, loading the saved one on first use (probes the hardware, so not on the caller's thread)"""
+        with self._lock:
+            if not self._profile_loaded:
+                self._profile = self.load_profile()
+                self._profile_loaded = True
+            return self._profile
+
+    def model_for(self, task):
+        """
+        The model to use for a task ("resource" or "civ"); never blocks on a benchmark.
+
+        Returns:
+            str: The profiled choice, or AI_CONFIG's default image model
+        """
+        if not self.enabled:
+            return self.default_model()
+        self._schedule_check()
+        selected = (self._profile or {}).get("selected", {}).get(task)
+        return selected or self.default_model()
+
+    def set_match_visible(self, visible):
+        """
+        Called by the match probe; a benchmark can only start while no match is visible.
+
+        No check runs during a match, so leaving one runs the check right away.
+        """
+        left_match = bool(self.match_visible) and not visible
+        self.match_visible = visible
+        if not visible and self.enabled:
+            self._schedule_check(force=left_match)
+
+    def _schedule_check(self, force=False):
+        if self.match_visible:
+            # Measuring the load and asking Ollama about every model is what a match shouldn't pay for
+            return
+        with self._lock:
+            now = time.monotonic()
+            if self._checking or (not force and self._last_check is not None
+                                  and now - self._last_check < self.check_interval):
+                return
+            self._checking = True
+            self._last_check = now
+        threading.Thread(target=self._check, name="model-selector", daemon=True).start()
+
+    def _check(self):
+        try:
+            self.stats["checks"] += 1
+            reason = self.needs_benchmark(self.get_profile())
+            if reason is None:
+                return
+            if self.match_visible is not False:
+                logger.debug(f"Model benchmark due ({reason}), waiting until no match is visible")
+                return
+            if self._last_benchmark is not None and time.monotonic() - self._last_benchmark < self.rebenchmark_interval:
+                logger.debug(f"Model benchmark due ({reason}) but one ran recently")
+                return
+            logger.info(f"Benchmarking models: {reason}")
+            self.benchmark()
+        except Exception as e:
+            logger.error(f"Model selection check failed: {str(e)}")
+        finally:
+            with self._lock:
+                self._checking = False
+
+    def needs_benchmark(self, profile):
+        """
+        Returns:
+            str or None: Why the profile should be measured again, or None if it still holds
+        """
+        if profile is None:
+            return "no profile for this machine"
+        models = self.multimodal_models()
+        if models is not None and set(models) != set(profile.get("models", [])):
+            return "the installed models changed"
+        load, profiled = current_load(), profile.get("load", {})
+        for name, percent in load.items():
+            if percent is not None and profiled.get(name) is not None \
+                    and abs(percent - profiled[name]) > self.load_change:
+                return f"{name} moved from {profiled[name]:.0f}% to {percent:.0f}%"
+        return None
+
+    @staticmethod
+    def is_multimodal(model_name):
+        """Ask Ollama whether a model takes images, falling back to its name"""
+        try:
+            response = ollama_client.request("POST", "/api/show", json={"model": model_name}, timeout=10)
+            response.raise_for_status()
+            info = response.json()
+            if info.get("capabilities"):
+                return "vision" in info["capabilities"]
+            families = set((info.get("details") or {}).get("families") or [])
+            if families & VISION_FAMILIES or info.get("projector_info"):
+                return True
+        except Exception as e:
+            logger.debug(f"Could not query {model_name} details: {str(e)}")
+        return any(hint in model_name.lower() for hint in VISION_NAME_HINTS)
+
+    def multimodal_models(self):
+        """Installed models that take images, or None when Ollama isn't reachable"""
+        from ai_analysis import AIAnalysis
+        models = AIAnalysis.list_available_ollama_models()
+        if models is None:
+            return None
+        return [name for name, _ in models if self.is_multimodal(name)]
+
+    @staticmethod
+    def expected_resources():
+        """The OCR reading of the resource test image, or None if the OCR isn't sure of it"""
+        try:
+            from resource_ocr import ResourceOCR
+            reading, _ = ResourceOCR().read_resources(RESOURCE_BENCHMARK_IMAGE_PATH)
+            return reading
+        except Exception as e:
+            logger.warning(f"No OCR reference for the resource benchmark: {str(e)}")
+            return None
+
+    @staticmethod
+    def resource_answer_correct(answer, expected):
+        """The answer parses and, when there is an OCR reference, has the same numbers"""
+        try:
+            reading = parse_model_output(answer, ResourceReading)
+        except ValueError:
+            return False
+        if expected is None:
+            return True
+        not_read_by_ocr = {"current_age", "time"}
+        return reading.model_dump(exclude=not_read_by_ocr) == expected.model_dump(exclude=not_read_by_ocr)
+
+    @staticmethod
+    def civ_answer_correct(answer, resolve):
+        """The answer parses into at least one civilization, all of them known (resolve(name) is not None)"""
+        try:
+            civilizations = parse_model_output(answer, CivAnalysis).civilizations()
+        except ValueError:
+            return False
+        return bool(civilizations) and all(resolve(civ) is not None for civ in civilizations)
+
+    def benchmark_tasks(self):
+        """task -> (image path, prompt, response schema, answer check)"""
+        import config
+        from counter_index import counter_index
+        expected = self.expected_resources()
+        return {
+            "resource": (RESOURCE_BENCHMARK_IMAGE_PATH, config.RESOURCE_CHECK_PROMPT, RESOURCE_READING_SCHEMA,
+                         lambda answer: self.resource_answer_correct(answer, expected)),
+            "civ": (CIV_BENCHMARK_IMAGE_PATH, config.get_default_civ_counter_prompt("", ""), CIV_ANALYSIS_SCHEMA,
+                    lambda answer: self.civ_answer_correct(answer, counter_index.resolve)),
+        }
+
+    def measure(self, model_name, image, prompt, response_format, check):
+        """
+        Run one task `runs` times on a warmed-up model.
+
+        Returns:
+            dict: {"latency": median seconds, "accuracy": share of correct answers}
+        """
+        from ai_analysis import AIAnalysis
+        latencies, correct = [], 0
+        for _ in range(self.runs):
+            start = time.monotonic()
+            answer = AIAnalysis.analyze_image_ollama(image, prompt, model_name, response_format=response_format)
+            latencies.append(time.monotonic() - start)
+            correct += bool(check(answer))
+        return {"latency": round(statistics.median(latencies), 3), "accuracy": round(correct / self.runs, 3)}
+
+    def select(self, results):
+        """task -> fastest model at or above the accuracy floor (absent when none is)"""
+        selected = {}
+        for task, by_model in results.items():
+            accurate = [(result["latency"], model) for model, result in by_model.items()
+                        if result["accuracy"] >= self.accuracy_floor]
+            if accurate:
+                selected[task] = min(accurate)[1]
+        return selected
+
+    def benchmark(self, models=None, on_progress=None):
+        """
+        Measure the models on every task, save the profile and start using it.
+
+        Args:
+            models: Model names to measure; all installed multimodal models by default
+            on_progress: Optional callable(model, task, result) called after each measurement
+
+        Returns:
+            dict: The new profile, or None when Ollama isn't reachable, has no multimodal model
+            or a benchmark image is missing
+        """
+        from ai_analysis import AIAnalysis
+        self._last_benchmark = time.monotonic()
+        self.stats["benchmarks"] += 1
+        models = self.multimodal_models() if models is None else models
+        if not models:
+            logger.warning("No multimodal Ollama models to benchmark")
+            return None
+
+        tasks = self.benchmark_tasks()
+        missing = [image for image, _, _, _ in tasks.values() if not os.path.exists(image)]
+        if missing:
+            # Every answer would score 0 and the saved profile would select nothing
+            logger.error(f"Benchmark images not found, not benchmarking the models: {', '.join(missing)}")
+            return None
+
+        load = current_load()
+        results = {task: {} for task in tasks}
+        for model_name in models:
+            if self.match_visible:
+                logger.info("A match started, stopping the model benchmark")
+                self._last_benchmark = None  # Try again once the match is over
+                return None
+            success, message, _ = AIAnalysis.warm_up_model(model_name)
+            if not success:
+                logger.warning(f"Skipping {model_name} in the benchmark: {message}")
+                continue
+            for task, (image, prompt, response_format, check) in tasks.items():
+                result = self.measure(model_name, image, prompt, response_format, check)
+                results[task][model_name] = result
+                logger.info(f"Benchmark {model_name} on {task}: {result['latency']:.2f}s, "
+                            f"accuracy {result['accuracy']:.0%}")
+                if on_progress is not None:
+                    on_progress(model_name, task, result)
+
+        profile = {
+            "fingerprint": machine_fingerprint(),
+            "measured_at": time.time(),
+            "load": load,
+            "models": list(models),
+            "results": results,
+            "selected": self.select(results),
+        }
+        self.save_profile(profile)
+        with self._lock:
+            self._profile = profile
+            self._profile_loaded = True
+        logger.info(f"Selected models: {profile['selected'] or 'none above the accuracy floor'}")
+        self.unload_unused(profile)
+        return profile
+
+    @staticmethod
+    def unload_unused(profile):
+        """Free the memory of benchmarked models no task uses, so they don't compete with the game"""
+        in_use = set(profile["selected"].values()) or {AI_CONFIG["default_models"]["image"]}
+        for model_name in profile["models"]:
+            if model_name not in in_use:
+                try:
+                    ollama_client.generate({"model": model_name, "keep_alive": 0}, timeout=30)
+                    ollama_client.mark_model_ready(model_name, None)
+                except Exception as e:
+                    logger.debug(f"Could not unload {model_name}: {str(e)}")
+
+    def get_stats(self):
+        profile = self._profile or {}
+        return dict(self.stats, selected=dict(profile.get("selected", {})), measured_at=profile.get("measured_at"))
+
+model_selector = ModelSelector()
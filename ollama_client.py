@@ -0,0 +1,183 @@
+import time
+import json
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+from config import AI_CONFIG
+from utils import logger
+
+class OllamaClient:
+    """
+    Long-lived HTTP client for the local Ollama server.
+
+    A single pooled requests.Session is shared by every Ollama call so the TCP
+    connection is reused between resource checks. Requests carry a `keep_alive`
+    so the model stays resident between polls, and the server health is tracked
+    from the outcome of real calls instead of probing /api/tags before each one.
+    """
+
+    def __init__(self, base_url=None, keep_alive=None, pool_size=None, timeout=None):
+        settings = AI_CONFIG.get("ollama", {})
+        self.base_url = (base_url or settings.get("base_url", "http://localhost:11434")).rstrip("/")
+        self.keep_alive = keep_alive if keep_alive is not None else settings.get("keep_alive", "30m")
+        self.timeout = timeout or settings.get("timeout", 60)
+
+        pool_size = pool_size or settings.get("pool_size", 4)
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+        self._lock = threading.Lock()
+        self.healthy = None  # Unknown until the first call completes
+        self.last_error = None
+        self.last_success_time = None
+        self.last_failure_time = None
+        self.consecutive_failures = 0
+        self.ready_models = {}  # model name -> seconds its warm-up took
+        self._in_flight = 0  # Requests (and streams) still running
+        self._last_request_end = None  # Monotonic time the last request finished
+
+    def mark_model_ready(self, model_name, warmup_seconds):
+        """Record a warm-up; None means it failed and the model is not known to be loaded"""
+        with self._lock:
+            if warmup_seconds is None:
+                self.ready_models.pop(model_name, None)
+            else:
+                self.ready_models[model_name] = warmup_seconds
+
+    def is_model_ready(self, model_name):
+        with self._lock:
+            return model_name in self.ready_models
+
+    def _begin_request(self):
+        with self._lock:
+            self._in_flight += 1
+
+    def _end_request(self):
+        with self._lock:
+            self._in_flight -= 1
+            self._last_request_end = time.monotonic()
+
+    def busy(self, within=0):
+        """True while a request is running or one ended less than `within` seconds ago (its load may linger)"""
+        with self._lock:
+            if self._in_flight:
+                return True
+            return self._last_request_end is not None and time.monotonic() - self._last_request_end < within
+
+    def _record_success(self):
+        with self._lock:
+            if self.healthy is False:
+                logger.info("Ollama server is reachable again")
+            self.healthy = True
+            self.last_error = None
+            self.last_success_time = time.time()
+            self.consecutive_failures = 0
+
+    def _record_failure(self, error):
+        with self._lock:
+            if self.healthy is not False:
+                logger.warning(f"Ollama server marked unavailable: {error}")
+            self.healthy = False
+            # A restarted server has nothing loaded
+            self.ready_models.clear()
+            self.last_error = str(error)
+            self.last_failure_time = time.time()
+            self.consecutive_failures += 1
+
+    def request(self, method, path, timeout=None, **kwargs):
+        """
+        Send a request to the Ollama server and update the health state.
+
+        Connection errors and timeouts mark the server unhealthy and are re-raised.
+        Any HTTP response, including 4xx/5xx, means the server is up.
+        """
+        self._begin_request()
+        try:
+            response = self.session.request(method, f"{self.base_url}{path}", timeout=timeout or self.timeout, **kwargs)
+        except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+            self._record_failure(e)
+            raise
+        finally:
+            self._end_request()
+        self._record_success()
+        return response
+
+    def _with_keep_alive(self, payload):
+        if self.keep_alive is not None and "keep_alive" not in payload:
+            payload = dict(payload, keep_alive=self.keep_alive)
+        return payload
+
+    def post(self, path, payload, timeout=None):
+        """POST a JSON payload (with the configured keep_alive) and return the raw response"""
+        return self.request("POST", path, timeout=timeout, json=self._with_keep_alive(payload))
+
+    def generate(self, payload, timeout=None):
+        """POST to /api/generate and return the decoded JSON body"""
+        response = self.post("/api/generate", payload, timeout=timeout)
+        response.raise_for_status()
+        return response.json()
+
+    def chat(self, payload, timeout=None):
+        """POST to /api/chat and return the decoded JSON body"""
+        response = self.post("/api/chat", payload, timeout=timeout)
+        response.raise_for_status()
+        return response.json()
+
+    def stream(self, path, payload, timeout=None):
+        """
+        POST a streaming request and yield each decoded JSON chunk.
+
+        Closing the generator early (e.g. once all needed fields have arrived)
+        closes the HTTP response, which makes Ollama stop generating.
+
+        Raises:
+            requests.exceptions.HTTPError: If the server rejects the request
+            RuntimeError: If Ollama reports an error inside the stream
+        """
+        payload = dict(self._with_keep_alive(payload), stream=True)
+        # The model keeps generating after request() returns, until the stream is closed
+        self._begin_request()
+        try:
+            response = self.request("POST", path, timeout=timeout, json=payload, stream=True)
+        except Exception:
+            self._end_request()
+            raise
+        try:
+            response.raise_for_status()
+            for line in response.iter_lines():
+                if not line:
+                    continue
+                chunk = json.loads(line)
+                if "error" in chunk:
+                    raise RuntimeError(f"Ollama stream error: {chunk['error']}")
+                yield chunk
+                if chunk.get("done"):
+                    break
+        finally:
+            response.close()
+            self._end_request()
+
+    def list_models(self, timeout=10):
+        """Return the raw model entries from /api/tags"""
+        response = self.request("GET", "/api/tags", timeout=timeout)
+        response.raise_for_status()
+        return response.json().get("models", [])
+
+    def get_health(self):
+        """Snapshot of the health state tracked from real calls"""
+        with self._lock:
+            return {
+                "healthy": self.healthy,
+                "last_error": self.last_error,
+                "last_success_time": self.last_success_time,
+                "last_failure_time": self.last_failure_time,
+                "consecutive_failures": self.consecutive_failures,
+                "ready_models": dict(self.ready_models),
+            }
+
+    def close(self):
+        self.session.close()
+
+ollama_client = OllamaClient()
@@ -0,0 +1,122 @@
+import time
+import threading
+from collections import deque
+from config import (RESOURCE_CHECK_INTERVAL, RESOURCE_CHECK_MIN_INTERVAL, RESOURCE_CHECK_MAX_INTERVAL,
+                    RESOURCE_CHECK_BACKOFF, RESOURCE_CHECK_FIXED_RATE)
+from utils import logger
+
+class AdaptivePollingScheduler:
+    """
+    Decides when the next resource check runs.
+
+    Instead of sleeping a fixed interval after every check, the interval adapts
+    to the game state: it drops to `min_interval` while a value is close to an
+    alert threshold, returns to `base_interval` when the bar is changing
+    normally, and backs off by `backoff` per cycle (up to `max_interval`) while
+    the bar is not changing at all, e.g. when the game is paused.
+
+    In fixed-rate mode the time spent capturing, analysing and alerting is
+    subtracted from the wait, so checks start every `interval` seconds rather
+    than `interval` seconds after the previous one finished. The wait can be
+    interrupted with cancel() so stopping the thread doesn't block for a full
+    interval.
+    """
+
+    def __init__(self, base_interval=RESOURCE_CHECK_INTERVAL, min_interval=RESOURCE_CHECK_MIN_INTERVAL,
+                 max_interval=RESOURCE_CHECK_MAX_INTERVAL, backoff=RESOURCE_CHECK_BACKOFF,
+                 fixed_rate=RESOURCE_CHECK_FIXED_RATE, history_size=50):
+        if not 0 < min_interval <= base_interval <= max_interval:
+            raise ValueError(f"Polling bounds must satisfy 0 < min <= base <= max, got "
+                             f"{min_interval}, {base_interval}, {max_interval}")
+        self.base_interval = base_interval
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.backoff = backoff
+        self.fixed_rate = fixed_rate
+        self.interval = base_interval
+        self._cancelled = threading.Event()
+        self._cycle_start = None
+        self._last_start = None
+        self._periods = deque(maxlen=history_size)
+        self._work_times = deque(maxlen=history_size)
+
+    def start_cycle(self):
+        """Mark the start of a check; the gap to the previous start is the actual period"""
+        now = time.monotonic()
+        if self._last_start is not None:
+            self._periods.append(now - self._last_start)
+        self._last_start = now
+        self._cycle_start = now
+
+    def update(self, near_threshold=False, changed=True):
+        """
+        Pick the interval before the next check.
+
+        Args:
+            near_threshold (bool): A value is close to firing an alert
+            changed (bool): The resource bar changed since the last analysed frame
+
+        Returns:
+            float: The new interval in seconds
+        """
+        if near_threshold:
+            interval = self.min_interval
+        elif not changed:
+            interval = self.interval * self.backoff
+        else:
+            interval = self.base_interval
+        interval = min(self.max_interval, max(self.min_interval, interval))
+        if interval != self.interval:
+            logger.debug(f"Resource check interval {self.interval:.1f}s -> {interval:.1f}s "
+                         f"(near_threshold={near_threshold}, changed={changed})")
+        self.interval = interval
+        return interval
+
+    def wait(self, interval=None):
+        """
+        Sleep until the next check is due.
+
+        Args:
+            interval (float): Override the adaptive interval for this wait only,
+                e.g. the probe interval while no match is visible
+
+        Returns:
+            bool: False if the wait was cancelled
+        """
+        interval = self.interval if interval is None else interval
+        delay = interval
+        if self.fixed_rate and self._cycle_start is not None:
+            work_time = time.monotonic() - self._cycle_start
+            self._work_times.append(work_time)
+            delay = max(0.0, interval - work_time)
+        return not self._cancelled.wait(delay)
+
+    def cancel(self):
+        """Interrupt the current wait (and any later one until restart())"""
+        self._cancelled.set()
+
+    def reset(self):
+        """Go back to the base interval, e.g. when a match ends, keeping stats and cancellation"""
+        self.interval = self.base_interval
+
+    def restart(self):
+        """Start over at the base interval with fresh stats, e.g. when the thread is started again"""
+        self._cancelled.clear()
+        self.reset()
+        self._cycle_start = None
+        self._last_start = None
+        self._periods.clear()
+        self._work_times.clear()
+
+    def get_stats(self):
+        periods = list(self._periods)
+        work_times = list(self._work_times)
+        return {
+            "interval": round(self.interval, 2),
+            "fixed_rate": self.fixed_rate,
+            "cycles": len(periods),
+            "mean_period": round(sum(periods) / len(periods), 2) if periods else None,
+            "min_period": round(min(periods), 2) if periods else None,
+            "max_period": round(max(periods), 2) if periods else None,
+            "mean_work_time": round(sum(work_times) / len(work_times), 3) if work_times else None,
+        }
@@ -2,13 +2,35 @@ from PyQt6.QtCore import QThread, pyqtSignal, QObject
 from screenshot_manager import ScreenshotManager
 from ai_analysis import AIAnalysis
 from audio_manager import AudioManager
-from config import RESOURCE_CHECK_PROMPT, RESOURCE_CHECK_INTERVAL, VILLAGER_WARNING_INTERVAL
+from frame_change_detector import FrameChangeDetector
+from resource_ocr import ResourceOCR
+from polling_scheduler import AdaptivePollingScheduler
+from alert_dispatcher import Alert, AlertDispatcher
+from match_state_detector import MatchStateDetector
+from analysis_models import ResourceReading, RESOURCE_READING_SCHEMA, parse_model_output
+import config
+from config import (AI_CONFIG, FLOATING_RESOURCE_REARM_RATIO, HOUSE_LIMIT_REARM_SLOTS,
+                    USE_RESOURCE_OCR, RESOURCE_OCR_MODEL_REFRESH_INTERVAL, RESOURCE_NEAR_THRESHOLD_RATIO,
+                    USE_MATCH_DETECTION, MATCH_PROBE_INTERVAL, PIPELINE_READINGS_QUEUE_SIZE, PIPELINE_POLL_INTERVAL,
+                    PIPELINE_STOP_TIMEOUT)
 from utils import logger
-import json
 import time
-from queue import Queue
-from color_flash import color_flash
+import threading
+from queue import Queue, Empty, Full
 from api_client import api_client
+from model_selector import model_selector
+
+# Top-level fields each check needs before it can run on a (partial) resource reading
+RESOURCE_CHECK_FIELDS = {
+    "check_house_limit": ("Units",),
+    "check_villager_count": ("Villagers", "Current_age"),
+    "check_floating_resources": ("Resources", "Current_age"),
+    "check_idle_villagers": ("Idle Villagers",),
+}
+
+# Floating resource cutoffs used by check_floating_resources
+FLOATING_STONE_THRESHOLD = 650
+FLOATING_RESOURCE_THRESHOLDS = {"Castle Age": 1000, "Imperial Age": 2000}
 
 class ResourceAlertsThread(QThread):
     alert_signal = pyqtSignal(str)
@@ -17,52 +39,292 @@ class ResourceAlertsThread(QThread):
     def __init__(self, api_key):
         super().__init__()
         self.running = False
-        self.audio_queue = Queue()
-        self.color_flash_queue = Queue()
-        self.last_villager_check_time = 0
+        # Stage queues: capture -> inference keeps only the latest frame, inference -> rules is bounded
+        self.frame_queue = Queue(maxsize=1)
+        self.readings_queue = Queue(maxsize=PIPELINE_READINGS_QUEUE_SIZE)
+        self.alerts = AlertDispatcher(self.deliver_alert)
+        self.stop_event = threading.Event()
+        self.cycle = 0            # Capture cycle the frame or reading belongs to
+        self.inference_cycle = 0  # Cycle of the frame being analysed, for streamed partial readings
+        self.rules_cycle = 0      # Cycle whose checks have fired, see fired_checks
+        self.dropped_frames = 0   # Frames replaced by a newer capture before inference took them
         self.api_key = api_key
         self.color_flash_enabled = True
         self.audio_alerts_enabled = True
         self.idle_villager_audio_enabled = True
+        self.frame_detector = FrameChangeDetector()
+        self.last_reading = None
+        self.stream_responses = AI_CONFIG["ollama"].get("stream_resource_checks", False)
+        self.fired_checks = set()
+        self.ocr = self._load_ocr() if USE_RESOURCE_OCR else None
+        self.last_model_reading_time = 0
+        self.ocr_readings = 0     # Frames read locally
+        self.model_readings = 0   # Frames sent to the vision model
+        self.scheduler = AdaptivePollingScheduler()
+        self.match_detector = self._load_match_detector() if USE_MATCH_DETECTION else None
+
+    @staticmethod
+    def _load_ocr():
+        try:
+            return ResourceOCR()
+        except (OSError, ValueError, KeyError) as e:
+            logger.error(f"Could not load the resource OCR templates, using the vision model only: {str(e)}")
+            return None
+
+    @staticmethod
+    def _load_match_detector():
+        try:
+            return MatchStateDetector()
+        except (OSError, ValueError, KeyError) as e:
+            logger.error(f"Could not load the match HUD signature, analysing every capture: {str(e)}")
+            return None
+
+    def match_visible(self, frame):
+        """
+        Check that the capture shows a live match before spending inference on it.
+
+        Leaving a match drops the last reading, reference frame and any frame still
+        waiting for inference, so the next match starts from a fresh model reading
+        instead of the old game's values.
+        """
+        if self.match_detector is None:
+            return True
+        was_in_match = self.match_detector.in_match
+        in_match = self.match_detector.is_in_match(frame)
+        model_selector.set_match_visible(in_match)
+        if not in_match and was_in_match:
+            self._drain(self.frame_queue)
+            self.alerts.reset()
+            self.frame_detector.reset()
+            self.last_reading = None
+            self.last_model_reading_time = 0
+            self.scheduler.reset()
+        return in_match
 
     def run(self):
-        """Main loop for resource alerts"""
-        while self.running:
-            screenshot_path = ScreenshotManager.take_resource_screenshot()
-            resources = AIAnalysis.analyze_image_gemini(screenshot_path, RESOURCE_CHECK_PROMPT, self.api_key)
-            
-            # Track the resource check
-            api_client.create_action("resource_check", "Resource check performed")
-            
-            if resources:
+        """
+        Capture stage of the resource alerts pipeline.
+
+        Inference and rule checks run on their own worker threads and hand results
+        on through queues, and alerts are played by the alert dispatcher's timer,
+        so a slow model answer or a burst of alerts never delays the next capture.
+        Between capture and inference only the latest frame is kept.
+        """
+        self.scheduler.restart()
+        self.stop_event.clear()
+        # Decode the alert sounds here rather than on the first alert (no-op once cached)
+        AudioManager.preload()
+        # Frames and readings left over from a previous start are stale
+        self._drain(self.frame_queue)
+        self._drain(self.readings_queue)
+        workers = [threading.Thread(target=stage, name=f"resource-alerts-{stage.__name__}", daemon=True)
+                   for stage in (self.inference_stage, self.rules_stage)]
+        for worker in workers:
+            worker.start()
+        try:
+            while self.running:
+                self.scheduler.start_cycle()
+                self.capture_stage()
+        finally:
+            self.stop_event.set()
+            self.alerts.reset()
+            for worker in workers:
+                worker.join(PIPELINE_STOP_TIMEOUT)
+                if worker.is_alive():
+                    logger.warning(f"{worker.name} still busy after stop, leaving it to finish in the background")
+
+    def capture_stage(self):
+        """Capture one frame, hand it to inference (or reuse the last reading) and wait for the next cycle"""
+        frame = ScreenshotManager.take_resource_screenshot()
+        if frame is None:
+            logger.error("Could not capture the resource bar, skipping this check")
+            self.scheduler.wait()
+            return
+
+        # Menus, lobbies and loading screens: idle with a cheap probe until a match starts
+        if not self.match_visible(frame):
+            self.scheduler.wait(MATCH_PROBE_INTERVAL)
+            return
+
+        self.cycle += 1
+        # Read once: the inference thread replaces last_reading concurrently
+        last_reading = self.last_reading
+        # Skip inference when the resource bar is pixel-identical to the last analysed frame
+        if self.frame_detector.has_changed(frame):
+            self.offer_frame((self.cycle, frame, self.frame_detector.pending_signature))
+        elif last_reading is not None:
+            try:
+                self.readings_queue.put_nowait((self.cycle, last_reading, None, False))
+            except Full:
+                logger.debug("Rule checks are behind, not re-checking the unchanged frame")
+        self.scheduler.wait()
+
+    def offer_frame(self, item):
+        """Queue a frame for inference, replacing one that inference hasn't taken yet"""
+        while True:
+            try:
+                self.frame_queue.put_nowait(item)
+                return
+            except Full:
                 try:
-                    resources_json = json.loads(resources)
-                    self.check_house_limit(resources_json)
-                    self.check_villager_count(resources_json)
-                    self.check_floating_resources(resources_json)
-                    self.check_idle_villagers(resources_json)
-                    self.play_queued_warnings()
-                    logger.info(resources)
-                    
-                    # Track successful resource analysis
-                    #api_client.create_action("resource_analysis", f"Resource analysis completed: {resources}")
-                except json.JSONDecodeError as e:
-                    logger.error(f"Failed to parse AI analysis response as JSON. Response: '{resources}'. Error: {e}")
-                    # Track failed resource analysis
-                    api_client.create_action("resource_analysis_error", f"Failed to parse AI analysis response: {resources}")
-                    continue  # Continue to the next iteration of the loop
-            else:
+                    self.frame_queue.get_nowait()
+                    self.dropped_frames += 1
+                except Empty:
+                    pass
+
+    def inference_stage(self):
+        """Read queued frames (OCR or model) and pass the parsed readings to the rule checks"""
+        while not self.stop_event.is_set():
+            try:
+                cycle, frame, signature = self.frame_queue.get(timeout=PIPELINE_POLL_INTERVAL)
+            except Empty:
+                continue
+            self.inference_cycle = cycle
+            resources = self.read_resources(frame)
+            if not resources:
                 logger.error("Error with LLM provider or empty response")
                 # Track failed resource analysis
                 api_client.create_action("resource_analysis_error", "LLM provider returned empty response")
-            
-            time.sleep(RESOURCE_CHECK_INTERVAL)
+                continue
+            try:
+                reading = resources if isinstance(resources, ResourceReading) else parse_model_output(resources, ResourceReading)
+            except ValueError as e:
+                # Covers invalid JSON as well as answers that don't match the ResourceReading schema
+                logger.error(f"Failed to parse AI analysis response as JSON. Response: '{resources}'. Error: {e}")
+                # Ask the model again next time rather than carrying stale age/time into OCR readings
+                self.last_model_reading_time = 0
+                # Track failed resource analysis
+                api_client.create_action("resource_analysis_error", f"Failed to parse AI analysis response: {resources}")
+                continue
+            self.last_reading = reading
+            self.frame_detector.mark_analyzed(signature)
+            self.put_reading((cycle, reading, None, True))
+
+    def put_reading(self, item):
+        """Hand a reading to the rule checks, waiting while they are behind (but not past stop())"""
+        while not self.stop_event.is_set():
+            try:
+                self.readings_queue.put(item, timeout=PIPELINE_POLL_INTERVAL)
+                return True
+            except Full:
+                continue
+        return False
 
-    def check_house_limit(self, resources_json):
-        """Check if the player is approaching the house limit"""
-        total_active_units = int(resources_json["Units"]["number of total units"])
-        current_house_limit = int(resources_json["Units"]["Current House limit"])
+    def rules_stage(self):
+        """Run the alert checks on complete and streamed partial readings"""
+        while not self.stop_event.is_set():
+            try:
+                cycle, reading, available_fields, frame_changed = self.readings_queue.get(timeout=PIPELINE_POLL_INTERVAL)
+            except Empty:
+                continue
+            if cycle != self.rules_cycle:
+                self.rules_cycle = cycle
+                self.fired_checks = set()
+            # Checks that already fired on streamed partial results are skipped
+            self.run_checks(reading, available_fields=available_fields)
+            if available_fields is not None:
+                continue
+
+            logger.info(reading.model_dump_json(by_alias=True))
+            self.scheduler.update(near_threshold=self.near_alert_threshold(reading), changed=frame_changed)
+            # Track the resource check
+            api_client.create_action("resource_check", "Resource check performed" if frame_changed else "Resource check reused unchanged frame")
+
+    @staticmethod
+    def _drain(queue):
+        while True:
+            try:
+                queue.get_nowait()
+            except Empty:
+                return
+
+    def read_resources(self, frame):
+        """
+        Read the resource bar with the local OCR, falling back to the vision model.
+
+        The model is used when the OCR is not confident about every field, and at
+        least every RESOURCE_OCR_MODEL_REFRESH_INTERVAL seconds to refresh the age
+        and game time, which the OCR carries over from the last model reading.
+        """
+        model_reading_due = time.time() - self.last_model_reading_time >= RESOURCE_OCR_MODEL_REFRESH_INTERVAL
+        # Read once: the capture thread clears last_reading when a match ends
+        previous = self.last_reading
+        if self.ocr is not None and previous is not None and not model_reading_due:
+            reading, result = self.ocr.read_resources(frame, previous=previous)
+            if reading is not None:
+                self.ocr_readings += 1
+                return reading
+            logger.debug(f"OCR confidence {result.confidence:.2f} below threshold, asking the model")
+
+        self.model_readings += 1
+        self.last_model_reading_time = time.time()
+        return self.analyze_resources(frame)
+
+    def analyze_resources(self, frame):
+        """Send the resource frame to the model, streaming the answer when enabled"""
+        model_name = model_selector.model_for("resource")
+        if not self.stream_responses:
+            return AIAnalysis.analyze_image_ollama(frame, config.RESOURCE_CHECK_PROMPT, model_name,
+                                                   response_format=RESOURCE_READING_SCHEMA)
+
+        required_keys = {key for keys in RESOURCE_CHECK_FIELDS.values() for key in keys}
+        return AIAnalysis.analyze_image_ollama_stream(
+            frame, config.RESOURCE_CHECK_PROMPT, model_name,
+            on_field=self.on_resource_field, required_keys=required_keys,
+            response_format=RESOURCE_READING_SCHEMA
+        )
+
+    def on_resource_field(self, key, value, fields):
+        """Pass each streamed field on so the checks whose inputs are complete can run right away"""
+        try:
+            partial_reading = ResourceReading.model_validate(fields)
+        except ValueError as e:
+            logger.debug(f"Partial resource reading not usable yet: {e}")
+            return
+        self.put_reading((self.inference_cycle, partial_reading, frozenset(fields), True))
+
+    def run_checks(self, reading, available_fields=None):
+        """
+        Run every check that hasn't fired this cycle.
 
+        Args:
+            reading (ResourceReading): The (possibly partial) resource reading
+            available_fields: Keys received so far for a streamed reading; None means the reading is complete
+
+        Returns:
+            list: Names of the checks that ran
+        """
+        ran = []
+        for check_name, required_fields in RESOURCE_CHECK_FIELDS.items():
+            if check_name in self.fired_checks:
+                continue
+            if available_fields is not None and not all(field in available_fields for field in required_fields):
+                continue
+            self.fired_checks.add(check_name)
+            ran.append(check_name)
+            getattr(self, check_name)(reading)
+        return ran
+
+    def near_alert_threshold(self, reading):
+        """True when a value is close enough to an alert that the next check should come sooner"""
+        if reading.idle_villagers > 0:
+            return True
+
+        total_units = reading.units.total
+        house_limit = reading.units.house_limit
+        if total_units and house_limit != 200 and house_limit - total_units <= 2 * self._house_limit_buffer(total_units):
+            return True
+
+        if reading.resources.stone >= FLOATING_STONE_THRESHOLD * RESOURCE_NEAR_THRESHOLD_RATIO:
+            return True
+        threshold = FLOATING_RESOURCE_THRESHOLDS.get(reading.current_age)
+        if threshold and any(amount >= threshold * RESOURCE_NEAR_THRESHOLD_RATIO for _, amount in reading.resources.items()):
+            return True
+        return False
+
+    @staticmethod
+    def _house_limit_buffer(total_active_units):
+        """How many free population slots are left when the house warning fires"""
         buffer = 3
         if total_active_units > 125:
             buffer += 15
@@ -70,55 +332,63 @@ class ResourceAlertsThread(QThread):
             buffer += 10
         elif total_active_units > 50:
             buffer += 5
+        return buffer
+
+    def check_house_limit(self, reading):
+        """Check if the player is approaching the house limit; re-arms HOUSE_LIMIT_REARM_SLOTS past the buffer"""
+        total_active_units = reading.units.total
+        current_house_limit = reading.units.house_limit
+
+        buffer = self._house_limit_buffer(total_active_units)
         if total_active_units != 0 and (total_active_units == current_house_limit or current_house_limit - total_active_units <= buffer) and current_house_limit != 200:
-            self.audio_queue.put('audio/warnings/maison.mp3')
-            self.color_flash_queue.put(("yellow", 2, (0, 100), (300, 100), 0.80, "Build Houses!"))
-            api_client.create_action("house_limit_warning", f"House limit warning triggered: {total_active_units}/{current_house_limit}")
+            self.alerts.raise_alert(Alert("house_limit", 'audio/warnings/maison.mp3',
+                                          ("yellow", 2, (0, 100), (300, 100), 0.80, "Build Houses!"),
+                                          f"House limit warning triggered: {total_active_units}/{current_house_limit}"))
+        elif total_active_units != 0 and current_house_limit - total_active_units > buffer + HOUSE_LIMIT_REARM_SLOTS:
+            self.alerts.clear("house_limit")
 
-    def check_villager_count(self, resources_json):
+    def check_villager_count(self, reading):
         """Check if the villager count is low in late game stages"""
-        current_time = time.time()
-        if current_time - self.last_villager_check_time >= VILLAGER_WARNING_INTERVAL:
-            self.last_villager_check_time = current_time
-            current_age = resources_json.get("Current_age", "")
-            villagers_count = int(resources_json.get("Units", {}).get("number of villagers", 0))
-            if current_age in ["Castle Age", "Imperial Age"] and villagers_count < 100:
-                self.audio_queue.put('audio/warnings/villageois.mp3')
-                self.color_flash_queue.put(("orange", 2, (0, 100), (300, 100), 0.80, "Create Villagers!"))
-                api_client.create_action("low_villager_count_warning", f"Low villager count warning triggered: {villagers_count} villagers in {current_age}")
-
-    def check_floating_resources(self, resources_json):
-        """Check for excess unused resources"""
-        res_json = resources_json.get("Resources", {})
-        
+        current_age = reading.current_age
+        villagers_count = reading.villagers
+        if current_age in ["Castle Age", "Imperial Age"] and villagers_count < 100:
+            self.alerts.raise_alert(Alert("low_villager_count", 'audio/warnings/villageois.mp3',
+                                          ("orange", 2, (0, 100), (300, 100), 0.80, "Create Villagers!"),
+                                          f"Low villager count warning triggered: {villagers_count} villagers in {current_age}"))
+        elif current_age:
+            self.alerts.clear("low_villager_count")
+
+    def check_floating_resources(self, reading):
+        """Check for excess unused resources; each alert re-arms below FLOATING_RESOURCE_REARM_RATIO of its cutoff"""
         try:
-            stone_amount = int(res_json.get("Stone", 0))
-            if stone_amount > 650:
-                self.audio_queue.put('audio/warnings/floating_stone.mp3')
-                self.color_flash_queue.put(("grey", 2, (0, 200), (300, 100), 0.80, "Use Stone!"))
-                api_client.create_action("floating_stone_warning", f"Floating stone warning triggered: {stone_amount} stone")
-            
-            current_age = resources_json.get("Current_age", "")
-            if current_age == "Castle Age":
-                self._check_resource_threshold(res_json, 1000, "castle_age")
+            stone_amount = reading.resources.stone
+            if stone_amount > FLOATING_STONE_THRESHOLD:
+                self.alerts.raise_alert(Alert("floating_stone", 'audio/warnings/floating_stone.mp3',
+                                              ("grey", 2, (0, 200), (300, 100), 0.80, "Use Stone!"),
+                                              f"Floating stone warning triggered: {stone_amount} stone"))
+            elif stone_amount < FLOATING_STONE_THRESHOLD * FLOATING_RESOURCE_REARM_RATIO:
+                self.alerts.clear("floating_stone")
             
-            if current_age == "Imperial Age":
-                self._check_resource_threshold(res_json, 2000, "imperial_age")
+            current_age = reading.current_age
+            if current_age in FLOATING_RESOURCE_THRESHOLDS:
+                age = current_age.lower().replace(" ", "_")
+                self._check_resource_threshold(reading.resources, FLOATING_RESOURCE_THRESHOLDS[current_age], age)
         except Exception as e:
             logger.error(f"Error in check_floating_resources: {str(e)}")
             api_client.create_action("floating_resources_check_error", f"Error checking floating resources: {str(e)}")
 
-    def _check_resource_threshold(self, res_json, threshold, age):
+    def _check_resource_threshold(self, resource_counts, threshold, age):
         """Helper method to check if resources exceed a given threshold"""
-        for resource, amount in res_json.items():
-            try:
-                if int(amount) >= threshold:
-                    self.audio_queue.put(f'audio/warnings/floating_{resource.lower()}.mp3')
-                    color = {"Wood": "brown", "Food": "red", "Gold": "gold", "Stone": "grey"}
-                    self.color_flash_queue.put((color.get(resource, "blue"), 2, (0, 300), (300, 100), 0.80, f"Use {resource}!"))
-                    api_client.create_action(f"floating_{resource.lower()}_warning", f"Floating {resource} warning triggered: {amount} {resource} in {age}")
-            except ValueError:
-                logger.warning(f"Invalid amount for resource {resource}: {amount}")
+        color = {"Wood": "brown", "Food": "red", "Gold": "gold", "Stone": "grey"}
+        for resource, amount in resource_counts.items():
+            alert_type = f"floating_{resource.lower()}"
+            if amount >= threshold:
+                self.alerts.raise_alert(Alert(alert_type, f'audio/warnings/floating_{resource.lower()}.mp3',
+                                              (color.get(resource, "blue"), 2, (0, 300), (300, 100), 0.80, f"Use {resource}!"),
+                                              f"Floating {resource} warning triggered: {amount} {resource} in {age}"))
+            elif amount < threshold * FLOATING_RESOURCE_REARM_RATIO and resource != "Stone":
+                # Stone re-arms against its own, lower cutoff in check_floating_resources
+                self.alerts.clear(alert_type)
 
     def enable_color_flash(self, enabled=True):
         """Enable or disable color flash alerts"""
@@ -139,31 +409,40 @@ class ResourceAlertsThread(QThread):
         self.idle_villager_audio_enabled = enabled
         logger.debug(f"Idle villager audio alert {'enabled' if enabled else 'disabled'}")
 
-    def play_queued_warnings(self):
-        """Play all queued audio warnings and show color flashes"""
-        while not self.audio_queue.empty() or not self.color_flash_queue.empty():
-            if not self.audio_queue.empty():
-                audio_file = self.audio_queue.get()
-                if self.audio_alerts_enabled:
-                    if 'idle_villagers.wav' not in audio_file or self.idle_villager_audio_enabled:
-                        AudioManager.play_audio(audio_file, volume=0.35)
-            
-            if not self.color_flash_queue.empty() and self.color_flash_enabled:
-                color_flash_params = self.color_flash_queue.get()
-                logger.debug(f"Emitting color flash signal: {color_flash_params}")
-                self.color_flash_signal.emit(*color_flash_params)
-            
-            time.sleep(2)
+    def deliver_alert(self, alert):
+        """Play an alert the dispatcher has picked (runs on the dispatcher's timer thread)"""
+        if alert.audio_file and self.audio_alerts_enabled:
+            if alert.alert_type != "idle_villagers" or self.idle_villager_audio_enabled:
+                AudioManager.play_audio(alert.audio_file, volume=0.35)
+        if alert.flash and self.color_flash_enabled:
+            logger.debug(f"Emitting color flash signal: {alert.flash}")
+            self.color_flash_signal.emit(*alert.flash)
+        api_client.create_action(f"{alert.alert_type}_warning", alert.description)
 
     def stop(self):
         """Stop the resource alerts thread"""
         self.running = False
+        self.scheduler.cancel()
+        self.stop_event.set()
+        logger.info(f"Resource check period stats: {self.scheduler.get_stats()}")
+        logger.info(f"Frame change gating stats: {self.frame_detector.get_stats()}")
+        logger.info(f"Resource readings: {self.ocr_readings} by OCR, {self.model_readings} by the vision model")
+        logger.info(f"Frames replaced before inference: {self.dropped_frames}")
+        logger.info(f"Alert dispatcher stats: {self.alerts.get_stats()}")
+        if self.match_detector is not None:
+            logger.info(f"Match detection stats: {self.match_detector.get_stats()}")
+
+    def set_frame_change_threshold(self, threshold):
+        """Set how many thumbnail cells must change before a frame is re-analysed"""
+        self.frame_detector.threshold = threshold
+        logger.debug(f"Frame change threshold set to {threshold}")
 
-    def check_idle_villagers(self, resources_json):
+    def check_idle_villagers(self, reading):
         """Check if there are any idle villagers"""
-        idle_villagers = int(resources_json.get("Idle Villagers", 0))
+        idle_villagers = reading.idle_villagers
         if idle_villagers > 0:
-            if self.idle_villager_audio_enabled:
-                self.audio_queue.put('audio/warnings/idle_villagers.wav')
-            self.color_flash_queue.put(("grey", 2, (0, 400), (300, 100), 0.80, f"{idle_villagers} Idle Villager{'s' if idle_villagers > 1 else ''}!"))
-            api_client.create_action("idle_villagers_warning", f"Idle villagers warning triggered: {idle_villagers} idle villager(s)")
+            self.alerts.raise_alert(Alert("idle_villagers", 'audio/warnings/idle_villagers.wav',
+                                          ("grey", 2, (0, 400), (300, 100), 0.80, f"{idle_villagers} Idle Villager{'s' if idle_villagers > 1 else ''}!"),
+                                          f"Idle villagers warning triggered: {idle_villagers} idle villager(s)"))
+        else:
+            self.alerts.clear("idle_villagers")
@@ -0,0 +1,288 @@
+import json
+import numpy as np
+from PIL import Image
+from analysis_models import ResourceReading
+from config import RESOURCE_OCR_TEMPLATES_PATH, RESOURCE_OCR_MIN_CONFIDENCE
+from utils import logger
+
+# Field layout of the resource bar at the reference capture height (54 px, i.e. 5% of 1080p).
+# Boxes are (x0, x1, y0, y1) and are scaled with the capture height for other resolutions.
+REFERENCE_HEIGHT = 54
+RESOURCE_FIELDS = {
+    "wood": ((50, 115, 15, 40), "white"),
+    "food": ((151, 215, 15, 40), "white"),
+    "gold": ((250, 315, 15, 40), "white"),
+    "stone": ((351, 415, 15, 40), "white"),
+    "villagers_wood": ((24, 50, 28, 48), "yellow"),
+    "villagers_food": ((124, 151, 28, 48), "yellow"),
+    "villagers_gold": ((224, 250, 28, 48), "yellow"),
+    "villagers_stone": ((324, 350, 28, 48), "yellow"),
+    "villagers": ((418, 451, 28, 48), "cyan"),
+    "population": ((452, 530, 15, 40), "white"),
+    "idle_villagers": ((530, 575, 15, 42), "white"),
+}
+
+GLYPH_SIZE = (10, 14)  # (width, height) every glyph is normalised to before matching
+MIN_GLYPH_HEIGHT = 8   # at the reference height; shorter blobs are icon edges or noise
+MAX_GLYPH_ASPECT = 0.85  # width / height above which a blob is treated as touching glyphs
+MIN_LABEL_MARGIN = 0.1   # score gap to the next-best character below which a match is ambiguous
+
+class FieldReading:
+    """Text read from one field of the resource bar and how sure the matcher is about it"""
+
+    def __init__(self, text, confidence):
+        self.text = text
+        self.confidence = confidence
+
+    def __repr__(self):
+        return f"FieldReading({self.text!r}, confidence={self.confidence:.2f})"
+
+class OCRResult:
+    """All fields read from one resource bar capture"""
+
+    def __init__(self, fields):
+        self.fields = fields
+
+    @property
+    def confidence(self):
+        """The weakest field decides: one misread digit is enough to fire a wrong alert"""
+        return min((field.confidence for field in self.fields.values()), default=0.0)
+
+    def low_confidence_fields(self, min_confidence):
+        return [name for name, field in self.fields.items() if field.confidence < min_confidence]
+
+    def to_reading(self, previous=None):
+        """
+        Build a ResourceReading from the OCR fields.
+
+        The age and game time are not numeric glyphs, so they are carried over from
+        the previous (model) reading.
+
+        Raises:
+            ValueError: If a field does not hold a number (or the population is not "units/limit")
+        """
+        text = {name: field.text for name, field in self.fields.items()}
+        units, _, house_limit = text["population"].partition("/")
+        if not units.isdigit() or not house_limit.isdigit():
+            raise ValueError(f"Unreadable population field: {text['population']!r}")
+        resources = ("wood", "food", "gold", "stone")
+        for name in resources + ("villagers", "idle_villagers") + tuple(f"villagers_{r}" for r in resources):
+            if not text[name].isdigit():
+                raise ValueError(f"Unreadable {name} field: {text[name]!r}")
+
+        return ResourceReading(
+            resources={resource: text[resource] for resource in resources},
+            villagers_on_resource={resource: text[f"villagers_{resource}"] for resource in resources},
+            villagers=text["villagers"],
+            units={"total": units, "house_limit": house_limit},
+            idle_villagers=text["idle_villagers"],
+            current_age=previous.current_age if previous else "",
+            time=previous.time if previous else "",
+        )
+
+class ResourceOCR:
+    """
+    CPU-only digit reader for the resource bar.
+
+    The bar is drawn in a fixed font, so every field is read by masking its text
+    colour, splitting the mask into glyphs with a column projection and matching
+    each normalised glyph against labelled templates by normalised correlation.
+    A full bar takes a few milliseconds; the per-field confidence tells the
+    caller when a frame should go to the vision model instead.
+    """
+
+    def __init__(self, templates_path=RESOURCE_OCR_TEMPLATES_PATH, min_confidence=RESOURCE_OCR_MIN_CONFIDENCE):
+        self.min_confidence = min_confidence
+        self.labels, self.templates = self.load_templates(templates_path)
+
+    @staticmethod
+    def load_templates(path):
+        """
+        Load glyph templates.
+
+        Returns:
+            tuple: (labels array, zero-mean unit-norm template matrix of shape (n, width * height))
+        """
+        with open(path, 'r') as f:
+            data = json.load(f)
+        labels = np.array([entry["label"] for entry in data["templates"]])
+        templates = np.array([entry["pixels"] for entry in data["templates"]], dtype=np.float32) / 255.0
+        return labels, ResourceOCR._normalise_rows(templates)
+
+    @staticmethod
+    def _normalise_rows(vectors):
+        vectors = vectors - vectors.mean(axis=1, keepdims=True)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors / np.where(norms == 0, 1, norms)
+
+    @staticmethod
+    def color_mask(pixels, color):
+        """Boolean mask of the text colour used by a field"""
+        red, green, blue = pixels[..., 0], pixels[..., 1], pixels[..., 2]
+        if color == "white":
+            return (red > 140) & (green > 140) & (blue > 140)
+        if color == "yellow":
+            return (red > 120) & (green > 100) & (green - blue > 45)
+        if color == "cyan":
+            return (green > 120) & (blue > 120) & (green - red > 20)
+        raise ValueError(f"Unknown text colour: {color}")
+
+    @staticmethod
+    def normalise_glyph(mask):
+        """Scale a glyph mask to GLYPH_SIZE, keeping its aspect ratio, and flatten it"""
+        width, height = GLYPH_SIZE
+        glyph_height, glyph_width = mask.shape
+        scaled_width = max(1, min(width, round(glyph_width * height / glyph_height)))
+        glyph = Image.fromarray(mask.astype(np.uint8) * 255).resize((scaled_width, height), Image.BILINEAR)
+        canvas = np.zeros((height, width), dtype=np.float32)
+        offset = (width - scaled_width) // 2
+        canvas[:, offset:offset + scaled_width] = np.asarray(glyph, dtype=np.float32) / 255.0
+        return canvas.ravel()
+
+    @staticmethod
+    def segment(mask, min_height):
+        """
+        Split a field mask into glyph masks, left to right.
+
+        Returns:
+            list: Cropped boolean masks, one per glyph (touching glyphs are returned as one blob)
+        """
+        glyphs = []
+        columns = np.flatnonzero(mask.any(axis=0))
+        if columns.size == 0:
+            return glyphs
+        breaks = np.flatnonzero(np.diff(columns) > 1)
+        starts = np.concatenate(([columns[0]], columns[breaks + 1]))
+        ends = np.concatenate((columns[breaks], [columns[-1]]))
+        for start, end in zip(starts, ends):
+            blob = mask[:, start:end + 1]
+            rows = np.flatnonzero(blob.any(axis=1))
+            if rows[-1] - rows[0] + 1 < min_height:
+                continue
+            glyphs.append(blob[rows[0]:rows[-1] + 1])
+        return glyphs
+
+    def match(self, glyph):
+        """
+        Match one glyph mask against the templates.
+
+        Returns:
+            tuple: (character, confidence)
+        """
+        vector = self._normalise_rows(self.normalise_glyph(glyph)[None, :])[0]
+        scores = self.templates @ vector
+        best = int(np.argmax(scores))
+        label = self.labels[best]
+        others = scores[self.labels != label]
+        margin = scores[best] - (others.max() if others.size else 0.0)
+        confidence = float(scores[best]) * min(1.0, max(0.0, margin) / MIN_LABEL_MARGIN)
+        return str(label), confidence
+
+    def read_glyphs(self, glyph, max_splits=2):
+        """
+        Read a blob that may hold touching glyphs (e.g. "/2" in the population field),
+        trying every split point and keeping the one whose weakest part matches best.
+        """
+        height, width = glyph.shape
+        if width <= height * MAX_GLYPH_ASPECT or max_splits == 0:
+            return [self.match(glyph)]
+        if width > height * MAX_GLYPH_ASPECT * (max_splits + 1):
+            # Too wide for this many glyphs: a menu, tooltip or icon rather than text
+            return [("?", 0.0)]
+
+        best = None
+        min_width = max(2, height // 4)
+        for split in range(min_width, width - min_width + 1):
+            left, right = glyph[:, :split], glyph[:, split:]
+            if not left.any() or not right.any():
+                continue
+            parts = [self.match(self._trim(left))] + self.read_glyphs(self._trim(right), max_splits - 1)
+            score = min(confidence for _, confidence in parts)
+            if best is None or score > best[0]:
+                best = (score, parts)
+        return best[1] if best else [self.match(glyph)]
+
+    @staticmethod
+    def _trim(mask):
+        rows = np.flatnonzero(mask.any(axis=1))
+        columns = np.flatnonzero(mask.any(axis=0))
+        return mask[rows[0]:rows[-1] + 1, columns[0]:columns[-1] + 1]
+
+    def read_field(self, pixels, name, scale=1.0):
+        """
+        Read one field from an RGB array of the resource bar.
+
+        Returns:
+            FieldReading: Empty text with zero confidence when no glyph was found
+        """
+        (x0, x1, y0, y1), color = RESOURCE_FIELDS[name]
+        box = pixels[round(y0 * scale):round(y1 * scale), round(x0 * scale):round(x1 * scale)]
+        mask = self.color_mask(box, color)
+
+        characters = []
+        for glyph in self.segment(mask, MIN_GLYPH_HEIGHT * scale):
+            characters.extend(self.read_glyphs(glyph))
+        if not characters:
+            return FieldReading("", 0.0)
+        text = "".join(character for character, _ in characters)
+        return FieldReading(text, min(confidence for _, confidence in characters))
+
+    def read(self, frame):
+        """
+        Read every resource bar field from a capture.
+
+        Args:
+            frame: CapturedFrame, PIL image or path of the RESOURCE_SCREENSHOT_REGION capture
+
+        Returns:
+            OCRResult
+        """
+        image = getattr(frame, "image", frame)
+        if isinstance(image, str):
+            with Image.open(image) as img:
+                pixels = np.asarray(img.convert("RGB"), dtype=np.int16)
+        else:
+            pixels = np.asarray(image.convert("RGB"), dtype=np.int16)
+        scale = pixels.shape[0] / REFERENCE_HEIGHT
+        return OCRResult({name: self.read_field(pixels, name, scale) for name in RESOURCE_FIELDS})
+
+    def read_resources(self, frame, previous=None):
+        """
+        Read the resource bar and return a ResourceReading when every field is confident enough.
+
+        Returns:
+            tuple: (ResourceReading or None, OCRResult)
+        """
+        result = self.read(frame)
+        low_fields = result.low_confidence_fields(self.min_confidence)
+        if low_fields:
+            logger.debug(f"OCR confidence too low for {low_fields}: {result.fields}")
+            return None, result
+        try:
+            return result.to_reading(previous), result
+        except ValueError as e:
+            logger.debug(f"OCR result rejected: {e}")
+            return None, result
+
+if __name__ == "__main__":
+    import sys
+    import glob
+    import time
+
+    # Evaluate the templates on captures: python resource_ocr.py [image or directory ...]
+    paths = []
+    for arg in sys.argv[1:] or ["images/test_resource.jpg"]:
+        paths.extend(sorted(glob.glob(f"{arg}/*.jpg")) if not arg.lower().endswith((".jpg", ".png")) else [arg])
+
+    ocr = ResourceOCR()
+    confident = 0
+    start = time.perf_counter()
+    for path in paths:
+        result = ocr.read(path)
+        confident += result.confidence >= ocr.min_confidence
+        print(f"{path}: confidence {result.confidence:.2f}")
+        for name, field in result.fields.items():
+            print(f"  {name:16} {field.text:>8}  {field.confidence:.2f}")
+    elapsed = time.perf_counter() - start
+    if paths:
+        print(f"{confident}/{len(paths)} frames above {ocr.min_confidence}, {elapsed / len(paths) * 1000:.1f} ms per frame")
@@ -0,0 +1,164 @@
+import os
+import json
+import time
+import hashlib
+import threading
+from cachetools import TLRUCache
+from PIL import Image
+from config import (CIV_ANALYSIS_CACHE_SIZE, CIV_ANALYSIS_CACHE_TTL, CIV_ANALYSIS_CACHE_MAX_DISTANCE,
+                    CIV_ANALYSIS_CACHE_DEAD_ZONE, CIV_ANALYSIS_CACHE_PATH)
+from utils import logger
+
+def perceptual_hash(frame, hash_size=16, dead_zone=CIV_ANALYSIS_CACHE_DEAD_ZONE):
+    """
+    Difference hash of a frame (CapturedFrame, PIL image or path).
+
+    Each bit says whether a cell of the downsampled grayscale image is brighter
+    than its right neighbour, so the hash survives compression noise, small
+    scaling differences and changing numbers in a corner of the panel. Cells
+    within `dead_zone` gray levels of their neighbour (the dark, grainy game
+    world behind the panel) flip at random between captures of the same
+    screen, so a second int marks the cells that differ by more than that.
+
+    Returns:
+        tuple: (bits, reliable bits), ints of hash_size² bits
+    """
+    image = getattr(frame, "image", frame)
+    if isinstance(image, str):
+        with Image.open(image) as img:
+            return perceptual_hash(img.copy(), hash_size, dead_zone)
+    pixels = image.convert("L").resize((hash_size + 1, hash_size), Image.BOX).tobytes()
+    value = reliable = 0
+    for row in range(hash_size):
+        offset = row * (hash_size + 1)
+        for column in range(hash_size):
+            left, right = pixels[offset + column], pixels[offset + column + 1]
+            value = (value << 1) | (left > right)
+            reliable = (reliable << 1) | (abs(left - right) > dead_zone)
+    return value, reliable
+
+def hamming_distance(hash_a, hash_b):
+    """Cells that are flat in one hash but not the other, or brighter on opposite sides"""
+    (value_a, reliable_a), (value_b, reliable_b) = hash_a, hash_b
+    return bin((reliable_a ^ reliable_b) | (value_a ^ value_b) & reliable_a & reliable_b).count("1")
+
+class AnalysisCache:
+    """
+    LRU/TTL cache of model results keyed on (perceptual hash of the capture, prompt, model).
+
+    Entries live in a cachetools TLRUCache: the least recently used one is
+    evicted beyond `maxsize`, and any entry expires `ttl` seconds after it was
+    first stored, also when it was loaded from disk. A lookup first tries the
+    exact hash; failing that, a capture whose hash is within `max_distance`
+    bits of a cached one for the same prompt and model counts as the same
+    screen. With a `path` the entries are written to
+    a JSON file on every put() and loaded on first use, so a restart mid-match
+    still hits. Safe to use from several threads.
+    """
+
+    def __init__(self, maxsize=CIV_ANALYSIS_CACHE_SIZE, ttl=CIV_ANALYSIS_CACHE_TTL,
+                 max_distance=CIV_ANALYSIS_CACHE_MAX_DISTANCE, path=CIV_ANALYSIS_CACHE_PATH):
+        self.ttl = ttl
+        self.max_distance = max_distance
+        self.path = path
+        # Wall-clock expiry from the time an entry was stored, so it carries over a restart
+        self._cache = TLRUCache(maxsize=maxsize, ttu=lambda key, entry, now: entry["stored_at"] + ttl,
+                                timer=time.time)
+        self._lock = threading.Lock()
+        self._loaded = path is None
+        self.stats = {"hits": 0, "near_hits": 0, "misses": 0, "stores": 0}
+
+    @staticmethod
+    def make_key(image_hash, prompt, model_name):
+        """The prompt is stored as a digest; it can be several KB"""
+        return image_hash, hashlib.sha1((prompt or "").encode("utf-8")).hexdigest(), model_name
+
+    def get(self, frame, prompt, model_name):
+        """
+        Look up a cached result for a capture.
+
+        Returns:
+            tuple: (result or None, key to pass to put() on a miss)
+        """
+        key = self.make_key(perceptual_hash(frame), prompt, model_name)
+        with self._lock:
+            self._load()
+            entry = self._cache.get(key)
+            if entry is not None:
+                self.stats["hits"] += 1
+                return entry["result"], key
+            nearest = self._nearest(key)
+            if nearest is not None:
+                self.stats["near_hits"] += 1
+                return self._cache[nearest]["result"], key
+            self.stats["misses"] += 1
+            return None, key
+
+    def _nearest(self, key):
+        """The closest cached key for the same prompt and model within max_distance bits (caller holds the lock)"""
+        image_hash, prompt_digest, model_name = key
+        best, best_distance = None, self.max_distance + 1
+        for cached in list(self._cache.keys()):
+            if cached[1:] != (prompt_digest, model_name):
+                continue
+            distance = hamming_distance(image_hash, cached[0])
+            if distance < best_distance:
+                best, best_distance = cached, distance
+        return best
+
+    def put(self, key, result):
+        with self._lock:
+            self._load()
+            self._cache[key] = {"result": result, "stored_at": time.time()}
+            self.stats["stores"] += 1
+            self._save()
+
+    def clear(self):
+        with self._lock:
+            self._cache.clear()
+            self._loaded = True
+            self._save()
+
+    def _load(self):
+        """Read the persisted entries once, skipping expired ones (caller holds the lock)"""
+        if self._loaded:
+            return
+        self._loaded = True
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                entries = json.load(f)
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable analysis cache {self.path}: {str(e)}")
+            return
+        for entry in sorted(entries, key=lambda entry: entry["stored_at"]):
+            image_hash, prompt_digest, model_name = entry["key"]
+            if not isinstance(image_hash, list):
+                continue  # Written before hashes had reliable bits
+            # Expired entries are dropped by the cache as they are inserted
+            self._cache[(tuple(image_hash), prompt_digest, model_name)] = {"result": entry["result"],
+                                                                          "stored_at": entry["stored_at"]}
+
+    def _save(self):
+        """Write the entries to disk (caller holds the lock)"""
+        if self.path is None:
+            return
+        entries = [{"key": list(key), "result": entry["result"], "stored_at": entry["stored_at"]}
+                   for key, entry in self._cache.items()]
+        try:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            temporary = self.path + ".tmp"
+            with open(temporary, "w", encoding="utf-8") as f:
+                json.dump(entries, f)
+            os.replace(temporary, self.path)
+        except OSError as e:
+            logger.warning(f"Could not persist the analysis cache: {str(e)}")
+
+    def get_stats(self):
+        with self._lock:
+            lookups = self.stats["hits"] + self.stats["near_hits"] + self.stats["misses"]
+            hit_rate = (self.stats["hits"] + self.stats["near_hits"]) / lookups if lookups else 0.0
+            return dict(self.stats, size=len(self._cache), hit_rate=round(hit_rate, 3))
+
+civ_analysis_cache = AnalysisCache()
@@ -1,36 +1,131 @@
 import os
+import time
 import datetime
-import pyautogui
+from PIL import ImageGrab
 
 # Assuming ai_analysis.py and config.py exist in the same directory or are accessible
 # For example, if they are in the same package:
 from ai_analysis import AIAnalysis
-from config import AI_CONFIG, RESOURCE_CHECK_PROMPT, CIV_COUNTER_PROMPT
+import config  # Capture regions and prompts are read at use time; config computes them on first access
+from config import AI_CONFIG, SAVE_SCREENSHOTS_TO_DISK
+from analysis_models import RESOURCE_READING_SCHEMA
 from utils import logger # Assuming logger is exposed in utils.py
 
+class CapturedFrame:
+    """
+    An in-memory screen capture.
+
+    Holds the PIL image together with the capture metadata so it can be handed
+    straight to AIAnalysis without a JPEG round-trip through disk. The encoded
+    payload sent to the model is cached on the frame, so analysing the same
+    frame twice only encodes it once.
+    """
+
+    def __init__(self, image, kind="screen", region=None, timestamp=None):
+        self.image = image
+        self.kind = kind
+        self.region = region
+        self.timestamp = timestamp if timestamp is not None else time.time()
+        self.path = None
+        self.encoded_cache = {}
+
+    @property
+    def size(self):
+        return self.image.size
+
+    def save(self, filepath):
+        """Write the frame to disk as a JPEG and remember where it went."""
+        os.makedirs(os.path.dirname(filepath) or ".", exist_ok=True)
+        self.image.save(filepath)
+        self.path = filepath
+        logger.info(f"{self.kind.capitalize()} screenshot saved to: {filepath}")
+        return filepath
+
+    def __repr__(self):
+        return f"<CapturedFrame kind={self.kind} size={self.size[0]}x{self.size[1]} path={self.path}>"
+
 class ScreenshotManager:
     """Manages taking and analyzing screenshots."""
 
     @staticmethod
-    def take_civ_screenshot():
+    def capture_frame(kind="screen", region=None):
         """
-        Takes a screenshot, saves it to the 'screenshots/civs/' directory,
-        and logs the path.
+        Grabs the screen (or a region of it) into a CapturedFrame without touching disk.
+
+        Args:
+            kind (str): Label stored on the frame, also used for the save directory.
+            region (tuple): Optional (left, top, width, height) rectangle.
+
+        Returns:
+            CapturedFrame: The captured frame.
         """
+        bbox = None
+        if region is not None:
+            left, top, width, height = region
+            bbox = (left, top, left + width, top + height)
         try:
-            screenshot_dir = os.path.join("screenshots", "civs")
-            os.makedirs(screenshot_dir, exist_ok=True)
+            # ImageGrab copies only the requested rectangle, whereas pyautogui grabs the full screen and crops
+            image = ImageGrab.grab(bbox=bbox)
+        except OSError:
+            # Imported here: pyautogui needs a display as soon as it is imported
+            import pyautogui
+            image = pyautogui.screenshot(region=region)
+        return CapturedFrame(image, kind=kind, region=region)
 
-            timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
-            filename = f"screenshot_civ_{timestamp}.jpg"
-            filepath = os.path.join(screenshot_dir, filename)
+    @staticmethod
+    def _save_frame(frame, directory, prefix):
+        timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
+        frame.save(os.path.join("screenshots", directory, f"{prefix}_{timestamp}.jpg"))
 
-            # Take screenshot
-            screenshot = pyautogui.screenshot()
-            screenshot.save(filepath)
-            
-            logger.info(f"Civilization screenshot saved to: {filepath}")
-            return filepath
+    @staticmethod
+    def take_resource_screenshot(save_to_disk=None):
+        """
+        Captures only the resource bar (config.RESOURCE_SCREENSHOT_REGION).
+
+        Args:
+            save_to_disk (bool): Also write the frame under 'screenshots/resources/'.
+                Defaults to config.SAVE_SCREENSHOTS_TO_DISK.
+
+        Returns:
+            CapturedFrame: The resource bar frame, or None on failure.
+        """
+        if save_to_disk is None:
+            save_to_disk = SAVE_SCREENSHOTS_TO_DISK
+        try:
+            frame = ScreenshotManager.capture_frame(kind="resource", region=config.RESOURCE_SCREENSHOT_REGION)
+
+            if save_to_disk:
+                ScreenshotManager._save_frame(frame, "resources", "screenshot")
+
+            return frame
+        except ImportError:
+            logger.error("pyautogui is not installed. Please install it to use screenshot functionality.")
+            return None
+        except Exception as e:
+            logger.error(f"Error taking resource screenshot: {str(e)}")
+            return None
+
+    @staticmethod
+    def take_civ_screenshot(save_to_disk=None):
+        """
+        Captures only the civilization panel (config.CIV_SCREENSHOT_REGION).
+
+        Args:
+            save_to_disk (bool): Also write the frame under 'screenshots/civs/'.
+                Defaults to config.SAVE_SCREENSHOTS_TO_DISK.
+
+        Returns:
+            CapturedFrame: The civ panel frame, or None on failure.
+        """
+        if save_to_disk is None:
+            save_to_disk = SAVE_SCREENSHOTS_TO_DISK
+        try:
+            frame = ScreenshotManager.capture_frame(kind="civ", region=config.CIV_SCREENSHOT_REGION)
+
+            if save_to_disk:
+                ScreenshotManager._save_frame(frame, "civs", "screenshot_civ")
+
+            return frame
         except ImportError:
             logger.error("pyautogui is not installed. Please install it to use screenshot functionality.")
             return None
@@ -40,7 +135,7 @@ class ScreenshotManager:
 
     @staticmethod
     def analyze_resource_screenshot(screenshot_path):
-        """Analyze a resource screenshot using AI Analysis."""
+        """Analyze a resource screenshot (file path or CapturedFrame) using AI Analysis."""
         if not screenshot_path:
             logger.error("No screenshot path provided for resource analysis.")
             return None
@@ -50,7 +145,8 @@ class ScreenshotManager:
             
             logger.info(f"Analyzing resource screenshot '{screenshot_path}' with {model_name}...")
             # Assuming AIAnalysis.analyze_image_ollama is the correct method
-            result = AIAnalysis.analyze_image_ollama(screenshot_path, RESOURCE_CHECK_PROMPT, model_name)
+            result = AIAnalysis.analyze_image_ollama(screenshot_path, config.RESOURCE_CHECK_PROMPT, model_name,
+                                                     response_format=RESOURCE_READING_SCHEMA)
             
             return result
         except KeyError:
@@ -62,7 +158,7 @@ class ScreenshotManager:
 
     @staticmethod
     def analyze_civ_screenshot(screenshot_path):
-        """Analyze a civilization screenshot using AI Analysis."""
+        """Analyze a civilization screenshot (file path or CapturedFrame) using AI Analysis."""
         if not screenshot_path:
             logger.error("No screenshot path provided for civ analysis.")
             return None
@@ -73,7 +169,7 @@ class ScreenshotManager:
             logger.info(f"Analyzing civilization screenshot '{screenshot_path}' with {model_name}...")
             # Assuming AIAnalysis.analyze_civ_screenshot is the correct method
             # Based on original code, it seems it was AIAnalysis.analyze_civ_screenshot itself
-            result = AIAnalysis.analyze_civ_screenshot(screenshot_path, model_name, CIV_COUNTER_PROMPT)
+            result = AIAnalysis.analyze_civ_screenshot(screenshot_path, model_name, config.CIV_COUNTER_PROMPT)
             
             return result
         except KeyError:
@@ -115,7 +211,7 @@ if __name__ == '__main__':
     # For the purpose of this tool, only the main class structure is important.
 
     # Test take_civ_screenshot
-    civ_screenshot_path = ScreenshotManager.take_civ_screenshot()
+    civ_screenshot_path = ScreenshotManager.take_civ_screenshot(save_to_disk=True)
     if civ_screenshot_path:
         print(f"Civ screenshot taken: {civ_screenshot_path}")
         # Test analyze_civ_screenshot
@@ -0,0 +1,102 @@
+import sys
+import time
+import builtins
+import threading
+from contextlib import contextmanager
+
+class StartupProfile:
+    """
+    Measures where the time to first window goes (python main.py --startup-profile).
+
+    When enabled, an import hook times every module the GUI thread imports for
+    the first time, charged to the outermost import that pulled it in, and
+    phase() times named init steps. report() lists both against the startup
+    budget. When disabled every method is a no-op, so the calls can stay in
+    the startup path.
+    """
+
+    def __init__(self, enabled=False):
+        self.enabled = enabled
+        self.started = time.perf_counter()
+        self.imports = {}  # Outermost module name -> seconds, including the modules it imported
+        self.phases = []   # (name, seconds, nesting depth) in the order they started
+        self.shown_at = None  # Seconds from the start of main.py to the window being shown
+        self._original_import = None
+        self._local = threading.local()
+        if enabled:
+            self.install_import_hook()
+
+    @classmethod
+    def from_argv(cls, argv=None):
+        return cls(enabled="--startup-profile" in (sys.argv if argv is None else argv))
+
+    def install_import_hook(self):
+        if self._original_import is None:
+            self._original_import = builtins.__import__
+            builtins.__import__ = self._timed_import
+
+    def remove_import_hook(self):
+        if self._original_import is not None:
+            builtins.__import__ = self._original_import
+            self._original_import = None
+
+    def _timed_import(self, name, globals=None, locals=None, fromlist=(), level=0):
+        # Only first imports on the GUI thread count; everything else is a sys.modules lookup
+        if level or name in sys.modules or threading.current_thread() is not threading.main_thread():
+            return self._original_import(name, globals, locals, fromlist, level)
+        depth = getattr(self._local, "depth", 0)
+        self._local.depth = depth + 1
+        start = time.perf_counter()
+        try:
+            return self._original_import(name, globals, locals, fromlist, level)
+        finally:
+            self._local.depth = depth
+            if depth == 0:
+                self.imports[name] = self.imports.get(name, 0.0) + time.perf_counter() - start
+
+    @contextmanager
+    def phase(self, name):
+        """Time an init step"""
+        if not self.enabled:
+            yield
+            return
+        depth = getattr(self._local, "phase_depth", 0)
+        index = len(self.phases)
+        self.phases.append((name, 0.0, depth))
+        self._local.phase_depth = depth + 1
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._local.phase_depth = depth
+            self.phases[index] = (name, time.perf_counter() - start, depth)
+
+    def elapsed(self):
+        return time.perf_counter() - self.started
+
+    def mark_shown(self):
+        """Record the time to first window; called from the event loop once the window is shown and responsive"""
+        if self.shown_at is None:
+            self.shown_at = self.elapsed()
+
+    def report(self, budget, top=15):
+        """
+        Stop timing imports and format the measurements.
+
+        Returns:
+            str: The report, or "" when profiling is disabled
+        """
+        if not self.enabled:
+            return ""
+        self.remove_import_hook()
+        shown = self.shown_at if self.shown_at is not None else self.elapsed()
+        lines = [f"Startup: window shown after {shown:.3f}s "
+                 f"({'within' if shown <= budget else 'OVER'} the {budget:.2f}s budget), "
+                 f"startup work done after {self.elapsed():.3f}s",
+                 f"Imports ({sum(self.imports.values()):.3f}s, slowest first):"]
+        for name, seconds in sorted(self.imports.items(), key=lambda item: -item[1])[:top]:
+            lines.append(f"  {name:<32} {seconds * 1000:8.1f} ms")
+        lines.append(f"Init ({sum(seconds for _, seconds, depth in self.phases if depth == 0):.3f}s):")
+        for name, seconds, depth in self.phases:
+            lines.append(f"  {'  ' * depth + name:<32} {seconds * 1000:8.1f} ms")
+        return "\n".join(lines)
@@ -0,0 +1,101 @@
+import time
+import platform
+import threading
+from config import SYSTEM_PROBE_DEADLINES, SYSTEM_PROBE_MAX_AGE
+from utils import logger
+
+def probe_system_resources():
+    from ai_analysis import AIAnalysis
+    return AIAnalysis.get_system_resource_info()
+
+def probe_ollama_models():
+    from ai_analysis import AIAnalysis
+    return AIAnalysis.list_available_ollama_models()
+
+def probe_ip():
+    from api_client import APIClient
+    return APIClient.get_ip()
+
+DEFAULT_PROBES = {
+    "system_resources": (probe_system_resources, {"error": "timed out"}),
+    "ollama_models": (probe_ollama_models, None),
+    "ip": (probe_ip, "Unknown"),
+}
+
+class SystemProbe:
+    """
+    One shared snapshot of the machine: system resources, Ollama models and the external IP.
+
+    The probes (psutil's CPU sample and GPUtil's nvidia-smi, the Ollama model
+    list, the IP lookup) run concurrently on daemon threads, each with its own
+    deadline from SYSTEM_PROBE_DEADLINES. A probe that misses its deadline is
+    given its default value and left to finish on its own, so taking a
+    snapshot costs about as long as the slowest probe, never longer than the
+    largest deadline. Snapshots are cached for `max_age` seconds and callers
+    asking at the same time share one run.
+    """
+
+    def __init__(self, probes=None, deadlines=None, max_age=SYSTEM_PROBE_MAX_AGE):
+        self.probes = probes or DEFAULT_PROBES  # name -> (function, default value)
+        self.deadlines = deadlines or SYSTEM_PROBE_DEADLINES
+        self.max_age = max_age
+        self._lock = threading.Lock()
+        self._snapshot = None
+        self._taken_at = None
+        self.stats = {"runs": 0, "cache_hits": 0, "timeouts": 0}
+
+    def get_snapshot(self, max_age=None):
+        """
+        Get the cached snapshot, probing again if it is older than `max_age` seconds.
+
+        Returns:
+            dict: One entry per probe, plus "ollama_running", "platform", "durations" (seconds per
+                probe, None if it timed out) and "taken_at"
+        """
+        max_age = self.max_age if max_age is None else max_age
+        with self._lock:
+            if self._snapshot is not None and time.monotonic() - self._taken_at <= max_age:
+                self.stats["cache_hits"] += 1
+                return self._snapshot
+            self._snapshot = self._take_snapshot()
+            self._taken_at = time.monotonic()
+            return self._snapshot
+
+    def _take_snapshot(self):
+        start = time.monotonic()
+        results, durations = {}, {}
+
+        def run(name, function):
+            probe_start = time.monotonic()
+            try:
+                results[name] = function()
+            except Exception as e:
+                logger.warning(f"System probe {name} failed: {str(e)}")
+            durations[name] = time.monotonic() - probe_start
+
+        threads = {name: threading.Thread(target=run, args=(name, function), name=f"probe-{name}", daemon=True)
+                   for name, (function, _) in self.probes.items()}
+        for thread in threads.values():
+            thread.start()
+
+        snapshot = {}
+        for name, thread in threads.items():
+            thread.join(max(0.0, start + self.deadlines.get(name, 5) - time.monotonic()))
+            if thread.is_alive():
+                logger.warning(f"System probe {name} missed its {self.deadlines.get(name, 5)}s deadline")
+                self.stats["timeouts"] += 1
+            snapshot[name] = results.get(name, self.probes[name][1])
+        self.stats["runs"] += 1
+
+        snapshot["ollama_running"] = snapshot.get("ollama_models") is not None
+        snapshot["platform"] = platform.platform()
+        snapshot["durations"] = {name: durations.get(name) for name in self.probes}
+        snapshot["taken_at"] = time.time()
+        logger.info(f"System snapshot taken in {time.monotonic() - start:.2f}s")
+        return snapshot
+
+    def get_stats(self):
+        with self._lock:
+            return dict(self.stats)
+
+system_probe = SystemProbe()
@@ -0,0 +1,329 @@
+import os
+import json
+import time
+import threading
+from collections import deque
+from config import (TELEMETRY_QUEUE_SIZE, TELEMETRY_BATCH_SIZE, TELEMETRY_FLUSH_INTERVAL, TELEMETRY_SPOOL_DIR,
+                    TELEMETRY_SPOOL_SEGMENT_BYTES, TELEMETRY_SPOOL_MAX_BYTES, TELEMETRY_SPOOL_FSYNC_INTERVAL,
+                    TELEMETRY_REPLAY_BATCH_SIZE, TELEMETRY_RETRY_INTERVAL, TELEMETRY_RETRY_MAX_INTERVAL)
+from utils import logger
+
+class TelemetrySpool:
+    """
+    Durable local store for telemetry events the server could not take.
+
+    Events are appended as JSON lines to segment files in `directory`. A
+    segment is closed once it reaches `segment_bytes` and a new one is
+    started; when all segments together exceed `max_bytes` the oldest are
+    deleted. Writes are buffered and fsynced at most every `fsync_interval`
+    seconds (and on sync()), so spooling costs no more than a buffered file
+    write. replay() sends the segments oldest first and deletes each one once
+    it has been delivered. Only the telemetry worker thread uses a spool.
+    """
+
+    def __init__(self, directory=TELEMETRY_SPOOL_DIR, segment_bytes=TELEMETRY_SPOOL_SEGMENT_BYTES,
+                 max_bytes=TELEMETRY_SPOOL_MAX_BYTES, fsync_interval=TELEMETRY_SPOOL_FSYNC_INTERVAL):
+        self.directory = directory
+        self.segment_bytes = segment_bytes
+        self.max_bytes = max_bytes
+        self.fsync_interval = fsync_interval
+        self._file = None
+        self._last_fsync = 0.0
+        self._counter = 0
+
+    def segments(self):
+        """Segment paths, oldest first"""
+        try:
+            names = sorted(name for name in os.listdir(self.directory) if name.endswith(".jsonl"))
+        except FileNotFoundError:
+            return []
+        return [os.path.join(self.directory, name) for name in names]
+
+    def append(self, events):
+        """Write events to the current segment, rotating it when it is full"""
+        if self._file is None:
+            os.makedirs(self.directory, exist_ok=True)
+            self._counter += 1
+            path = os.path.join(self.directory, f"segment-{time.time_ns():020d}-{self._counter:04d}.jsonl")
+            self._file = open(path, "a", encoding="utf-8")
+        for event in events:
+            self._file.write(json.dumps(event) + "\n")
+        if time.monotonic() - self._last_fsync >= self.fsync_interval:
+            self.sync()
+        if self._file.tell() >= self.segment_bytes:
+            self.close_segment()
+            self._enforce_limit()
+
+    def sync(self):
+        """Flush buffered writes and fsync the current segment"""
+        if self._file is not None:
+            self._file.flush()
+            os.fsync(self._file.fileno())
+        self._last_fsync = time.monotonic()
+
+    def close_segment(self):
+        if self._file is not None:
+            self.sync()
+            self._file.close()
+            self._file = None
+
+    def _enforce_limit(self):
+        segments = self.segments()
+        sizes = [os.path.getsize(path) for path in segments]
+        while segments and sum(sizes) > self.max_bytes:
+            logger.warning(f"Telemetry spool over {self.max_bytes} bytes, deleting {segments[0]}")
+            os.remove(segments.pop(0))
+            sizes.pop(0)
+
+    @staticmethod
+    def read_segment(path):
+        events = []
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    events.append(json.loads(line))
+                except json.JSONDecodeError:
+                    # A line cut short by a crash; the rest of the segment is still good
+                    logger.warning(f"Skipping unreadable telemetry spool line in {path}")
+        return events
+
+    def replay(self, send_batch, batch_size=TELEMETRY_REPLAY_BATCH_SIZE):
+        """
+        Send every spooled event, oldest first, skipping duplicate event IDs.
+
+        Returns:
+            bool: True if the spool is empty afterwards; False if the server failed
+                again, in which case the undelivered events stay spooled
+        """
+        self.close_segment()
+        seen = set()
+        for path in self.segments():
+            events = []
+            for event in self.read_segment(path):
+                event_id = event.get("event_id")
+                if event_id is not None and event_id in seen:
+                    continue
+                seen.add(event_id)
+                events.append(event)
+            for start in range(0, len(events), batch_size):
+                batch = events[start:start + batch_size]
+                try:
+                    delivered = send_batch(batch)
+                except Exception as e:
+                    logger.error(f"Failed to replay telemetry: {str(e)}")
+                    delivered = False
+                if not delivered:
+                    # The sender drops what it delivered before failing from the batch
+                    self._rewrite(path, batch + events[start + batch_size:])
+                    return False
+            os.remove(path)
+            logger.info(f"Replayed {len(events)} spooled telemetry events from {os.path.basename(path)}")
+        return True
+
+    @staticmethod
+    def _rewrite(path, events):
+        """Replace a segment with the events that are still undelivered"""
+        temporary = path + ".tmp"
+        with open(temporary, "w", encoding="utf-8") as f:
+            for event in events:
+                f.write(json.dumps(event) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temporary, path)
+
+class TelemetryQueue:
+    """
+    Background sink for analytics events.
+
+    put() only appends to a bounded in-memory queue and returns; a daemon
+    worker sends the events in batches once `batch_size` are waiting or
+    `flush_interval` seconds have passed. When the queue is full the oldest
+    event is dropped, so a slow or unreachable server can never hold back the
+    caller (e.g. the resource alerts pipeline).
+
+    With a spool, batches the server doesn't take are written to disk instead
+    of being dropped and the server is treated as down: until the retry delay
+    (doubling from `retry_interval` up to `retry_max_interval`) has passed,
+    batches go straight to the spool without any network I/O. The first
+    attempt after that replays the spool, then live batches are sent again.
+
+    `send_batch` is called on the worker thread with a list of events and
+    returns True once they are delivered. If it fails after delivering some of
+    them, it removes those from the list before returning False, so only the
+    rest is spooled and sent again. `ready` tells the worker whether
+    events can be sent yet (e.g. once the user session exists); until then
+    they stay queued.
+    """
+
+    def __init__(self, send_batch, ready=lambda: True, spool=None, max_size=TELEMETRY_QUEUE_SIZE,
+                 batch_size=TELEMETRY_BATCH_SIZE, flush_interval=TELEMETRY_FLUSH_INTERVAL,
+                 retry_interval=TELEMETRY_RETRY_INTERVAL, retry_max_interval=TELEMETRY_RETRY_MAX_INTERVAL):
+        self.send_batch = send_batch
+        self.ready = ready
+        self.spool = spool
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.retry_interval = retry_interval
+        self.retry_max_interval = retry_max_interval
+        self._retry_delay = retry_interval
+        self._retry_at = None  # Monotonic time of the next attempt while the server is down
+        self._replay_pending = spool is not None  # Segments may be left over from an earlier run
+        self._events = deque(maxlen=max_size)
+        self._condition = threading.Condition()
+        self._sending = False
+        self._flush_requested = False
+        self._stopped = False
+        self._worker = None
+        self.stats = {"queued": 0, "sent": 0, "dropped": 0, "failed": 0, "spooled": 0, "replays": 0}
+
+    def server_down(self):
+        """True while a failed send's retry delay is running; no request is made until it ends"""
+        return self._retry_at is not None and time.monotonic() < self._retry_at
+
+    def _mark_down(self):
+        self._retry_at = time.monotonic() + self._retry_delay
+        logger.warning(f"Telemetry server unreachable, retrying in {self._retry_delay:.0f}s")
+        self._retry_delay = min(self.retry_max_interval, self._retry_delay * 2)
+
+    def _mark_up(self):
+        self._retry_at = None
+        self._retry_delay = self.retry_interval
+
+    def put(self, event, first=False):
+        """
+        Queue an event without blocking; drops the oldest one when the queue is full.
+
+        Args:
+            first: Queue the event ahead of the others (e.g. the session the queued actions belong to)
+        """
+        with self._condition:
+            if len(self._events) == self._events.maxlen:
+                self.stats["dropped"] += 1
+                if first:
+                    self._events.popleft()
+            if first:
+                self._events.appendleft(event)
+            else:
+                self._events.append(event)
+            self.stats["queued"] += 1
+            self._start_worker()
+            if len(self._events) >= self.batch_size:
+                self._condition.notify_all()
+
+    def _start_worker(self):
+        """Start the worker on first use, so importing the client doesn't spawn threads (caller holds the lock)"""
+        if self._worker is None or not self._worker.is_alive():
+            self._stopped = False
+            self._worker = threading.Thread(target=self._run, name="telemetry", daemon=True)
+            self._worker.start()
+
+    def _take_batch(self):
+        """Wait until a batch is due and take it off the queue (caller holds the lock)"""
+        deadline = time.monotonic() + self.flush_interval
+        while not self._stopped:
+            due = self._flush_requested or len(self._events) >= self.batch_size or time.monotonic() >= deadline
+            if due and self._events and self.ready():
+                batch = [self._events.popleft() for _ in range(min(self.batch_size, len(self._events)))]
+                self._sending = True
+                return batch
+            if due and self._replay_pending and not self.server_down() and self.ready():
+                # Nothing new to send, but the spool can be replayed
+                self._sending = True
+                return []
+            if due:
+                # Nothing to send yet (or not ready): start a new interval
+                self._flush_requested = False
+                self._condition.notify_all()
+                deadline = time.monotonic() + self.flush_interval
+            self._condition.wait(max(0.0, deadline - time.monotonic()))
+        return None
+
+    def _run(self):
+        while True:
+            with self._condition:
+                batch = self._take_batch()
+            if batch is None:
+                if self.spool is not None:
+                    self.spool.sync()
+                return
+            count = len(batch)
+            delivered = self._deliver(batch)
+            if self.spool is not None and self._flush_requested:
+                # Make what flush() waits for durable before it returns
+                self.spool.sync()
+            with self._condition:
+                self._sending = False
+                if delivered:
+                    self.stats["sent"] += count
+                else:
+                    # Events delivered before the failure have been dropped from the batch
+                    self.stats["sent"] += count - len(batch)
+                    self.stats["spooled" if self.spool is not None else "failed"] += len(batch)
+                self._condition.notify_all()
+
+    def _send(self, batch):
+        try:
+            return self.send_batch(batch)
+        except Exception as e:
+            logger.error(f"Failed to send telemetry: {str(e)}")
+            return False
+
+    def _deliver(self, batch):
+        """Send a batch (replaying the spool first), or spool it while the server is down"""
+        if self.spool is None:
+            return self._send(batch)
+
+        if not self.server_down() and self._replay_pending:
+            self.stats["replays"] += 1
+            if self.spool.replay(self._send):
+                self._replay_pending = False
+                self._mark_up()
+            else:
+                self._mark_down()
+        if not self.server_down() and (not batch or self._send(batch)):
+            self._mark_up()
+            return True
+
+        if batch:
+            if not self.server_down():
+                self._mark_down()
+            self.spool.append(batch)
+            self._replay_pending = True
+        return False
+
+    def flush(self, timeout=5):
+        """
+        Send everything queued so far and wait for it, e.g. before the app closes.
+
+        The worker sends (or spools and fsyncs) the events; the caller only waits.
+
+        Returns:
+            bool: True if the queue was emptied within the timeout
+        """
+        deadline = time.monotonic() + timeout
+        with self._condition:
+            if not self._events:
+                return not self._sending or self._condition.wait_for(lambda: not self._sending, timeout)
+            self._start_worker()
+            self._flush_requested = True
+            self._condition.notify_all()
+            emptied = self._condition.wait_for(lambda: not self._events and not self._sending,
+                                               max(0.0, deadline - time.monotonic()))
+            self._flush_requested = False
+            if not emptied:
+                logger.warning(f"Telemetry flush timed out with {len(self._events)} events queued")
+            return emptied
+
+    def stop(self):
+        """Stop the worker; events still queued are kept for a later put() or flush()"""
+        with self._condition:
+            self._stopped = True
+            self._condition.notify_all()
+
+    def __len__(self):
+        with self._condition:
+            return len(self._events)
+
+    def get_stats(self):
+        with self._condition:
+            return dict(self.stats, pending=len(self._events))
@@ -0,0 +1,79 @@
+import unittest
+from unittest.mock import patch
+import sys
+import os
+import json
+import requests
+# Add project root to sys.path to allow importing project modules
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from ai_analysis import AIAnalysis
+from ollama_client import ollama_client
+
+class TestModelWarmUp(unittest.TestCase):
+
+    def setUp(self):
+        ollama_client.ready_models.clear()
+
+    def tearDown(self):
+        ollama_client.ready_models.clear()
+        ollama_client.healthy = None
+
+    def test_connection_test_does_not_generate(self):
+        with patch.object(ollama_client, "list_models", return_value=[{"name": "gemma3:4b-it-qat"}]), \
+             patch.object(ollama_client, "generate") as generate:
+            success, _ = AIAnalysis.test_ollama_connection("gemma3:4b-it-qat")
+
+        self.assertTrue(success)
+        generate.assert_not_called()
+
+    def test_warm_up_sends_a_one_token_image_request(self):
+        with patch.object(ollama_client, "generate", return_value={"response": "OK", "load_duration": 2_000_000_000}) as generate:
+            success, message, seconds = AIAnalysis.warm_up_model("gemma3:4b-it-qat")
+
+        self.assertTrue(success)
+        payload = generate.call_args.args[0]
+        self.assertEqual(payload["model"], "gemma3:4b-it-qat")
+        self.assertEqual(len(payload["images"]), 1)
+        self.assertEqual(payload["options"]["num_predict"], 1)
+        self.assertTrue(ollama_client.is_model_ready("gemma3:4b-it-qat"))
+        self.assertIn("ready", message)
+
+    def test_failed_warm_up_is_reported_not_raised(self):
+        with patch.object(ollama_client, "generate", side_effect=requests.exceptions.Timeout("loading")):
+            success, message, _ = AIAnalysis.warm_up_model("gemma3:4b-it-qat")
+
+        self.assertFalse(success)
+        self.assertIn("failed to load", message)
+        self.assertFalse(ollama_client.is_model_ready("gemma3:4b-it-qat"))
+
+    def test_server_failure_forgets_loaded_models(self):
+        ollama_client.mark_model_ready("gemma3:4b-it-qat", 3.0)
+        ollama_client._record_failure(ConnectionError("restarted"))
+        self.assertFalse(ollama_client.is_model_ready("gemma3:4b-it-qat"))
+
+class TestCountersForCivs(unittest.TestCase):
+
+    def test_only_enemy_civilizations_are_countered(self):
+        # The model answered for the whole panel, the user's side included
+        analysis = json.dumps({"Tom_Neverwinter": "Britons", "ally one": "Franks",
+                               "Chagatai Khan": "Mongols", "King Alfonso": "Spanish"})
+        with patch.object(AIAnalysis, "get_army_counters", return_value="") as army_counters:
+            counters = AIAnalysis.get_counters_for_civs(analysis, "tom_neverwinter", "Ally One, someone else")
+
+        army_counters.assert_called_once_with(["Mongols", "Spanish"])
+        self.assertIn("Mongols", counters)
+        self.assertNotIn("Britons", counters)
+        self.assertNotIn("Franks", counters)
+
+    def test_a_single_enemy_gets_no_army_section(self):
+        analysis = json.dumps({"Tom_Neverwinter": "Khmer", "Chagatai Khan": "Tatars"})
+        with patch.object(AIAnalysis, "get_army_counters") as army_counters:
+            counters = AIAnalysis.get_counters_for_civs(analysis, "Tom_Neverwinter", "")
+
+        army_counters.assert_not_called()
+        self.assertIn("Tatars", counters)
+        self.assertNotIn("Khmer", counters)
+
+if __name__ == '__main__':
+    unittest.main()
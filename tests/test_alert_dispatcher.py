@@ -0,0 +1,95 @@
+import unittest
+import sys
+import os
+import time
+import threading
+# Add project root to sys.path to allow importing project modules
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from alert_dispatcher import Alert, AlertDispatcher
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+class TestAlertDispatcher(unittest.TestCase):
+
+    def setUp(self):
+        self.delivered = []
+        self.delivered_event = threading.Event()
+        self.clock = FakeClock()
+
+    def deliver(self, alert):
+        self.delivered.append(alert)
+        self.delivered_event.set()
+
+    def dispatcher(self, **kwargs):
+        kwargs.setdefault("spacing", 0)
+        kwargs.setdefault("cooldowns", {"house_limit": 20})
+        return AlertDispatcher(self.deliver, clock=self.clock, **kwargs)
+
+    def wait_for_delivery(self, count):
+        deadline = time.monotonic() + 2
+        while len(self.delivered) < count and time.monotonic() < deadline:
+            self.delivered_event.wait(0.01)
+            self.delivered_event.clear()
+        self.assertEqual(len(self.delivered), count)
+
+    def test_waiting_alerts_are_delivered_by_priority_and_coalesced(self):
+        dispatcher = self.dispatcher(spacing=60)
+        dispatcher.raise_alert(Alert("floating_wood", description="first"))
+        self.wait_for_delivery(1)
+
+        # The next slot is 60 s away, so these wait
+        dispatcher.raise_alert(Alert("floating_gold", description="gold"))
+        dispatcher.raise_alert(Alert("idle_villagers", description="2 idle"))
+        dispatcher.raise_alert(Alert("idle_villagers", description="3 idle"))
+        self.assertEqual(dispatcher.pending(), ["idle_villagers", "floating_gold"])
+        self.assertEqual(dispatcher.get_stats()["coalesced"], 1)
+
+        dispatcher.reset()
+        self.assertEqual(dispatcher.pending(), [])
+
+    def test_cooldown_suppresses_repeats_across_clear(self):
+        dispatcher = self.dispatcher()
+        self.assertTrue(dispatcher.raise_alert(Alert("house_limit")))
+        self.wait_for_delivery(1)
+
+        self.clock.now += 5
+        self.assertFalse(dispatcher.raise_alert(Alert("house_limit")))
+        self.clock.now += 20
+        self.assertTrue(dispatcher.raise_alert(Alert("house_limit")))
+        self.wait_for_delivery(2)
+
+        # Houses were built, then pop caught up again: clearing keeps the cooldown
+        dispatcher.clear("house_limit")
+        self.clock.now += 5
+        self.assertFalse(dispatcher.raise_alert(Alert("house_limit")))
+        self.clock.now += 20
+        self.assertTrue(dispatcher.raise_alert(Alert("house_limit")))
+        self.wait_for_delivery(3)
+        self.assertEqual(dispatcher.get_stats()["suppressed"], 2)
+
+    def test_clear_drops_a_waiting_alert(self):
+        dispatcher = self.dispatcher(spacing=60)
+        dispatcher.raise_alert(Alert("floating_wood"))
+        self.wait_for_delivery(1)
+        dispatcher.raise_alert(Alert("house_limit"))
+        dispatcher.clear("house_limit")
+        self.assertEqual(dispatcher.pending(), [])
+
+    def test_delivery_errors_do_not_stop_the_dispatcher(self):
+        def failing_deliver(alert):
+            self.delivered.append(alert)
+            raise RuntimeError("mixer gone")
+        dispatcher = AlertDispatcher(failing_deliver, spacing=0, cooldowns={}, clock=self.clock)
+        dispatcher.raise_alert(Alert("floating_wood"))
+        self.wait_for_delivery(1)
+        dispatcher.raise_alert(Alert("floating_food"))
+        self.wait_for_delivery(2)
+
+if __name__ == '__main__':
+    unittest.main()
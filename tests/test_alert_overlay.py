@@ -0,0 +1,61 @@
+import unittest
+from unittest.mock import patch
+import sys
+import os
+import time
+# Add project root to sys.path to allow importing project modules
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+# Render without a display server
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PyQt6.QtWidgets import QApplication
+
+from alert_overlay import AlertOverlay
+
+class TestAlertOverlay(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.app = QApplication.instance() or QApplication([])
+
+    def setUp(self):
+        self.overlay = AlertOverlay()
+
+    def tearDown(self):
+        self.overlay.clear()
+        self.overlay.deleteLater()
+
+    def process_events_for(self, seconds):
+        deadline = time.monotonic() + seconds
+        while time.monotonic() < deadline:
+            self.app.processEvents()
+            time.sleep(0.01)
+
+    def test_flash_shows_a_slot_without_blocking(self):
+        start = time.monotonic()
+        self.overlay.show_flash("yellow", 2, (0, 100), (300, 100), 0.8, "Build Houses!")
+        self.assertLess(time.monotonic() - start, 0.1)
+
+        self.assertTrue(self.overlay.isVisible())
+        slot = self.overlay.slots[(0, 100, 300, 100)]
+        self.assertTrue(slot.is_active())
+        self.assertEqual(slot.text, "Build Houses!")
+
+    def test_alerts_at_the_same_place_reuse_the_slot(self):
+        self.overlay.show_flash("grey", 2, (0, 400), (300, 100), 0.8, "2 Idle Villagers!")
+        self.overlay.show_flash("grey", 2, (0, 400), (300, 100), 0.8, "3 Idle Villagers!")
+        self.overlay.show_flash("grey", 2, (0, 200), (300, 100), 0.8, "Use Stone!")
+
+        self.assertEqual(len(self.overlay.slots), 2)
+        self.assertEqual(self.overlay.slots[(0, 400, 300, 100)].text, "3 Idle Villagers!")
+
+    @patch('alert_overlay.ALERT_FADE_DURATION', 0.05)
+    def test_overlay_hides_once_every_flash_faded(self):
+        self.overlay.show_flash("red", 0.05, (0, 300), (300, 100), 0.8, "Use Food!")
+        self.process_events_for(0.4)
+
+        self.assertFalse(self.overlay.isVisible())
+        self.assertFalse(self.overlay.slots[(0, 300, 300, 100)].isVisible())
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,45 @@
+import unittest
+import sys
+import os
+# Add project root to sys.path to allow importing project modules
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from analysis_models import (ResourceReading, CivAnalysis, RESOURCE_READING_SCHEMA,
+                             parse_model_output)
+
+class TestAnalysisModels(unittest.TestCase):
+
+    def test_prompt_example_parses_to_ints(self):
+        text = ('{"Resources": {"Wood": "200", "Food": "200", "Gold": "100", "Stone": "200"}, '
+                '"Villagers_on_resource": {"Wood": "0", "Food": "0", "Gold": "0", "Stone": "0"}, '
+                '"Villagers": "3", "Units": {"number of total units": "4", "Current House limit": "5"}, '
+                '"Idle Villagers": "2", "Current_age": "Imperial Age", "Time": "00:22:44"}')
+        reading = parse_model_output(text, ResourceReading)
+        self.assertEqual(reading.resources.wood, 200)
+        self.assertEqual((reading.units.total, reading.units.house_limit), (4, 5))
+        self.assertEqual(reading.idle_villagers, 2)
+        self.assertEqual(reading.current_age, "Imperial Age")
+
+    def test_fenced_answer_with_preamble_and_loose_numbers(self):
+        text = 'Sure, here it is:\n```json\n{"Resources": {"Wood": "1,250", "Gold": ""}, "Villagers": 12.0}\n```\nDone.'
+        reading = parse_model_output(text, ResourceReading)
+        self.assertEqual(reading.resources.wood, 1250)
+        self.assertEqual(reading.resources.gold, 0)
+        self.assertEqual(reading.villagers, 12)
+
+    def test_invalid_answers_raise_value_error(self):
+        with self.assertRaises(ValueError):
+            parse_model_output("Error: Ollama is not running or accessible.", ResourceReading)
+        with self.assertRaises(ValueError):
+            parse_model_output('{"Villagers": "many"}', ResourceReading)
+
+    def test_civ_analysis(self):
+        civs = parse_model_output('```json\n{"Chagatai Khan": "Mongols", "King Alfonso": "Spanish"}\n```', CivAnalysis)
+        self.assertEqual(civs.civilizations(), ["Mongols", "Spanish"])
+
+    def test_schema_uses_prompt_keys_and_requires_them(self):
+        self.assertIn("Idle Villagers", RESOURCE_READING_SCHEMA["properties"])
+        self.assertIn("Current_age", RESOURCE_READING_SCHEMA["required"])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,138 @@
+import unittest
+from unittest.mock import patch, MagicMock
+import sys
+import os
+import requests
+# Add project root to sys.path to allow importing project modules
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from api_client import APIClient
+
+def response(status_code):
+    mock = MagicMock(status_code=status_code)
+    mock.raise_for_status.return_value = None
+    return mock
+
+SNAPSHOT = {"system_resources": {"ram_total_gb": 16}, "ollama_models": [("gemma3:4b-it-qat", "4B")],
+            "ollama_running": True, "ip": "1.2.3.4", "platform": "Windows-10"}
+
+class TestAPIClient(unittest.TestCase):
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.client_session_id = "local"
+        self.client.session_ids["local"] = 42
+        self.client.http = MagicMock()
+        self.client.telemetry = MagicMock()
+
+    def queued(self, client=None):
+        """The events queued on the (mocked) telemetry queue so far"""
+        client = client or self.client
+        return [call.args[0] for call in client.telemetry.put.call_args_list]
+
+    def actions(self, *action_types):
+        for action_type in action_types:
+            self.client.create_action(action_type, "")
+        return self.queued()[-len(action_types):]
+
+    def test_create_action_only_queues(self):
+        self.client.create_action("resource_check", "Resource check performed")
+
+        self.client.http.post.assert_not_called()
+        event, = self.client.telemetry.put.call_args.args
+        self.assertEqual((event["action_type"], event["description"]), ("resource_check", "Resource check performed"))
+        self.assertIn("event_id", event)
+        self.assertEqual(event["client_session_id"], "local")
+
+    def test_batch_is_sent_in_one_request_with_the_session(self):
+        self.client.http.post.return_value = response(201)
+        actions = self.actions("a", "b")
+
+        self.assertTrue(self.client._send_actions(actions))
+        self.client.http.post.assert_called_once()
+        url, = self.client.http.post.call_args.args
+        self.assertTrue(url.endswith("/actions/batch/"))
+        sent = self.client.http.post.call_args.kwargs["json"]
+        self.assertEqual([action["session_id"] for action in sent], [42, 42])
+        self.assertEqual(set(sent[0]), {"session_id", "action_type", "description"})
+        self.assertIn("timeout", self.client.http.post.call_args.kwargs)
+
+    def test_server_without_batch_endpoint_gets_single_actions(self):
+        self.client.http.post.side_effect = [response(404), response(201), response(201)]
+        actions = self.actions("a", "b")
+
+        self.assertTrue(self.client._send_actions(actions))
+        self.assertFalse(self.client.batch_endpoint_available)
+        self.assertEqual(self.client.http.post.call_count, 3)
+        self.assertTrue(self.client.http.post.call_args.args[0].endswith("/actions/"))
+        self.assertEqual(self.client.http.post.call_args.kwargs["json"], {"session_id": 42, "action_type": "b", "description": ""})
+
+    def test_failing_fallback_keeps_only_the_undelivered_actions(self):
+        self.client.batch_endpoint_available = False
+        self.client.http.post.side_effect = [response(201), requests.ConnectionError("server down")]
+        actions = self.actions("a", "b", "c")
+
+        self.assertFalse(self.client._send_actions(actions))
+        self.assertEqual([action["action_type"] for action in actions], ["b", "c"])
+
+    def test_session_uses_the_shared_system_snapshot(self):
+        with patch("api_client.system_probe.get_snapshot", return_value=SNAPSHOT), \
+             patch.object(APIClient, "check_ollama_status") as check_ollama_status:
+            self.client.create_user_session("me", "mate", "1.0.0")
+
+        check_ollama_status.assert_not_called()
+        event, = self.client.telemetry.put.call_args.args
+        self.assertEqual((event["data"]["ip"], event["data"]["ollama_enabled"]), ("1.2.3.4", True))
+        self.assertEqual(event["data"]["client_info"]["available_models"], [("gemma3:4b-it-qat", "4B")])
+
+    def test_spooled_session_is_created_before_its_actions(self):
+        # An offline run queues its session and actions, which end up in the spool
+        offline = APIClient()
+        offline.telemetry = MagicMock()
+        with patch("api_client.system_probe.get_snapshot", return_value=SNAPSHOT):
+            offline.create_user_session("me", "mate", "1.0.0")
+        offline.create_action("a", "")
+        events = self.queued(offline)
+
+        # The next run replays them
+        session = response(201)
+        session.json.return_value = {"id": 7}
+        self.client.http.post.side_effect = [session, response(201)]
+        self.assertTrue(self.client._send_actions(list(events)))
+        self.assertEqual(self.client.session_id, None)
+        self.assertTrue(self.client.http.post.call_args_list[0].args[0].endswith("/user_sessions/"))
+        self.assertEqual(self.client.http.post.call_args.kwargs["json"]["session_id"], 7)
+        self.client.telemetry.spool.append.assert_not_called()
+
+        # Replaying the same session again does not create a second one
+        self.client.http.post.side_effect = [response(201)]
+        self.assertTrue(self.client._send_actions(list(events)))
+        self.assertEqual(self.client.http.post.call_count, 3)
+
+    def test_actions_of_an_unknown_session_are_spooled_again(self):
+        self.client.create_action("a", "")
+        self.client.create_action("b", "")
+        orphan, action = self.queued()
+        orphan["client_session_id"] = "lost"
+        self.client.http.post.return_value = response(201)
+
+        self.assertTrue(self.client._send_actions([orphan, action]))
+        self.client.telemetry.spool.append.assert_called_once_with([orphan])
+        self.assertEqual(self.client.http.post.call_args.kwargs["json"]["action_type"], "b")
+
+    def test_failed_send_keeps_the_session_on_the_events(self):
+        self.client.http.post.side_effect = requests.ConnectionError("server down")
+        events = self.actions("a")
+
+        self.assertFalse(self.client._send_actions(events))
+        # A later run can replay the spooled action without this run's session mapping
+        self.assertEqual(events[0]["session_id"], 42)
+
+    def test_server_status_is_not_polled_while_telemetry_backs_off(self):
+        self.client.telemetry.server_down.return_value = True
+        with patch("api_client.requests.get") as get:
+            self.assertFalse(self.client.check_server_status())
+        get.assert_not_called()
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,83 @@
+import unittest
+import sys
+import os
+import time
+import numpy as np
+# Add project root to sys.path to allow importing project modules
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from army_scorer import ArmyCounterScorer, effectiveness_matrix
+from counter_graph import CounterGraph, compile_counter_graph
+
+class StaticGraph(CounterGraph):
+    """A counter graph compiled from inline data instead of the files"""
+
+    def __init__(self, unit_counters, civ_counters):
+        super().__init__(cache_path=None)
+        self._install(compile_counter_graph(unit_counters, civ_counters))
+
+UNIT_COUNTERS = [
+    {"unit": "Knight line", "counter units": ["Halberdiers", "Camels", "Monks"]},
+    {"unit": "Archer line", "counter units": ["Skirmishers", "Knights"]},
+    {"unit": "Spearman line", "counter units": ["Archers"]},
+    {"unit": "Skirmisher line", "counter units": ["Knights"]},
+    {"unit": "Camel line", "counter units": ["Halberdiers"]},
+    {"unit": "Monk", "counter units": ["Light Cavalry"]},
+]
+
+class TestArmyCounterScorer(unittest.TestCase):
+
+    def setUp(self):
+        self.graph = StaticGraph(UNIT_COUNTERS, {})
+        self.scorer = ArmyCounterScorer(graph=self.graph)
+
+    def test_matrix_rewards_counters_by_rank_and_penalises_weakness(self):
+        matrix = effectiveness_matrix(self.graph.graph, rank_decay=0.5, weakness_weight=1.0)
+        knight, spearman, camel = (self.graph.unit_id(name) for name in ("Knight", "Halberdier", "Camel"))
+        self.assertEqual(matrix[spearman, knight], 1.0)
+        self.assertEqual(matrix[camel, knight], 0.5)
+        # Knights counter archers but are countered by halberdiers: the knight row is negative there
+        self.assertLess(matrix[knight, spearman], 0)
+
+    def test_ranked_counters_follow_the_composition(self):
+        self.assertEqual(self.scorer.score({"Paladin": 10}, top=1)[0][0], "Spearman line")
+        self.assertEqual(self.scorer.score({"Arbalester": 10}, top=1)[0][0], "Skirmisher line")
+        # A mixed army of knights and halberdiers: halberdiers lose value, camels are still good vs knights
+        mixed = dict(self.scorer.score({"Cavalier": 10, "Halberdier": 10}, top=None))
+        self.assertGreater(mixed["Archer line"], 0)
+        self.assertNotIn("Knight line", mixed)
+
+    def test_unknown_units_and_empty_armies(self):
+        self.assertEqual(self.scorer.score({}), [])
+        self.assertEqual(self.scorer.score({"Atlantean Sky Raider": 5}), [])
+        self.assertEqual(self.scorer.score({"Knight": 4, "Atlantean Sky Raider": 5}),
+                         self.scorer.score({"Knight": 4}))
+
+    def test_composition_vector_holds_unit_shares(self):
+        vector = self.scorer.composition_vector({"Knight": 30, "Paladin": 10, "Monk": 10})
+        self.assertAlmostEqual(float(vector.sum()), 1.0, places=6)
+        self.assertAlmostEqual(float(vector[self.graph.unit_id("Knight")]), 0.8, places=6)
+
+    def test_groups_are_only_recommended_when_asked(self):
+        graph = StaticGraph([{"unit": "Archer line", "counter units": ["Cavalry", "Skirmishers"]},
+                             {"unit": "Skirmisher line", "counter units": []}], {})
+        self.assertEqual([unit for unit, _ in ArmyCounterScorer(graph=graph).score({"Archer": 1})],
+                         ["Skirmisher line"])
+        self.assertEqual([unit for unit, _ in ArmyCounterScorer(graph=graph, include_groups=True).score({"Archer": 1})],
+                         ["Cavalry", "Skirmisher line"])
+
+    def test_full_roster_scores_in_under_a_millisecond(self):
+        scorer = ArmyCounterScorer(graph=CounterGraph(cache_path=None))
+        scorer._prepare()
+        roster = {name: 10 for name in scorer._names}
+        scorer.score(roster)  # Names are resolved once
+
+        timings = []
+        for _ in range(200):
+            start = time.perf_counter()
+            scorer.score(roster)
+            timings.append(time.perf_counter() - start)
+        self.assertLess(float(np.median(timings)), 0.001)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,51 @@
+import unittest
+from unittest.mock import patch
+import sys
+import os
+# Add project root to sys.path to allow importing project modules
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+# Play into a null device so the tests run without sound hardware
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+from audio_manager import AudioManager
+
+WARNINGS_DIR = os.path.join(os.path.dirname(__file__), '..', 'audio', 'warnings')
+HOUSE_AUDIO = os.path.join(WARNINGS_DIR, 'maison.mp3')
+IDLE_AUDIO = os.path.join(WARNINGS_DIR, 'idle_villagers.wav')
+
+class TestAudioManager(unittest.TestCase):
+
+    def setUp(self):
+        AudioManager.clear_cache()
+        AudioManager.init_mixer()
+        if not AudioManager._mixer_initialized:
+            self.skipTest("No audio mixer available")
+
+    def test_preload_decodes_every_warning_once(self):
+        count = AudioManager.preload(WARNINGS_DIR)
+        self.assertGreaterEqual(count, 8)
+        with patch('audio_manager.pygame.mixer.Sound') as mock_sound:
+            AudioManager.play_audio(HOUSE_AUDIO)
+        mock_sound.assert_not_called()
+
+    def test_alerts_overlap_on_separate_channels(self):
+        first = AudioManager.play_audio(HOUSE_AUDIO, volume=0.35)
+        second = AudioManager.play_audio(IDLE_AUDIO, volume=0.5)
+
+        self.assertIsNotNone(first)
+        self.assertIsNot(first, second)
+        self.assertTrue(first.get_busy())
+        self.assertAlmostEqual(second.get_volume(), 0.5, places=2)
+
+    def test_cache_is_bounded(self):
+        with patch('audio_manager.AUDIO_CACHE_MAX_BYTES', 1):
+            AudioManager.get_sound(HOUSE_AUDIO)
+            AudioManager.get_sound(IDLE_AUDIO)
+        # Only the most recently loaded sound is kept
+        self.assertEqual(list(AudioManager._sounds), [os.path.normpath(IDLE_AUDIO)])
+
+    def test_missing_file_is_reported_not_raised(self):
+        self.assertIsNone(AudioManager.play_audio(os.path.join(WARNINGS_DIR, 'missing.mp3')))
+
+if __name__ == '__main__':
+    unittest.main()
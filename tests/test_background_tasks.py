@@ -0,0 +1,82 @@
+import unittest
+import sys
+import os
+import time
+import threading
+# Add project root to sys.path to allow importing project modules
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+# Run without a display server
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PyQt6.QtWidgets import QApplication
+
+from background_tasks import BackgroundTasks
+
+class TestBackgroundTasks(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.app = QApplication.instance() or QApplication([])
+
+    def setUp(self):
+        self.tasks = BackgroundTasks()
+        self.results = []
+
+    def tearDown(self):
+        self.tasks.wait(timeout=2)
+
+    def process_events_until(self, condition, seconds=2):
+        deadline = time.monotonic() + seconds
+        while not condition() and time.monotonic() < deadline:
+            self.app.processEvents()
+            time.sleep(0.01)
+
+    def test_result_is_delivered_on_the_gui_thread(self):
+        gui_thread = threading.get_ident()
+        self.tasks.submit("status", threading.get_ident,
+                          lambda worker: self.results.append((worker, threading.get_ident())))
+
+        self.process_events_until(lambda: self.results)
+        (worker, callback), = self.results
+        self.assertNotEqual(worker, gui_thread)
+        self.assertEqual(callback, gui_thread)
+
+    def test_submit_returns_before_the_task_finishes(self):
+        release = threading.Event()
+        start = time.monotonic()
+        self.tasks.submit("slow", lambda: release.wait(5), self.results.append)
+        self.assertLess(time.monotonic() - start, 0.1)
+        release.set()
+        self.process_events_until(lambda: self.results)
+        self.assertEqual(self.results, [True])
+
+    def test_tasks_with_the_same_key_are_not_piled_up(self):
+        release = threading.Event()
+        calls = []
+        def slow():
+            calls.append(1)
+            release.wait(5)
+            return len(calls)
+
+        self.assertTrue(self.tasks.submit("server_status", slow, self.results.append))
+        self.assertFalse(self.tasks.submit("server_status", slow, self.results.append))
+        self.assertTrue(self.tasks.is_running("server_status"))
+        release.set()
+        self.process_events_until(lambda: self.results)
+
+        self.assertEqual(self.results, [1])
+        self.assertFalse(self.tasks.is_running("server_status"))
+        self.assertTrue(self.tasks.submit("server_status", slow, self.results.append))
+
+    def test_errors_go_to_the_error_callback(self):
+        errors = []
+        def failing():
+            raise ConnectionError("timed out")
+        self.tasks.submit("news", failing, self.results.append, errors.append)
+
+        self.process_events_until(lambda: errors)
+        self.assertEqual(self.results, [])
+        self.assertIsInstance(errors[0], ConnectionError)
+
+if __name__ == '__main__':
+    unittest.main()
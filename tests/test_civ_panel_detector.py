@@ -0,0 +1,76 @@
+import unittest
+import sys
+import os
+import json
+import tempfile
+# Add project root to sys.path to allow importing project modules
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from PIL import Image
+
+from analysis_models import CivAnalysis
+from civ_panel_detector import CivPanelDetector
+
+ROOT = os.path.join(os.path.dirname(__file__), '..')
+CIV_IMAGE = os.path.join(ROOT, 'images', 'test_civ.jpg')
+# Not one of the captures the templates were built from
+HELD_OUT_IMAGE = os.path.join(ROOT, 'screenshots', 'civs', 'screenshot_civ_20241018_204516.jpg')
+
+class TestCivPanelDetector(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.detector = CivPanelDetector()
+        cls.image = Image.open(CIV_IMAGE).convert("RGB")
+
+    def test_reads_every_row_of_the_test_capture(self):
+        reading = self.detector.read(self.image)
+
+        self.assertEqual([(row.player, row.code) for row in reading.rows],
+                         [("Yellow", "TAT"), ("Green", "MAG"), ("Red", "BER"), ("Blue", "HIN")])
+        self.assertEqual(reading.low_confidence_rows(self.detector.min_confidence), [])
+
+    def test_civilizations_have_the_model_answer_shape(self):
+        civilizations = self.detector.read(self.image).civilizations(self.detector.min_confidence)
+        analysis = CivAnalysis.model_validate_json(json.dumps(civilizations))
+
+        self.assertEqual(analysis.civilizations(), ["Tatars", "Magyars", "Berbers", "Indians"])
+        self.assertEqual(list(civilizations)[0], "Yellow player")
+
+    def test_misread_row_of_a_new_capture_is_left_to_the_model(self):
+        reading = self.detector.read(HELD_OUT_IMAGE)
+        confident = reading.confident_rows(self.detector.min_confidence)
+        missed = reading.low_confidence_rows(self.detector.min_confidence)
+
+        self.assertEqual([row.civ for row in confident], ["Franks", "Celts", "Gurjaras"])
+        self.assertEqual([row.player for row in missed], ["Purple"])
+        crop = CivPanelDetector.crop_rows(HELD_OUT_IMAGE, missed, reading.width)
+        self.assertEqual(crop.size, (reading.width, missed[0].bottom - missed[0].top + 1 + 4))
+
+    def test_letters_without_templates_are_never_confident(self):
+        detector = CivPanelDetector()
+        keep = detector.labels != "H"
+        detector.labels, detector.templates = detector.labels[keep], detector.templates[keep]
+        reading = detector.read(self.image)
+
+        self.assertEqual([row.code for row in reading.confident_rows(detector.min_confidence)], ["TAT", "MAG", "BER"])
+        self.assertNotIn("HIN", detector.readable_codes())
+
+    def test_capture_without_panel_has_no_rows(self):
+        self.assertEqual(self.detector.read(Image.new("RGB", self.image.size)).rows, [])
+
+    def test_templates_round_trip_through_build(self):
+        document = CivPanelDetector.build_templates([(self.image, ["TAT", "MAG", "BER", "HIN"])])
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "letters.json")
+            with open(path, 'w') as f:
+                json.dump(document, f)
+            detector = CivPanelDetector(templates_path=path)
+
+        self.assertEqual(sorted(set(detector.labels.tolist())), list("ABEGHIMNRT"))
+        self.assertEqual([row.code for row in detector.read(self.image).rows], ["TAT", "MAG", "BER", "HIN"])
+        with self.assertRaises(ValueError):
+            CivPanelDetector.build_templates([(self.image, ["TAT", "MAG"])])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,108 @@
+import unittest
+import sys
+import os
+import json
+import shutil
+import tempfile
+# Add project root to sys.path to allow importing project modules
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from counter_graph import CounterGraph, compile_counter_graph, unit_key, parse_unit_names
+from config import COUNTERS_DATA_PATH, UNIT_COUNTERS_DATA_PATH
+
+class TestUnitNames(unittest.TestCase):
+
+    def test_upgrades_and_plurals_resolve_to_their_line(self):
+        for name in ("Archer line", "Arbalests", "Heavy Crossbowmen", "Massed Arbalests", "Long-Range Archers"):
+            self.assertEqual(unit_key(name), "archer", name)
+        self.assertEqual(unit_key("Spearman line (Halberdier)"), "spearman")
+        self.assertEqual(unit_key("Halberdiers alone"), "spearman")
+        self.assertEqual(unit_key("Paladins"), "knight")
+
+    def test_entries_naming_several_units_are_split(self):
+        known = {"scout cavalry", "knight", "steppe lancer", "battle elephant"}
+        self.assertEqual([key for key, _ in parse_unit_names("Halberdiers + Arbalests", known)], ["spearman", "archer"])
+        self.assertEqual([key for key, _ in parse_unit_names("Cavalry (Scouts, Knights, Steppe Lancers, Elephants)", known)],
+                         ["scout cavalry", "knight", "steppe lancer", "battle elephant"])
+        self.assertEqual(parse_unit_names("Arbalests (situational)", known), [("archer", "Arbalests")])
+        self.assertEqual(parse_unit_names("None specified", known), [])
+
+class TestCounterGraph(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.unit_path = os.path.join(self.directory.name, "normal.json")
+        self.civ_path = os.path.join(self.directory.name, "unique.json")
+        self.cache_path = os.path.join(self.directory.name, "cache", "graph.json")
+        shutil.copy(UNIT_COUNTERS_DATA_PATH, self.unit_path)
+        shutil.copy(COUNTERS_DATA_PATH, self.civ_path)
+        self.graph = self.make_graph()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def make_graph(self):
+        return CounterGraph(unit_counters_path=self.unit_path, civ_counters_path=self.civ_path,
+                            cache_path=self.cache_path)
+
+    def test_unit_line_counters_and_reverse_queries(self):
+        self.assertEqual(self.graph.counters("Paladin"), ["Monk", "Spearman line (Halberdier)", "Camel line"])
+        self.assertIn("Knight line", self.graph.beats("Halberdiers"))
+        self.assertIn("Battle Elephant", self.graph.beats("Monks"))
+        self.assertEqual(self.graph.counters("Atlantean Sky Raider"), [])
+
+    def test_unique_units_merge_with_the_unit_lines(self):
+        self.assertEqual(self.graph.unique_units("Britons"), ["Longbowman"])
+        self.assertEqual(self.graph.civ_counters("BRI"), {"Longbowman": ["Skirmisher line", "Cavalry"]})
+        self.assertEqual(self.graph.civs_with("Longbowman"), ["Britons"])
+        # Unique units show up as what the general counters beat
+        self.assertIn("Longbowman", self.graph.beats("Elite Skirmishers"))
+
+    def test_near_names_resolve_and_unknown_units_do_not(self):
+        self.assertEqual(self.graph.name("Elite Mangudai"), "Mangudai")
+        self.assertEqual(self.graph.name("Elite Shotel Warrior"), "Shotel Warrior")
+        self.assertEqual(self.graph.name("Shotel Warior"), "Shotel Warrior")
+        self.assertEqual(self.graph.name("Heavy Cav Archer"), "Cavalry Archer")
+        # Shares the "warrior" but is a different unit the files do not know
+        self.assertIsNone(self.graph.name("Xolotl Warrior"))
+
+    def test_every_edge_points_at_a_unit(self):
+        graph = self.graph.graph
+        size = len(graph["keys"])
+        self.assertTrue(all(0 <= target < size for edges in graph["counters"] + graph["avoid"] for target in edges))
+        self.assertEqual(len(set(graph["keys"])), size)
+
+    def test_compiled_graph_is_cached_until_a_source_changes(self):
+        self.graph.load()
+        self.assertEqual(self.graph.get_stats()["compiles"], 1)
+
+        restarted = self.make_graph()
+        restarted.load()
+        self.assertEqual(restarted.get_stats(), dict(restarted.get_stats(), compiles=0, cache_loads=1))
+        self.assertEqual(restarted.counters("Paladin"), self.graph.counters("Paladin"))
+
+        with open(self.unit_path) as f:
+            units = json.load(f)
+        units.append({"unit": "Atlantean Sky Raider", "counter units": ["Monks"], "quick summary": ""})
+        with open(self.unit_path, "w") as f:
+            json.dump(units, f)
+        restarted.load()
+        self.assertEqual(restarted.get_stats()["compiles"], 1)
+        self.assertEqual(restarted.counters("Atlantean Sky Raider"), ["Monk"])
+
+    def test_compile_merges_list_and_per_unit_counters(self):
+        graph = compile_counter_graph(
+            [{"unit": "Knight line", "counter units": ["Halberdiers"], "quick summary": "Pikes."}],
+            {"Franks": {"unique_units": ["Throwing Axeman"], "counters": ["Knights"], "units_to_avoid": ["Archers"]},
+             "Teutons": {"unique_units": ["Teutonic Knight"], "counters": {"Teutonic Knight": ["Arbalests"]},
+                         "units_to_avoid": {"Teutonic Knight": ["None specified"]}}})
+        ids = {key: unit_id for unit_id, key in enumerate(graph["keys"])}
+        self.assertEqual(graph["counters"][ids["throwing axeman"]], [ids["knight"]])
+        self.assertEqual(graph["avoid"][ids["throwing axeman"]], [ids["archer"]])
+        self.assertEqual(graph["counters"][ids["teutonic knight"]], [ids["archer"]])
+        self.assertEqual(graph["avoid"][ids["teutonic knight"]], [])
+        self.assertEqual(graph["kinds"][ids["knight"]], "line")
+        self.assertEqual(graph["kinds"][ids["spearman"]], "group")
+
+if __name__ == '__main__':
+    unittest.main()
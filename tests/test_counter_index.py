@@ -0,0 +1,78 @@
+import unittest
+import sys
+import os
+import json
+import shutil
+import tempfile
+# Add project root to sys.path to allow importing project modules
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from counter_index import CounterIndex, normalize_name
+from config import COUNTERS_DATA_PATH, CIV_CODES
+
+class TestCounterIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "counters.json")
+        shutil.copy(COUNTERS_DATA_PATH, self.path)
+        self.index = CounterIndex(path=self.path)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_names_codes_and_aliases_resolve(self):
+        self.assertEqual(self.index.resolve("Aztecs"), "Aztecs")
+        self.assertEqual(self.index.resolve("  aztecs "), "Aztecs")
+        self.assertEqual(self.index.resolve("BRM"), "Burmese")
+        self.assertEqual(self.index.resolve("Bengals"), "Bengalis")
+        self.assertEqual(self.index.resolve("BEN"), "Bengalis")
+        self.assertEqual(self.index.resolve("Indians"), "Hindustanis")
+        self.assertEqual(self.index.resolve("HIN"), "Hindustanis")
+
+    def test_every_panel_code_resolves(self):
+        self.assertEqual([code for code in CIV_CODES if self.index.resolve(code) is None], [])
+
+    def test_near_misses_are_fuzzy_matched_and_remembered(self):
+        self.assertEqual(self.index.resolve("Byzantine"), "Byzantines")
+        self.assertEqual(self.index.resolve("Lithuanian"), "Lithuanians")
+        self.assertEqual(self.index.resolve("Portugese"), "Portuguese")
+        self.assertEqual(self.index.get_stats()["fuzzy_matches"], 3)
+        self.index.resolve("Byzantine")
+        self.assertEqual(self.index.get_stats()["fuzzy_matches"], 3)
+        self.assertIsNone(self.index.resolve("Atlanteans"))
+        self.assertIsNone(self.index.resolve("XYZ"))
+
+    def test_html_is_prerendered(self):
+        html = self.index.render("Britons")
+        self.assertTrue(html.startswith("<h2>Britons</h2>"))
+        self.assertIn("Longbowman", html)
+        self.assertIs(self.index.render("BRI"), html)
+        self.assertEqual(self.index.render("Atlanteans"), "<p>No counter information available for Atlanteans.</p>")
+
+    def test_file_is_parsed_again_only_when_it_changes(self):
+        self.index.resolve("Aztecs")
+        self.index.resolve("Franks")
+        self.assertEqual(self.index.get_stats()["loads"], 1)
+
+        with open(self.path) as f:
+            data = json.load(f)
+        data["Romans"]["tips"] = "Updated tip."
+        with open(self.path, "w") as f:
+            json.dump(data, f)
+        stat = os.stat(self.path)
+        os.utime(self.path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+        self.assertIn("Updated tip.", self.index.render("Romans"))
+        self.assertEqual(self.index.get_stats()["loads"], 2)
+
+    def test_missing_file_raises(self):
+        with self.assertRaises(FileNotFoundError):
+            CounterIndex(path=os.path.join(self.directory.name, "missing.json")).resolve("Aztecs")
+
+    def test_normalize_name(self):
+        self.assertEqual(normalize_name("Bengalis "), normalize_name("BENGALIS!"))
+        self.assertEqual(normalize_name("Magyárs"), "magyars")
+
+if __name__ == '__main__':
+    unittest.main()
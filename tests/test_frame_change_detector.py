@@ -0,0 +1,57 @@
+import unittest
+import sys
+import os
+# Add project root to sys.path to allow importing project modules
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from PIL import Image, ImageDraw
+
+from frame_change_detector import FrameChangeDetector
+
+RESOURCE_IMAGE = os.path.join(os.path.dirname(__file__), '..', 'images', 'test_resource.jpg')
+
+class TestFrameChangeDetector(unittest.TestCase):
+
+    def setUp(self):
+        self.image = Image.open(RESOURCE_IMAGE).convert("RGB")
+
+    def test_first_frame_is_always_analysed(self):
+        detector = FrameChangeDetector()
+        self.assertTrue(detector.has_changed(self.image))
+        self.assertEqual(detector.get_stats()["misses"], 1)
+
+    def test_identical_frame_is_a_hit_after_mark_analyzed(self):
+        detector = FrameChangeDetector()
+        detector.has_changed(self.image)
+        detector.mark_analyzed()
+
+        self.assertFalse(detector.has_changed(self.image.copy()))
+        stats = detector.get_stats()
+        self.assertEqual((stats["hits"], stats["misses"]), (1, 1))
+
+    def test_unanalysed_frame_does_not_become_reference(self):
+        detector = FrameChangeDetector()
+        detector.has_changed(self.image)
+        # No mark_analyzed(): e.g. the model response failed to parse
+        self.assertTrue(detector.has_changed(self.image))
+
+    def test_changed_digits_trigger_analysis(self):
+        detector = FrameChangeDetector()
+        detector.has_changed(self.image)
+        detector.mark_analyzed()
+
+        changed = self.image.copy()
+        ImageDraw.Draw(changed).rectangle((60, 10, 110, 40), fill=(255, 255, 255))
+        self.assertTrue(detector.has_changed(changed))
+
+    def test_threshold_is_tunable(self):
+        detector = FrameChangeDetector(threshold=10_000)
+        detector.has_changed(self.image)
+        detector.mark_analyzed()
+
+        changed = self.image.copy()
+        ImageDraw.Draw(changed).rectangle((60, 10, 110, 40), fill=(255, 255, 255))
+        self.assertFalse(detector.has_changed(changed))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,57 @@
+import unittest
+from unittest.mock import patch
+import sys
+import os
+import json
+# Add project root to sys.path to allow importing project modules
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from PIL import Image
+
+from ai_analysis import AIAnalysis
+from game_actions import GameActions
+
+ROOT = os.path.join(os.path.dirname(__file__), '..')
+# 1v1 capture: the user's Khmer above the enemy's Tatars, both codes read locally
+ONE_V_ONE_IMAGE = os.path.join(ROOT, 'screenshots', 'civs', 'screenshot_civ_20241019_155145.jpg')
+
+class TestAnalyzeCivPanel(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.image = Image.open(ONE_V_ONE_IMAGE).convert("RGB")
+
+    def analyze(self, username, teammates, names=None):
+        answer = json.dumps({"Players": names}) if names is not None else "Error: Ollama is not running"
+        with patch.object(AIAnalysis, "analyze_image_ollama", return_value=answer) as ask, \
+             patch.object(AIAnalysis, "analyze_civ_screenshot", return_value='{"Tom_Neverwinter": "Khmer"}') as ask_panel:
+            analysis = GameActions.analyze_civ_panel(self.image, "prompt", "gemma3:4b-it-qat", username, teammates)
+        return analysis, ask, ask_panel
+
+    def test_locally_read_rows_are_named_so_the_user_is_left_out(self):
+        analysis, ask, ask_panel = self.analyze("Tom_Neverwinter", "", ["Tom_Neverwinter", "Chagatai Khan"])
+
+        self.assertEqual(json.loads(analysis), {"Tom_Neverwinter": "Khmer", "Chagatai Khan": "Tatars"})
+        ask.assert_called_once()
+        ask_panel.assert_not_called()
+        counters = AIAnalysis.get_counters_for_civs(analysis, "Tom_Neverwinter", "")
+        self.assertIn("Tatars", counters)
+        self.assertNotIn("Khmer", counters)
+
+    def test_unreadable_names_send_the_whole_panel_to_the_model(self):
+        analysis, _, ask_panel = self.analyze("Tom_Neverwinter", "", ["Tom_Neverwinter"])
+        self.assertEqual(analysis, '{"Tom_Neverwinter": "Khmer"}')
+        ask_panel.assert_called_once()
+
+        _, _, ask_panel = self.analyze("Tom_Neverwinter", "")
+        ask_panel.assert_called_once()
+
+    def test_without_usernames_no_model_is_asked(self):
+        analysis, ask, ask_panel = self.analyze("", " ")
+
+        self.assertEqual(json.loads(analysis), {"Blue player": "Khmer", "Red player": "Tatars"})
+        ask.assert_not_called()
+        ask_panel.assert_not_called()
+
+if __name__ == '__main__':
+    unittest.main()
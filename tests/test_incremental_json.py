@@ -0,0 +1,59 @@
+import unittest
+import json
+import sys
+import os
+# Add project root to sys.path to allow importing project modules
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from incremental_json import IncrementalJSONParser
+
+SAMPLE = {
+    "Resources": {"Wood": "200", "Food": "200", "Gold": "100", "Stone": "200"},
+    "Villagers": "3",
+    "Units": {"number of total units": "4", "Current House limit": "5"},
+    "Idle Villagers": "2",
+    "Current_age": "Imperial Age",
+    "Time": "00:22:44"
+}
+
+class TestIncrementalJSONParser(unittest.TestCase):
+
+    def feed_in_chunks(self, text, chunk_size):
+        parser = IncrementalJSONParser()
+        emitted = []
+        for i in range(0, len(text), chunk_size):
+            emitted.extend(key for key, _ in parser.feed(text[i:i + chunk_size]))
+        return parser, emitted
+
+    def test_fields_emitted_in_order_for_any_chunking(self):
+        text = json.dumps(SAMPLE)
+        for chunk_size in (1, 2, 5, 17, len(text)):
+            parser, emitted = self.feed_in_chunks(text, chunk_size)
+            self.assertEqual(emitted, list(SAMPLE.keys()))
+            self.assertEqual(parser.fields, SAMPLE)
+            self.assertTrue(parser.complete)
+
+    def test_field_is_emitted_before_the_object_closes(self):
+        parser = IncrementalJSONParser()
+        self.assertEqual(parser.feed('{"Idle Villagers": "2"'), [("Idle Villagers", "2")])
+        self.assertFalse(parser.complete)
+
+    def test_scalar_waits_for_delimiter(self):
+        parser = IncrementalJSONParser()
+        self.assertEqual(parser.feed('{"Villagers": 12'), [])
+        self.assertEqual(parser.feed('3, "x": 1}'), [("Villagers", 123), ("x", 1)])
+
+    def test_preamble_fences_and_tricky_strings(self):
+        text = 'Here is the JSON:\n```json\n{"a": "br}ace", "b": ["]", {"c": "q\\"uote"}]}\n```'
+        parser, emitted = self.feed_in_chunks(text, 3)
+        self.assertEqual(emitted, ["a", "b"])
+        self.assertEqual(parser.fields["b"], ["]", {"c": 'q"uote'}])
+
+    def test_has_fields(self):
+        parser = IncrementalJSONParser()
+        parser.feed('{"Units": {"number of total units": "4"}, "Idle Villagers": "0"')
+        self.assertTrue(parser.has_fields(["Units", "Idle Villagers"]))
+        self.assertFalse(parser.has_fields(["Units", "Resources"]))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,48 @@
+import unittest
+import sys
+import os
+# Add project root to sys.path to allow importing project modules
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from PIL import Image
+
+from match_state_detector import MatchStateDetector
+
+ROOT = os.path.join(os.path.dirname(__file__), '..')
+RESOURCE_IMAGE = os.path.join(ROOT, 'images', 'test_resource.jpg')
+TALL_CAPTURE_IMAGE = os.path.join(ROOT, 'screenshots', 'test_ressource.png')
+LOBBY_IMAGE = os.path.join(ROOT, 'screenshots', 'resources', 'screenshot_20241024_162101.jpg')
+
+class TestMatchStateDetector(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.match = Image.open(RESOURCE_IMAGE).convert("RGB")
+
+    def setUp(self):
+        self.detector = MatchStateDetector()
+
+    def test_match_hud_is_detected(self):
+        self.assertTrue(self.detector.is_in_match(self.match))
+
+    def test_bar_shorter_than_the_capture_is_detected(self):
+        # 54 px bar in a 69 px capture: the UI scale doesn't follow the screen height
+        with Image.open(TALL_CAPTURE_IMAGE) as image:
+            self.assertTrue(self.detector.is_in_match(image.convert("RGB")))
+
+    def test_lobby_and_blank_screens_are_not_a_match(self):
+        with Image.open(LOBBY_IMAGE) as image:
+            self.assertFalse(self.detector.is_in_match(image.convert("RGB")))
+        self.assertFalse(self.detector.is_in_match(Image.new("RGB", self.match.size)))
+
+    def test_stats_count_skipped_probes_and_transitions(self):
+        blank = Image.new("RGB", self.match.size)
+        for frame in (blank, blank, self.match, blank):
+            self.detector.is_in_match(frame)
+
+        stats = self.detector.get_stats()
+        self.assertEqual((stats["probes"], stats["skipped"], stats["transitions"]), (4, 3, 2))
+        self.assertFalse(stats["in_match"])
+
+if __name__ == '__main__':
+    unittest.main()
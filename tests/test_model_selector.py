@@ -0,0 +1,187 @@
+import unittest
+import sys
+import os
+import json
+import time
+import tempfile
+from unittest.mock import patch, MagicMock
+# Add project root to sys.path to allow importing project modules
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+# Imported before the tests patch model_selector.current_load
+from model_selector import ModelSelector, current_load as measure_load
+from analysis_models import ResourceReading
+from config import RESOURCE_BENCHMARK_IMAGE_PATH, CIV_BENCHMARK_IMAGE_PATH
+
+FINGERPRINT = {"node": "test", "cpus": 8, "ram_total_gb": 16.0, "gpu": None}
+IDLE = {"cpu_percent": 10.0, "ram_percent": 40.0, "gpu_percent": None}
+
+RESOURCE_ANSWER = json.dumps({
+    "Resources": {"wood": 125, "food": 322, "gold": 100, "stone": 200},
+    "Villagers_on_resource": {"wood": 0, "food": 4, "gold": 0, "stone": 0},
+    "Villagers": 10, "Units": {"total": 11, "house_limit": 20}, "Idle Villagers": 6,
+    "Current_age": "Dark Age", "Time": "0:02:10",
+})
+
+def answers(latencies, correct):
+    """Fake analyze_image_ollama: model -> seconds per call, and which models answer correctly"""
+    def analyze(image, prompt, model_name, response_format=None):
+        time.sleep(latencies[model_name])
+        if not correct[model_name]:
+            return "I see a screenshot of a game."
+        return RESOURCE_ANSWER if "resource" in image else json.dumps({"Viper": "Aztecs", "TheMbL": "Franks"})
+    return analyze
+
+@patch('model_selector.machine_fingerprint', return_value=FINGERPRINT)
+@patch('model_selector.current_load', return_value=IDLE)
+class TestModelSelector(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.profile_path = os.path.join(self.directory.name, "model_profile.json")
+        self.selector = ModelSelector(profile_path=self.profile_path, runs=2, accuracy_floor=0.5,
+                                      check_interval=0, load_change=25, rebenchmark_interval=0)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def run_benchmark(self, latencies, correct):
+        with patch('ai_analysis.AIAnalysis.analyze_image_ollama', side_effect=answers(latencies, correct)), \
+                patch('ai_analysis.AIAnalysis.warm_up_model', return_value=(True, "ready", 0.0)), \
+                patch.object(ModelSelector, 'unload_unused'), \
+                patch.object(ModelSelector, 'benchmark_tasks', self.benchmark_tasks):
+            return self.selector.benchmark(models=list(latencies))
+
+    def benchmark_tasks(self):
+        expected = ResourceReading.model_validate_json(RESOURCE_ANSWER)
+        return {
+            "resource": (RESOURCE_BENCHMARK_IMAGE_PATH, "prompt", None,
+                         lambda answer: ModelSelector.resource_answer_correct(answer, expected)),
+            "civ": (CIV_BENCHMARK_IMAGE_PATH, "prompt", None,
+                    lambda answer: ModelSelector.civ_answer_correct(answer, {"Aztecs": "Aztecs", "Franks": "Franks"}.get)),
+        }
+
+    def test_fastest_accurate_model_is_selected(self, *_):
+        profile = self.run_benchmark({"big": 0.03, "small": 0.0, "tiny": 0.0},
+                                     {"big": True, "small": True, "tiny": False})
+
+        self.assertEqual(profile["selected"], {"resource": "small", "civ": "small"})
+        self.assertEqual(profile["results"]["resource"]["tiny"]["accuracy"], 0.0)
+        self.assertEqual(self.selector.model_for("civ"), "small")
+
+    def test_missing_benchmark_image_saves_no_profile(self, *_):
+        tasks = self.benchmark_tasks()
+        tasks["civ"] = (os.path.join(self.directory.name, "test_civ.jpg"),) + tasks["civ"][1:]
+        with patch.object(ModelSelector, 'benchmark_tasks', return_value=tasks), \
+                patch('ai_analysis.AIAnalysis.warm_up_model') as warm_up:
+            self.assertIsNone(self.selector.benchmark(models=["small"]))
+
+        warm_up.assert_not_called()
+        self.assertFalse(os.path.exists(self.profile_path))
+
+    def test_default_model_without_profile_or_accurate_model(self, *_):
+        with patch.object(ModelSelector, '_schedule_check'):
+            self.assertEqual(self.selector.model_for("resource"), self.selector.default_model())
+            self.run_benchmark({"tiny": 0.0}, {"tiny": False})
+            self.assertEqual(self.selector.model_for("resource"), self.selector.default_model())
+
+    def test_profile_is_saved_and_reloaded_for_this_machine(self, *_):
+        self.run_benchmark({"small": 0.0}, {"small": True})
+
+        self.assertEqual(ModelSelector(profile_path=self.profile_path).load_profile()["selected"]["civ"], "small")
+        with patch('model_selector.machine_fingerprint', return_value=dict(FINGERPRINT, gpu="RTX 4090")):
+            self.assertIsNone(ModelSelector(profile_path=self.profile_path).load_profile())
+
+    def test_resource_answer_must_agree_with_the_ocr(self, *_):
+        expected = ResourceReading.model_validate_json(RESOURCE_ANSWER)
+        wrong = json.loads(RESOURCE_ANSWER)
+        wrong["Resources"]["gold"] = 1000
+
+        self.assertTrue(ModelSelector.resource_answer_correct(RESOURCE_ANSWER, expected))
+        self.assertFalse(ModelSelector.resource_answer_correct(json.dumps(wrong), expected))
+        self.assertTrue(ModelSelector.resource_answer_correct(json.dumps(wrong), None))
+        self.assertFalse(ModelSelector.resource_answer_correct("Image analysis failed", None))
+
+    def test_civ_answer_must_name_known_civilizations(self, *_):
+        resolve = {"Aztecs": "Aztecs"}.get
+        self.assertTrue(ModelSelector.civ_answer_correct('{"Viper": "Aztecs"}', resolve))
+        self.assertFalse(ModelSelector.civ_answer_correct('{"Viper": "Atlanteans"}', resolve))
+        self.assertFalse(ModelSelector.civ_answer_correct('{}', resolve))
+
+    def test_load_change_triggers_a_new_benchmark(self, current_load, _):
+        profile = self.run_benchmark({"small": 0.0}, {"small": True})
+
+        with patch.object(ModelSelector, 'multimodal_models', return_value=["small"]):
+            self.assertIsNone(self.selector.needs_benchmark(profile))
+            current_load.return_value = dict(IDLE, cpu_percent=90.0)
+            self.assertIn("cpu_percent", self.selector.needs_benchmark(profile))
+            current_load.return_value = IDLE
+        with patch.object(ModelSelector, 'multimodal_models', return_value=["small", "new"]):
+            self.assertEqual(self.selector.needs_benchmark(profile), "the installed models changed")
+
+    def wait_for_check(self):
+        deadline = time.monotonic() + 2
+        while self.selector._checking and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+    def test_model_for_checks_in_the_background(self, *_):
+        self.run_benchmark({"small": 0.0}, {"small": True})
+        self.selector.match_visible = False
+        self.selector.check_interval = 60
+        self.selector._last_check = None
+        with patch.object(ModelSelector, 'needs_benchmark', return_value="cpu moved") as needs_benchmark, \
+                patch.object(ModelSelector, 'benchmark') as benchmark:
+            for _ in range(5):
+                self.assertEqual(self.selector.model_for("resource"), "small")
+            self.wait_for_check()
+
+        needs_benchmark.assert_called_once()
+        benchmark.assert_called_once()
+
+    def test_no_benchmark_while_a_match_is_visible(self, *_):
+        with patch.object(ModelSelector, 'needs_benchmark', return_value="no profile for this machine"), \
+                patch.object(ModelSelector, 'benchmark') as benchmark:
+            self.selector.model_for("resource")
+            self.wait_for_check()
+            self.selector.set_match_visible(True)
+            self.wait_for_check()
+            benchmark.assert_not_called()
+
+            # Back in the menus: the match probe starts the benchmark
+            self.selector.set_match_visible(False)
+            self.wait_for_check()
+        benchmark.assert_called_once()
+
+    def test_no_check_runs_during_a_match_until_it_ends(self, *_):
+        self.selector.check_interval = 60
+        self.selector._last_check = time.monotonic()
+        with patch.object(ModelSelector, 'needs_benchmark', return_value=None) as needs_benchmark:
+            self.selector.set_match_visible(True)
+            self.selector._last_check = None
+            self.selector.model_for("resource")
+            self.wait_for_check()
+            needs_benchmark.assert_not_called()
+
+            # The interval hasn't passed, but leaving the match checks at once
+            self.selector._last_check = time.monotonic()
+            self.selector.set_match_visible(False)
+            self.wait_for_check()
+            self.selector.set_match_visible(False)
+            self.wait_for_check()
+        needs_benchmark.assert_called_once()
+
+    def test_load_leaves_out_ollama(self, *_):
+        ollama = MagicMock()
+        ollama.cpu_percent.return_value = 400.0  # 4 of 8 cores
+        ollama.memory_percent.return_value = 25.0
+        resources = {"cpu_percent": 60.0, "ram_percent": 65.0, "gpu_info": {"load_percent": 95.0}}
+        with patch('model_selector.ollama_processes', return_value=[ollama]), \
+                patch('psutil.cpu_count', return_value=8), \
+                patch('ai_analysis.AIAnalysis.get_system_resource_info', return_value=resources), \
+                patch('model_selector.ollama_client.busy', return_value=True):
+            load = measure_load()
+
+        self.assertEqual(load, {"cpu_percent": 10.0, "ram_percent": 40.0, "gpu_percent": None})
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,56 @@
+import unittest
+import sys
+import os
+import time
+import threading
+# Add project root to sys.path to allow importing project modules
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from polling_scheduler import AdaptivePollingScheduler
+
+class TestAdaptivePollingScheduler(unittest.TestCase):
+
+    def setUp(self):
+        self.scheduler = AdaptivePollingScheduler(base_interval=10, min_interval=2, max_interval=30, backoff=2)
+
+    def test_near_threshold_polls_at_the_minimum(self):
+        self.assertEqual(self.scheduler.update(near_threshold=True, changed=True), 2)
+
+    def test_unchanged_frames_back_off_up_to_the_maximum(self):
+        intervals = [self.scheduler.update(changed=False) for _ in range(4)]
+        self.assertEqual(intervals, [20, 30, 30, 30])
+        # A changing bar goes straight back to the base cadence
+        self.assertEqual(self.scheduler.update(changed=True), 10)
+
+    def test_invalid_bounds_are_rejected(self):
+        with self.assertRaises(ValueError):
+            AdaptivePollingScheduler(base_interval=1, min_interval=2, max_interval=30)
+
+    def test_fixed_rate_subtracts_work_time(self):
+        scheduler = AdaptivePollingScheduler(base_interval=0.2, min_interval=0.1, max_interval=1, fixed_rate=True)
+        scheduler.start_cycle()
+        time.sleep(0.15)
+        start = time.monotonic()
+        scheduler.wait()
+        self.assertLess(time.monotonic() - start, 0.15)
+        self.assertIsNotNone(scheduler.get_stats()["mean_work_time"])
+
+    def test_cancel_interrupts_the_wait(self):
+        scheduler = AdaptivePollingScheduler(base_interval=30, min_interval=5, max_interval=60)
+        threading.Timer(0.05, scheduler.cancel).start()
+        start = time.monotonic()
+        self.assertFalse(scheduler.wait())
+        self.assertLess(time.monotonic() - start, 5)
+
+    def test_reset_keeps_a_pending_cancel(self):
+        self.scheduler.update(changed=False)
+        self.scheduler.cancel()
+        self.scheduler.reset()
+
+        self.assertEqual(self.scheduler.interval, 10)
+        self.assertFalse(self.scheduler.wait())
+        self.scheduler.restart()
+        self.assertTrue(self.scheduler.wait(0))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -20,7 +20,7 @@ from utils import logger # To check if logger.error was called
 class TestResourceAlertsThread(unittest.TestCase):
 
     @patch('resource_alerts_thread.ScreenshotManager.take_resource_screenshot')
-    @patch('resource_alerts_thread.AIAnalysis.analyze_image_gemini')
+    @patch('resource_alerts_thread.AIAnalysis.analyze_image_ollama')
     @patch('resource_alerts_thread.logger.error') # Mocking logger.error
     @patch('resource_alerts_thread.AudioManager.play_audio') # Mock to prevent actual audio
     @patch.object(ResourceAlertsThread, 'check_house_limit') # Mock other checks
@@ -38,7 +38,8 @@ class TestResourceAlertsThread(unittest.TestCase):
                                           mock_take_screenshot):
 
         # --- Setup Mocks ---
-        mock_take_screenshot.return_value = "dummy_screenshot_path.png"
+        dummy_frame = MagicMock(name="resource_frame")
+        mock_take_screenshot.return_value = dummy_frame
         
         # Simulate AIAnalysis returning a non-JSON error string
         error_response_string = "Error: Ollama not available or model failed to load."
@@ -48,29 +49,32 @@ class TestResourceAlertsThread(unittest.TestCase):
         api_key = "test_api_key"
         thread = ResourceAlertsThread(api_key)
         thread.running = True # Set running to True to enter the loop
+        thread.stream_responses = False # Exercise the blocking analyze_image_ollama path
+        thread.match_detector = None # The dummy frame is not an image; treat it as a live match
 
         # We want the thread's run method to execute a few times and then stop.
         # To do this, we can patch time.sleep to raise an exception after N calls,
-        # or make analyze_image_gemini set thread.running to False after a call.
+        # or make analyze_image_ollama set thread.running to False after a call.
         
         # Let's make mock_analyze_image stop the thread after the first call for this test
         def side_effect_stop_thread(*args, **kwargs):
-            thread.running = False # Stop the thread after this call
+            thread.stop() # Stop the thread after this call (also interrupts the polling wait)
             return error_response_string
         mock_analyze_image.side_effect = side_effect_stop_thread
 
         thread.start() # Start the thread
-        thread.join(timeout=5) # Wait for the thread to finish (or timeout)
+        finished = thread.wait(5000) # Wait for the thread to finish (or timeout)
 
-        if thread.is_alive():
+        if not finished:
             # If thread is still alive, something went wrong, force stop it.
             thread.running = False
-            thread.join()
+            thread.wait()
             self.fail("Thread did not terminate as expected.")
 
         # --- Assertions ---
-        # 1. AIAnalysis.analyze_image_gemini was called
-        mock_analyze_image.assert_called_once_with("dummy_screenshot_path.png", unittest.mock.ANY, api_key)
+        # 1. AIAnalysis.analyze_image_ollama was called with the in-memory resource frame
+        mock_analyze_image.assert_called_once_with(dummy_frame, unittest.mock.ANY, unittest.mock.ANY,
+                                                   response_format=unittest.mock.ANY)
 
         # 2. logger.error was called due to JSONDecodeError
         #    The actual ResourceAlertsThread should catch json.JSONDecodeError
@@ -98,5 +102,84 @@ class TestResourceAlertsThread(unittest.TestCase):
         mock_check_floating_resources.assert_not_called()
         mock_check_idle_villagers.assert_not_called()
 
+    @patch('resource_alerts_thread.MATCH_PROBE_INTERVAL', 0.01)
+    @patch('resource_alerts_thread.ScreenshotManager.take_resource_screenshot')
+    @patch('resource_alerts_thread.AIAnalysis.analyze_image_ollama')
+    @patch('resource_alerts_thread.AIAnalysis.analyze_image_ollama_stream')
+    def test_run_skips_inference_outside_a_match(self, mock_analyze_stream, mock_analyze_image, mock_take_screenshot):
+        from PIL import Image
+        menu_frame = Image.new("RGB", (1200, 54))
+        thread = ResourceAlertsThread("test_api_key")
+        thread.running = True
+
+        captures = []
+        def side_effect_capture():
+            captures.append(1)
+            if len(captures) == 3:
+                thread.stop() # Interrupts the probe wait
+            return menu_frame
+        mock_take_screenshot.side_effect = side_effect_capture
+
+        thread.start()
+        self.assertTrue(thread.wait(5000), "Thread did not terminate as expected.")
+
+        mock_analyze_image.assert_not_called()
+        mock_analyze_stream.assert_not_called()
+        self.assertEqual(thread.match_detector.get_stats()["skipped"], 3)
+
+    def test_offer_frame_keeps_only_the_latest_frame(self):
+        thread = ResourceAlertsThread("test_api_key")
+        for cycle in range(1, 4):
+            thread.offer_frame((cycle, MagicMock(name=f"frame_{cycle}"), None))
+
+        self.assertEqual(thread.frame_queue.qsize(), 1)
+        self.assertEqual(thread.frame_queue.get_nowait()[0], 3)
+        self.assertEqual(thread.dropped_frames, 2)
+
+    @patch('resource_alerts_thread.ScreenshotManager.take_resource_screenshot')
+    @patch('resource_alerts_thread.AudioManager.play_audio')
+    @patch('resource_alerts_thread.api_client.create_action')
+    def test_alert_delivery_does_not_hold_back_capture(self, mock_create_action, mock_play_audio, mock_take_screenshot):
+        from analysis_models import ResourceReading
+        from polling_scheduler import AdaptivePollingScheduler
+        thread = ResourceAlertsThread("test_api_key")
+        thread.running = True
+        thread.match_detector = None
+        thread.scheduler = AdaptivePollingScheduler(base_interval=0.01, min_interval=0.01, max_interval=0.05)
+        thread.frame_detector.has_changed = MagicMock(return_value=True)
+        # Every reading raises house and idle villager alerts, and delivery waits 10 s between alerts
+        thread.alerts.spacing = 10
+        thread.read_resources = MagicMock(return_value=ResourceReading(idle_villagers=2, units={"total": 20, "house_limit": 20}))
+
+        captures = []
+        def side_effect_capture():
+            captures.append(time.monotonic())
+            if len(captures) == 5:
+                thread.stop()
+            return MagicMock(name="resource_frame")
+        mock_take_screenshot.side_effect = side_effect_capture
+
+        thread.start()
+        self.assertTrue(thread.wait(5000), "Thread did not terminate as expected.")
+
+        self.assertEqual(len(captures), 5)
+        self.assertLess(captures[-1] - captures[0], 2)
+        # The house alert has the higher priority; the idle villager alert was still waiting at stop()
+        mock_play_audio.assert_called_once_with('audio/warnings/maison.mp3', volume=0.35)
+
+    def test_house_alert_re_arms_past_the_warning_buffer(self):
+        from analysis_models import ResourceReading
+        thread = ResourceAlertsThread("test_api_key")
+        thread.alerts = MagicMock()
+        def check(total, house_limit):
+            thread.check_house_limit(ResourceReading(units={"total": total, "house_limit": house_limit}))
+
+        check(27, 30)  # 3 free slots: at the buffer
+        thread.alerts.raise_alert.assert_called_once()
+        check(26, 30)  # one slot past the buffer still holds the alert
+        thread.alerts.clear.assert_not_called()
+        check(20, 30)
+        thread.alerts.clear.assert_called_once_with("house_limit")
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,54 @@
+import unittest
+import sys
+import os
+# Add project root to sys.path to allow importing project modules
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from PIL import Image
+
+from analysis_models import ResourceReading
+from resource_ocr import ResourceOCR
+
+RESOURCE_IMAGE = os.path.join(os.path.dirname(__file__), '..', 'images', 'test_resource.jpg')
+
+class TestResourceOCR(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.ocr = ResourceOCR()
+        cls.image = Image.open(RESOURCE_IMAGE).convert("RGB")
+
+    def test_reads_every_field_of_the_test_capture(self):
+        result = self.ocr.read(self.image)
+        text = {name: field.text for name, field in result.fields.items()}
+        self.assertEqual(text, {
+            "wood": "125", "food": "322", "gold": "100", "stone": "200",
+            "villagers_wood": "0", "villagers_food": "4", "villagers_gold": "0", "villagers_stone": "0",
+            "villagers": "10", "population": "11/20", "idle_villagers": "6",
+        })
+        self.assertGreaterEqual(result.confidence, self.ocr.min_confidence)
+
+    def test_reading_carries_age_and_time_over(self):
+        previous = ResourceReading(current_age="Imperial Age", time="00:09:40")
+        reading, _ = self.ocr.read_resources(self.image, previous=previous)
+
+        self.assertIsNotNone(reading)
+        self.assertEqual((reading.units.total, reading.units.house_limit), (11, 20))
+        self.assertEqual(reading.resources.food, 322)
+        self.assertEqual(reading.idle_villagers, 6)
+        self.assertEqual(reading.current_age, "Imperial Age")
+
+    def test_scaled_capture_is_read_at_the_reference_layout(self):
+        width, height = self.image.size
+        scaled = self.image.resize((width * 2, height * 2), Image.BICUBIC)
+        self.assertEqual(self.ocr.read(scaled).fields["population"].text, "11/20")
+
+    def test_blank_capture_falls_back_to_the_model(self):
+        blank = Image.new("RGB", self.image.size)
+        reading, result = self.ocr.read_resources(blank)
+
+        self.assertIsNone(reading)
+        self.assertEqual(result.confidence, 0.0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,130 @@
+import unittest
+import sys
+import os
+import io
+import json
+import time
+import tempfile
+from PIL import Image, ImageDraw
+# Add project root to sys.path to allow importing project modules
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from result_cache import AnalysisCache, perceptual_hash, hamming_distance
+from config import CIV_ANALYSIS_CACHE_MAX_DISTANCE as MAX_DISTANCE
+
+CIV_IMAGE = os.path.join(os.path.dirname(__file__), '..', 'images', 'test_civ.jpg')
+CIV_CAPTURES = os.path.join(os.path.dirname(__file__), '..', 'screenshots', 'civs')
+# Three presses of the hotkey during one match, and a capture from another match
+REPEAT_CAPTURES = ['screenshot_civ_20241019_155145.jpg', 'screenshot_civ_20241019_155210.jpg',
+                   'screenshot_civ_20241019_155220.jpg']
+OTHER_MATCH_CAPTURE = 'screenshot_civ_20241028_110914.jpg'
+
+def recompressed(image, quality=40):
+    buffer = io.BytesIO()
+    image.save(buffer, format="JPEG", quality=quality)
+    buffer.seek(0)
+    return Image.open(buffer).convert("RGB")
+
+class TestPerceptualHash(unittest.TestCase):
+
+    def setUp(self):
+        with Image.open(CIV_IMAGE) as img:
+            self.panel = img.convert("RGB")
+
+    def test_hash_survives_compression_and_rescaling(self):
+        panel_hash = perceptual_hash(self.panel)
+        self.assertLessEqual(hamming_distance(panel_hash, perceptual_hash(recompressed(self.panel))), MAX_DISTANCE)
+        resized = self.panel.resize((self.panel.width * 3 // 4, self.panel.height * 3 // 4))
+        self.assertLessEqual(hamming_distance(panel_hash, perceptual_hash(resized)), MAX_DISTANCE)
+        self.assertEqual(perceptual_hash(CIV_IMAGE), panel_hash)
+
+    def test_different_screens_hash_apart(self):
+        other = Image.new("RGB", self.panel.size, "black")
+        ImageDraw.Draw(other).rectangle((0, 0, self.panel.width // 2, self.panel.height), fill="white")
+        self.assertGreater(hamming_distance(perceptual_hash(self.panel), perceptual_hash(other)), 10)
+
+    def test_repeat_captures_of_a_match_hash_together(self):
+        first, *repeats = [perceptual_hash(os.path.join(CIV_CAPTURES, name)) for name in REPEAT_CAPTURES]
+        for repeat in repeats:
+            self.assertLessEqual(hamming_distance(first, repeat), MAX_DISTANCE)
+        other = perceptual_hash(os.path.join(CIV_CAPTURES, OTHER_MATCH_CAPTURE))
+        self.assertGreater(hamming_distance(first, other), 2 * MAX_DISTANCE)
+
+class TestAnalysisCache(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "cache.json")
+        with Image.open(CIV_IMAGE) as img:
+            self.panel = img.convert("RGB")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_repeat_lookup_hits_without_the_model(self):
+        cache = AnalysisCache(path=None)
+        result, key = cache.get(self.panel, "prompt", "gemma3:4b-it-qat")
+        self.assertIsNone(result)
+        cache.put(key, {"analysis": '{"Viper": "Aztecs"}'})
+
+        start = time.perf_counter()
+        result, _ = cache.get(self.panel, "prompt", "gemma3:4b-it-qat")
+        self.assertLess(time.perf_counter() - start, 0.05)
+        self.assertEqual(result, {"analysis": '{"Viper": "Aztecs"}'})
+        self.assertEqual(cache.get_stats()["hits"], 1)
+
+    def test_near_identical_capture_hits(self):
+        cache = AnalysisCache(path=None, max_distance=MAX_DISTANCE)
+        _, key = cache.get(self.panel, "prompt", "model")
+        cache.put(key, "answer")
+        result, _ = cache.get(recompressed(self.panel, quality=20), "prompt", "model")
+        self.assertEqual(result, "answer")
+        self.assertEqual(cache.get_stats()["hits"] + cache.get_stats()["near_hits"], 1)
+
+    def test_prompt_and_model_are_part_of_the_key(self):
+        cache = AnalysisCache(path=None)
+        _, key = cache.get(self.panel, "prompt", "model")
+        cache.put(key, "answer")
+        self.assertIsNone(cache.get(self.panel, "other prompt", "model")[0])
+        self.assertIsNone(cache.get(self.panel, "prompt", "other model")[0])
+
+    def test_entries_expire_and_least_recently_used_are_evicted(self):
+        cache = AnalysisCache(path=None, maxsize=2, ttl=60, max_distance=0)
+        keys = [AnalysisCache.make_key((hash_value, 2 ** 256 - 1), "prompt", "model")
+                for hash_value in (0, 2 ** 40 - 1, 2 ** 256 - 1)]
+        cache.put(keys[0], "first")
+        cache.put(keys[1], "second")
+        cache._cache[keys[0]]  # Use the first entry so the second is the least recently used
+        cache.put(keys[2], "third")
+        self.assertEqual(set(cache._cache.keys()), {keys[0], keys[2]})
+
+        cache._cache.expire(time.time() + 61)
+        self.assertIsNone(cache.get(self.panel, "prompt", "model")[0])
+        self.assertEqual(cache.get_stats()["size"], 0)
+
+    def test_repeat_press_during_a_match_hits(self):
+        cache = AnalysisCache(path=None)
+        _, key = cache.get(os.path.join(CIV_CAPTURES, REPEAT_CAPTURES[0]), "prompt", "model")
+        cache.put(key, "answer")
+        for name in REPEAT_CAPTURES[1:]:
+            self.assertEqual(cache.get(os.path.join(CIV_CAPTURES, name), "prompt", "model")[0], "answer")
+        self.assertIsNone(cache.get(os.path.join(CIV_CAPTURES, OTHER_MATCH_CAPTURE), "prompt", "model")[0])
+
+    def test_entries_persist_across_restarts(self):
+        cache = AnalysisCache(path=self.path)
+        _, key = cache.get(self.panel, "prompt", "model")
+        cache.put(key, {"analysis": "answer"})
+
+        restarted = AnalysisCache(path=self.path)
+        self.assertEqual(restarted.get(self.panel, "prompt", "model")[0], {"analysis": "answer"})
+
+    def test_expired_persisted_entries_are_not_loaded(self):
+        with open(self.path, "w") as f:
+            json.dump([{"key": [perceptual_hash(self.panel), "digest", "model"], "result": "old",
+                        "stored_at": time.time() - 3600}], f)
+        cache = AnalysisCache(path=self.path, ttl=60)
+        cache.get(self.panel, "prompt", "model")
+        self.assertEqual(cache.get_stats()["size"], 0)
+
+if __name__ == '__main__':
+    unittest.main()
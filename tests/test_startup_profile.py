@@ -0,0 +1,61 @@
+import unittest
+import sys
+import os
+import time
+import subprocess
+import tempfile
+# Add project root to sys.path to allow importing project modules
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from startup_profile import StartupProfile
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+class TestStartupProfile(unittest.TestCase):
+
+    def test_disabled_profile_records_nothing(self):
+        profile = StartupProfile(enabled=False)
+        with profile.phase("initUI"):
+            import colorsys  # noqa: F401
+        self.assertEqual((profile.imports, profile.phases), ({}, []))
+        self.assertEqual(profile.report(budget=1.0), "")
+
+    def test_first_imports_and_phases_are_timed(self):
+        sys.modules.pop("wave", None)
+        profile = StartupProfile(enabled=True)
+        try:
+            with profile.phase("MainWindow"):
+                with profile.phase("initUI"):
+                    import wave  # noqa: F401
+                    time.sleep(0.01)
+        finally:
+            profile.remove_import_hook()
+
+        self.assertIn("wave", profile.imports)
+        (outer, outer_time, outer_depth), (inner, inner_time, inner_depth) = profile.phases
+        self.assertEqual((outer, outer_depth, inner, inner_depth), ("MainWindow", 0, "initUI", 1))
+        self.assertGreaterEqual(outer_time, inner_time)
+        self.assertGreaterEqual(inner_time, 0.01)
+
+    def test_report_compares_time_to_window_with_the_budget(self):
+        profile = StartupProfile(enabled=True)
+        profile.mark_shown()
+        report = profile.report(budget=60)
+        self.assertIn("within the 60.00s budget", report)
+        profile.shown_at = 2.0
+        self.assertIn("OVER", profile.report(budget=1))
+
+class TestSideEffectFreeImports(unittest.TestCase):
+
+    def test_importing_config_and_utils_touches_nothing(self):
+        # Run in a clean interpreter and an empty working directory
+        code = ("import sys, config, utils; "
+                "print('pyautogui' in sys.modules, 'pygame' in sys.modules, utils.popup_manager is None)")
+        with tempfile.TemporaryDirectory() as directory:
+            output = subprocess.run([sys.executable, "-c", code], cwd=directory, capture_output=True, text=True,
+                                    env=dict(os.environ, PYTHONPATH=PROJECT_ROOT), check=True).stdout
+            self.assertEqual(os.listdir(directory), [])
+        self.assertEqual(output.split(), ["False", "False", "True"])
+
+if __name__ == '__main__':
+    unittest.main()
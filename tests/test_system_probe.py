@@ -0,0 +1,94 @@
+import unittest
+import sys
+import os
+import time
+import threading
+from unittest.mock import patch
+# Add project root to sys.path to allow importing project modules
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from system_probe import SystemProbe, system_probe
+from utils import check_system_requirements
+
+def slow(value, seconds):
+    def probe():
+        time.sleep(seconds)
+        return value
+    return probe
+
+class TestSystemProbe(unittest.TestCase):
+
+    def make_probe(self, **probes):
+        return SystemProbe(probes={name: (function, default) for name, (function, default) in probes.items()},
+                           deadlines={"system_resources": 1, "ollama_models": 1, "ip": 0.2}, max_age=60)
+
+    def test_probes_run_concurrently(self):
+        probe = self.make_probe(system_resources=(slow({"ram_total_gb": 16}, 0.15), {}),
+                                ollama_models=(slow([("gemma3:4b-it-qat", "4B")], 0.15), None),
+                                ip=(slow("1.2.3.4", 0.15), "Unknown"))
+        start = time.monotonic()
+        snapshot = probe.get_snapshot()
+
+        self.assertLess(time.monotonic() - start, 0.4)
+        self.assertEqual(snapshot["ip"], "1.2.3.4")
+        self.assertTrue(snapshot["ollama_running"])
+        self.assertEqual(snapshot["system_resources"], {"ram_total_gb": 16})
+
+    def test_probe_missing_its_deadline_gets_its_default(self):
+        probe = self.make_probe(ollama_models=(slow([], 0.01), None), ip=(slow("1.2.3.4", 2), "Unknown"))
+        start = time.monotonic()
+        snapshot = probe.get_snapshot()
+
+        self.assertLess(time.monotonic() - start, 1)
+        self.assertEqual(snapshot["ip"], "Unknown")
+        self.assertIsNone(snapshot["durations"]["ip"])
+        self.assertEqual(probe.get_stats()["timeouts"], 1)
+
+    def test_failed_probe_gets_its_default(self):
+        def unreachable():
+            raise ConnectionError("Ollama is not running")
+        snapshot = self.make_probe(ollama_models=(unreachable, None)).get_snapshot()
+        self.assertIsNone(snapshot["ollama_models"])
+        self.assertFalse(snapshot["ollama_running"])
+
+    def test_concurrent_callers_share_one_run(self):
+        calls = []
+        def counted():
+            calls.append(1)
+            time.sleep(0.05)
+            return []
+        probe = self.make_probe(ollama_models=(counted, None))
+        snapshots = []
+        threads = [threading.Thread(target=lambda: snapshots.append(probe.get_snapshot())) for _ in range(3)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(calls), 1)
+        self.assertTrue(all(snapshot is snapshots[0] for snapshot in snapshots))
+        probe.get_snapshot(max_age=0)
+        self.assertEqual(len(calls), 2)
+
+class TestSystemRequirements(unittest.TestCase):
+
+    def check(self, **resources):
+        snapshot = {"system_resources": dict({"ram_total_gb": 16.0}, **resources),
+                    "ollama_running": True, "ollama_models": []}
+        with patch.object(system_probe, "get_snapshot", return_value=snapshot), \
+                self.assertLogs("utils", level="WARNING") as logs:
+            self.assertTrue(check_system_requirements())
+        return "\n".join(logs.output)
+
+    def test_vram_just_under_4gb_is_low(self):
+        # 3.5GB rounds to 4 in memory_total_gb
+        gpu = {"name": "GTX 970", "memory_total_gb": 4, "memory_total_mb": 3584.0}
+        self.assertIn("Low VRAM detected: 3.5GB", self.check(gpu_info=gpu, gputil_available=True))
+
+    def test_missing_gputil_is_not_reported_as_no_gpu(self):
+        output = self.check(gpu_info={}, gputil_available=False)
+        self.assertIn("GPUtil not installed", output)
+        self.assertNotIn("No GPU detected", output)
+
+if __name__ == '__main__':
+    unittest.main()
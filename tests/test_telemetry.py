@@ -0,0 +1,192 @@
+import unittest
+import sys
+import os
+import time
+import threading
+import tempfile
+# Add project root to sys.path to allow importing project modules
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from telemetry import TelemetryQueue, TelemetrySpool
+
+class TestTelemetryQueue(unittest.TestCase):
+
+    def setUp(self):
+        self.batches = []
+        self.sent = threading.Event()
+
+    def send(self, batch):
+        self.batches.append(batch)
+        self.sent.set()
+        return True
+
+    def test_put_returns_without_waiting_for_the_server(self):
+        release = threading.Event()
+        queue = TelemetryQueue(lambda batch: release.wait(5), batch_size=1, flush_interval=60)
+        start = time.monotonic()
+        for i in range(5):
+            queue.put({"action_type": f"action_{i}"})
+        self.assertLess(time.monotonic() - start, 0.1)
+        release.set()
+        self.assertTrue(queue.flush(timeout=2))
+
+    def test_full_batch_is_sent_before_the_interval(self):
+        queue = TelemetryQueue(self.send, batch_size=3, flush_interval=60)
+        for i in range(3):
+            queue.put({"action_type": f"action_{i}"})
+
+        self.assertTrue(self.sent.wait(2))
+        self.assertEqual([event["action_type"] for event in self.batches[0]], ["action_0", "action_1", "action_2"])
+
+    def test_partial_batch_is_sent_after_the_interval(self):
+        queue = TelemetryQueue(self.send, batch_size=10, flush_interval=0.05)
+        queue.put({"action_type": "resource_check"})
+
+        self.assertTrue(self.sent.wait(2))
+        self.assertEqual(len(self.batches[0]), 1)
+
+    def test_oldest_events_are_dropped_when_full(self):
+        queue = TelemetryQueue(self.send, ready=lambda: False, max_size=3, batch_size=10, flush_interval=60)
+        for i in range(5):
+            queue.put({"action_type": f"action_{i}"})
+
+        self.assertEqual(len(queue), 3)
+        self.assertEqual(queue.get_stats()["dropped"], 2)
+        queue.ready = lambda: True
+        self.assertTrue(queue.flush(timeout=2))
+        self.assertEqual([event["action_type"] for batch in self.batches for event in batch], ["action_2", "action_3", "action_4"])
+
+    def test_events_wait_until_ready(self):
+        queue = TelemetryQueue(self.send, ready=lambda: False, batch_size=1, flush_interval=0.01)
+        queue.put({"action_type": "start_resource_alerts"})
+
+        self.assertFalse(self.sent.wait(0.1))
+        self.assertFalse(queue.flush(timeout=0.1))
+        self.assertEqual(len(queue), 1)
+
+    def test_send_errors_do_not_stop_the_worker(self):
+        calls = []
+        def failing_send(batch):
+            calls.append(batch)
+            if len(calls) == 1:
+                raise ConnectionError("server down")
+            return True
+        queue = TelemetryQueue(failing_send, batch_size=1, flush_interval=60)
+        queue.put({"action_type": "first"})
+        queue.put({"action_type": "second"})
+
+        self.assertTrue(queue.flush(timeout=2))
+        stats = queue.get_stats()
+        self.assertEqual((stats["failed"], stats["sent"]), (1, 1))
+
+    def test_put_first_goes_ahead_of_queued_events(self):
+        queue = TelemetryQueue(self.send, batch_size=10, flush_interval=60)
+        queue.put({"action_type": "start"})
+        queue.put({"kind": "user_session"}, first=True)
+
+        self.assertTrue(queue.flush(timeout=2))
+        self.assertEqual(self.batches[0][0], {"kind": "user_session"})
+
+class TestTelemetrySpool(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.spool = TelemetrySpool(self.directory.name, segment_bytes=200, max_bytes=10000, fsync_interval=60)
+
+    def tearDown(self):
+        self.spool.close_segment()
+        self.directory.cleanup()
+
+    def event(self, i):
+        return {"event_id": f"id-{i}", "action_type": f"action_{i}"}
+
+    def test_segments_rotate_by_size(self):
+        for i in range(10):
+            self.spool.append([self.event(i)])
+        self.spool.close_segment()
+
+        segments = self.spool.segments()
+        self.assertGreater(len(segments), 1)
+        events = [event for path in segments for event in TelemetrySpool.read_segment(path)]
+        self.assertEqual([event["event_id"] for event in events], [f"id-{i}" for i in range(10)])
+
+    def test_oldest_segments_are_deleted_over_the_limit(self):
+        self.spool.max_bytes = 400
+        for i in range(30):
+            self.spool.append([self.event(i)])
+        self.spool.close_segment()
+
+        self.assertLessEqual(sum(os.path.getsize(path) for path in self.spool.segments()), 400 + 200)
+        first = TelemetrySpool.read_segment(self.spool.segments()[0])[0]
+        self.assertNotEqual(first["event_id"], "id-0")
+
+    def test_replay_sends_in_batches_and_skips_duplicates(self):
+        self.spool.append([self.event(0), self.event(1), self.event(0), self.event(2)])
+        batches = []
+
+        self.assertTrue(self.spool.replay(lambda batch: batches.append(batch) or True, batch_size=2))
+        self.assertEqual([[event["event_id"] for event in batch] for batch in batches], [["id-0", "id-1"], ["id-2"]])
+        self.assertEqual(self.spool.segments(), [])
+
+    def test_failed_replay_keeps_the_undelivered_events(self):
+        self.spool.append([self.event(i) for i in range(4)])
+        calls = []
+        def send(batch):
+            calls.append(batch)
+            return len(calls) == 1
+
+        self.assertFalse(self.spool.replay(send, batch_size=2))
+        remaining = TelemetrySpool.read_segment(self.spool.segments()[0])
+        self.assertEqual([event["event_id"] for event in remaining], ["id-2", "id-3"])
+
+    def test_partly_delivered_batch_is_not_replayed_again(self):
+        self.spool.append([self.event(i) for i in range(4)])
+        def send(batch):
+            del batch[:1]  # The first event got through before the server failed
+            return False
+
+        self.assertFalse(self.spool.replay(send, batch_size=2))
+        remaining = TelemetrySpool.read_segment(self.spool.segments()[0])
+        self.assertEqual([event["event_id"] for event in remaining], ["id-1", "id-2", "id-3"])
+
+    def test_unreachable_server_is_not_contacted_until_the_retry_delay(self):
+        calls = []
+        def send(batch):
+            calls.append(batch)
+            return False
+        queue = TelemetryQueue(send, spool=self.spool, batch_size=1, flush_interval=60, retry_interval=60)
+        queue.put(self.event(0))
+        self.assertTrue(queue.flush(timeout=2))
+        queue.put(self.event(1))
+        self.assertTrue(queue.flush(timeout=2))
+
+        self.assertEqual(len(calls), 1)
+        self.assertTrue(queue.server_down())
+        self.assertEqual(queue.get_stats()["spooled"], 2)
+
+        # Once the delay is over the spool is replayed before new events
+        delivered = []
+        queue.send_batch = lambda batch: delivered.extend(event["event_id"] for event in batch) or True
+        queue._retry_at = time.monotonic()
+        queue.put(self.event(2))
+        self.assertTrue(queue.flush(timeout=2))
+        self.assertEqual(delivered, ["id-0", "id-1", "id-2"])
+        self.assertEqual(self.spool.segments(), [])
+
+    def test_flush_leaves_the_spool_to_the_worker(self):
+        sync_threads = []
+        sync = self.spool.sync
+        def recording_sync():
+            sync_threads.append(threading.current_thread().name)
+            sync()
+        self.spool.sync = recording_sync
+        queue = TelemetryQueue(lambda batch: False, spool=self.spool, batch_size=10, flush_interval=60, retry_interval=60)
+        queue.put(self.event(0))
+        self.assertTrue(queue.flush(timeout=2))
+
+        self.assertTrue(sync_threads)
+        self.assertEqual(set(sync_threads), {"telemetry"})
+        self.assertEqual(len(TelemetrySpool.read_segment(self.spool.segments()[0])), 1)
+
+if __name__ == '__main__':
+    unittest.main()
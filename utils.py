@@ -14,11 +14,14 @@ formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(messag
 handler.setFormatter(formatter)
 logger.addHandler(handler)
 
-# Add file logging
-os.makedirs("logs", exist_ok=True)
-file_handler = logging.FileHandler("logs/app.log")
-file_handler.setFormatter(formatter)
-logger.addHandler(file_handler)
+def setup_logging(log_dir="logs"):
+    """Add file logging; called by the app at startup so importing utils doesn't create files"""
+    if any(isinstance(h, logging.FileHandler) for h in logger.handlers):
+        return
+    os.makedirs(log_dir, exist_ok=True)
+    file_handler = logging.FileHandler(os.path.join(log_dir, "app.log"))
+    file_handler.setFormatter(formatter)
+    logger.addHandler(file_handler)
 
 def resource_path(relative_path):
     """ Get absolute path to resource, works for dev and for PyInstaller """
@@ -29,6 +32,21 @@ def resource_path(relative_path):
         base_path = os.path.abspath(".")
     return os.path.join(base_path, relative_path)
 
+def user_data_path(relative_path):
+    """Path in the per-user data directory (not the install folder); whoever writes there creates the directory"""
+    if sys.platform == "win32":
+        base_path = os.path.join(os.environ.get("LOCALAPPDATA") or os.path.expanduser("~\\AppData\\Local"), "WololoGPT")
+    else:
+        base_path = os.path.join(os.environ.get("XDG_DATA_HOME") or os.path.expanduser("~/.local/share"), "wololoGPT")
+    return os.path.join(base_path, relative_path)
+
+def user_cache_path(relative_path):
+    """Path in the per-user cache directory, for files the app can rebuild; created by whoever writes there"""
+    if sys.platform == "win32":
+        return user_data_path(os.path.join("Cache", relative_path))
+    base_path = os.path.join(os.environ.get("XDG_CACHE_HOME") or os.path.expanduser("~/.cache"), "wololoGPT")
+    return os.path.join(base_path, relative_path)
+
 class PopupManager(QObject):
     show_popup_signal = pyqtSignal(str, str)
 
@@ -79,10 +97,21 @@ class PopupManager(QObject):
         msg.exec()
         logger.info("Message box closed")
 
-popup_manager = PopupManager()
+popup_manager = None
+
+def get_popup_manager():
+    """The popup manager, created on first use (after the QApplication) and owned by the GUI thread"""
+    global popup_manager
+    if popup_manager is None:
+        popup_manager = PopupManager()
+        app = QApplication.instance()
+        if app is not None:
+            # First use may come from a worker thread; popups must be shown by the GUI thread
+            popup_manager.moveToThread(app.thread())
+    return popup_manager
 
 def show_popup_message(title, text):
-    QMetaObject.invokeMethod(popup_manager, "show_popup_message",
+    QMetaObject.invokeMethod(get_popup_manager(), "show_popup_message",
                              Qt.ConnectionType.QueuedConnection,
                              Q_ARG(str, title),
                              Q_ARG(str, text))
@@ -100,39 +129,34 @@ def check_system_requirements():
         if python_version.major < 3 or (python_version.major == 3 and python_version.minor < 8):
             logger.warning(f"Unsupported Python version: {python_version.major}.{python_version.minor}. Recommended: 3.8+")
         
+        # RAM, GPU and Ollama come from the system snapshot shared with the user session
+        from system_probe import system_probe
+        snapshot = system_probe.get_snapshot()
+        resources = snapshot["system_resources"]
+
         # Check RAM
-        import psutil
-        memory = psutil.virtual_memory()
-        ram_gb = round(memory.total / (1024**3), 1)
-        if ram_gb < 4:
+        ram_gb = resources.get("ram_total_gb", "Unknown")
+        if isinstance(ram_gb, (int, float)) and ram_gb < 4:
             logger.warning(f"Low RAM detected: {ram_gb}GB. Recommended: 8GB+")
         
         # Check for GPU
         gpu_info = "Unknown"
-        try:
-            import GPUtil
-            gpus = GPUtil.getGPUs()
-            if gpus:
-                gpu = gpus[0]
-                gpu_info = f"{gpu.name} with {round(gpu.memoryTotal / 1024, 1)}GB VRAM"
-                if gpu.memoryTotal < 4000:  # Less than 4GB VRAM
-                    logger.warning(f"Low VRAM detected: {round(gpu.memoryTotal / 1024, 1)}GB. Recommended: 4GB+")
-            else:
-                logger.warning("No GPU detected. Using CPU for AI processing will be slower.")
-        except ImportError:
+        gpu = resources.get("gpu_info")
+        if gpu:
+            vram_gb = round(gpu["memory_total_mb"] / 1024, 1)
+            gpu_info = f"{gpu['name']} with {vram_gb}GB VRAM"
+            if gpu["memory_total_mb"] < 4000:  # Less than 4GB VRAM
+                logger.warning(f"Low VRAM detected: {vram_gb}GB. Recommended: 4GB+")
+        elif not resources.get("gputil_available", True):
             logger.warning("GPUtil not installed. Cannot check GPU details.")
+        elif "error" not in resources:
+            logger.warning("No GPU detected. Using CPU for AI processing will be slower.")
         
         # Check for Ollama
-        try:
-            import requests
-            response = requests.get("http://localhost:11434/api/tags")
-            if response.status_code == 200:
-                models = response.json().get("models", [])
-                model_names = [model["name"] for model in models]
-                logger.info(f"Ollama is running with {len(model_names)} models: {', '.join(model_names)}")
-            else:
-                logger.warning("Ollama is running but returned an unexpected status code.")
-        except:
+        if snapshot["ollama_running"]:
+            model_names = [name for name, _ in snapshot["ollama_models"]]
+            logger.info(f"Ollama is running with {len(model_names)} models: {', '.join(model_names)}")
+        else:
             logger.warning("Ollama is not running or not installed. AI features will not work.")
         
         logger.info(f"System check completed - OS: {system}, RAM: {ram_gb}GB, GPU: {gpu_info}")
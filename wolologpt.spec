@@ -9,6 +9,9 @@ image_files = [
     ('images/logo.jpg', 'images'),
     ('images/check.png', 'images'),
     ('images/x.png', 'images'),
+    # Reference captures the model benchmark scores answers against
+    ('images/test_resource.jpg', 'images'),
+    ('images/test_civ.jpg', 'images'),
     # Add any other image files here
 ]
 
@@ -18,6 +21,13 @@ counter_data_files = [
     ('counters_data/aoe2_counter_unique_gemini.json', 'counters_data'),
 ]
 
+# Add OCR glyph templates (resource digits, civ code letters) and the match HUD signature
+ocr_data_files = [
+    ('ocr_data/resource_digits.json', 'ocr_data'),
+    ('ocr_data/hud_signature.json', 'ocr_data'),
+    ('ocr_data/civ_code_letters.json', 'ocr_data'),
+]
+
 # Add audio files
 audio_files = []
 for root, dirs, files in os.walk('audio'):
@@ -27,7 +37,7 @@ for root, dirs, files in os.walk('audio'):
 a = Analysis(['main.py'],
              pathex=[],
              binaries=[],
-             datas=image_files + counter_data_files + audio_files + [
+             datas=image_files + counter_data_files + ocr_data_files + audio_files + [
                  ('user_info.json', '.'), 
                  ('config.py', '.'), 
                  ('game_actions.py', '.'), 
@@ -36,10 +46,10 @@ a = Analysis(['main.py'],
                  ('utils.py', '.'), 
                  ('gui_layout.py', '.'), 
                  ('ai_analysis.py', '.'), 
-                 ('color_flash.py', '.'), 
+                 ('alert_overlay.py', '.'), 
                  ('api_client.py', '.')
              ],
-             hiddenimports=['PyQt6', 'keyboard', 'requests', 'json', 'tkinter', 'pygame'],
+             hiddenimports=['PyQt6', 'keyboard', 'requests', 'json', 'pygame'],
              hookspath=[],
              hooksconfig={},
              runtime_hooks=[],